@@ -0,0 +1,148 @@
+"""
+category_rules.py
+─────────────────
+Benchmark: get_category() on the compiled CategoryIndex vs. the old scan.
+
+Builds a rule set from app_categories.json plus --rules synthetic domain and
+path rules, then categorises --lookups browser URLs three ways and prints the
+cost per call:
+
+  scan      the old lookup: every url_rule in longest-first order
+  index     CategoryIndex.category() — trie + Aho-Corasick, no result cache
+  cached    get_category() — the index behind the bounded result LRU
+
+Every URL is also checked to get the same category from scan and index.
+Runs on any OS:
+
+  python -m benchmarks.category_rules --rules 2000 --lookups 20000
+"""
+
+import argparse
+import json
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+
+TLDS = ["com", "org", "net", "io", "dev", "co.uk", "app"]
+CATS = [("productive", "dev"), ("entertainment", "video"), ("communication", "chat"),
+        ("social", "feed"), ("neutral", "reference")]
+
+
+def synthetic_rules(count: int, rng: random.Random) -> dict:
+    """`count` rules: mostly domains, some subdomains, ~10% path / query rules."""
+    rules = {}
+    while len(rules) < count:
+        word = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 12)))
+        domain = f"{word}.{rng.choice(TLDS)}"
+        roll = rng.random()
+        if roll < 0.1:
+            rule = f"{domain}/{rng.choice(['watch?v=', 'r/', 'shorts/', 'docs/'])}"
+        elif roll < 0.25:
+            rule = f"{rng.choice(['app', 'docs', 'mail', 'm'])}.{domain}"
+        else:
+            rule = domain
+        main, sub = rng.choice(CATS)
+        rules[rule] = {"main": main, "sub": sub}
+    return rules
+
+
+def synthetic_urls(rules: dict, count: int, rng: random.Random) -> list[str]:
+    """Browser URLs: hits on rules (plain, subdomain, path) and misses."""
+    names = [r for r in rules if "/" not in r and "?" not in r]
+    paths = [r for r in rules if r not in names]
+    urls = []
+    for _ in range(count):
+        roll = rng.random()
+        tail = "/" + "".join(rng.choices(string.ascii_lowercase + "/?=&", k=rng.randint(0, 40)))
+        if roll < 0.5:
+            urls.append(f"https://{rng.choice(names)}{tail}")
+        elif roll < 0.65:
+            urls.append(f"https://www.{rng.choice(names)}{tail}")
+        elif roll < 0.8 and paths:
+            urls.append(f"https://{rng.choice(paths)}{''.join(rng.choices(string.ascii_letters, k=11))}")
+        else:
+            urls.append(f"https://unknown-{rng.randint(0, 10**6)}.example{tail}")
+    return urls
+
+
+def scan_category(url_rules: list, apps: dict, app_name: str, url: str):
+    """get_category() as it was: a linear pass over longest-first rules."""
+    from src.config.category_manager import BROWSER_EXES, _url_matches_rule
+
+    app_name = app_name.lower()
+    if url and url != "N/A":
+        url_lower = url.lower()
+        for domain_rule, cat in url_rules:
+            if _url_matches_rule(url_lower, domain_rule):
+                return cat["main"], cat["sub"]
+        if app_name in BROWSER_EXES or app_name.replace(".exe", "") in BROWSER_EXES:
+            return "neutral", "browser"
+    if app_name in apps:
+        return apps[app_name]["main"], apps[app_name]["sub"]
+    return "other", "other"
+
+
+def timed(fn, urls: list[str]) -> float:
+    started = time.perf_counter()
+    for url in urls:
+        fn("chrome.exe", url)
+    return (time.perf_counter() - started) / len(urls) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rules", type=int, default=2000, help="synthetic url_rules to add")
+    parser.add_argument("--lookups", type=int, default=20000)
+    parser.add_argument("--distinct", type=int, default=2000, help="distinct URLs among the lookups")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    import src.config.category_manager as category_manager
+
+    rng = random.Random(args.seed)
+    data = dict(category_manager.load_categories())
+    data["url_rules"] = {**data.get("url_rules", {}), **synthetic_rules(args.rules, rng)}
+
+    # Point the module at the enlarged rule file so get_category() uses it
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False, encoding="utf-8") as f:
+        json.dump(data, f)
+    category_manager.CATEGORY_FILE = f.name
+    try:
+        category_manager.reload_categories()
+
+        started = time.perf_counter()
+        index = category_manager.CategoryIndex(data)
+        build_ms = (time.perf_counter() - started) * 1000
+
+        url_rules = sorted(data["url_rules"].items(), key=lambda x: -len(x[0]))
+        apps = data.get("apps", {})
+        distinct = synthetic_urls(data["url_rules"], args.distinct, rng)
+        urls = [rng.choice(distinct) for _ in range(args.lookups)]
+
+        mismatches = [
+            url for url in distinct
+            if scan_category(url_rules, apps, "chrome.exe", url) != index.category("chrome.exe", url)
+        ]
+
+        scan_us = timed(lambda app, url: scan_category(url_rules, apps, app, url), urls)
+        index_us = timed(lambda app, url: index.category(app, url), urls)
+        cached_us = timed(category_manager.get_category, urls)
+    finally:
+        os.unlink(f.name)
+
+    print(f"{len(data['url_rules'])} url rules, {len(distinct)} distinct URLs, {len(urls)} lookups")
+    print(f"\n{'index build':<14}{build_ms:>10.1f} ms")
+    print(f"{'scan':<14}{scan_us:>10.1f} µs/call")
+    print(f"{'index':<14}{index_us:>10.1f} µs/call  ({scan_us / index_us:.0f}x)")
+    print(f"{'cached':<14}{cached_us:>10.1f} µs/call  ({scan_us / cached_us:.0f}x)")
+    print(f"{'mismatches':<14}{len(mismatches):>10}")
+    for url in mismatches[:5]:
+        print(f"  {url}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""
+limit_rules.py
+──────────────
+Benchmark: one limit-monitor cycle of CompiledRules.evaluate().
+
+Builds --rules synthetic limit rules (app, category and domain scopes; daily
+budgets, no-budget schedules, weekday / weekend masks, wrapping windows) and
+usage counters for --apps apps and --hosts browser hostnames, then prints
+what the limit monitor pays per cycle:
+
+  compile     CompiledRules(rows) — once per rule change
+  evaluate    evaluate(now, counters) — every cycle, no database access
+
+Runs on any OS, in a temporary LOCALAPPDATA:
+
+  python -m benchmarks.limit_rules --rules 500 --apps 300 --hosts 1000
+"""
+
+import argparse
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+MAINS = {"productive": ["coding", "office"], "entertainment": ["gaming", "video", "music"],
+         "communication": ["messaging", "social_media"], "neutral": ["browser"]}
+
+
+def word(rng: random.Random) -> str:
+    return "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10)))
+
+
+def synthetic_counters(apps: int, hosts: int, rng: random.Random):
+    from src.analytics.live_today import UsageCounters
+
+    app_names = [f"{word(rng)}.exe" for _ in range(apps)]
+    host_names = [f"{rng.choice(['', 'www.', 'm.', 'docs.'])}{word(rng)}.{rng.choice(['com', 'org', 'io'])}"
+                  for _ in range(hosts)]
+    categories = {}
+    for main, subs in MAINS.items():
+        for sub in subs:
+            categories[(main, sub)] = rng.randint(0, 7200)
+    return UsageCounters(
+        apps={name: rng.randint(0, 7200) for name in app_names},
+        categories=categories,
+        hosts={host: rng.randint(0, 3600) for host in host_names},
+    )
+
+
+def synthetic_rules(count: int, counters, rng: random.Random) -> list[tuple]:
+    apps, hosts = list(counters.apps), [h.split(".", 1)[-1] if h.count(".") > 1 else h for h in counters.hosts]
+    rows = []
+    for rule_id in range(1, count + 1):
+        scope = rng.choice(["app", "app", "category", "domain", "domain"])
+        if scope == "app":
+            target = rng.choice(apps)
+        elif scope == "category":
+            main = rng.choice(list(MAINS))
+            target = main if rng.random() < 0.5 else f"{main}/{rng.choice(MAINS[main])}"
+        else:
+            target = rng.choice(hosts)
+        limit = None if rng.random() < 0.2 else rng.randint(600, 7200)
+        days = rng.choice([127, 31, 96])
+        start, end = (None, None) if rng.random() < 0.5 else (rng.randint(0, 1439), rng.randint(0, 1439))
+        rows.append((rule_id, scope, target, limit, days, start, end, 1))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rules", type=int, default=500)
+    parser.add_argument("--apps", type=int, default=300, help="apps with usage today")
+    parser.add_argument("--hosts", type=int, default=1000, help="browser hostnames with usage today")
+    parser.add_argument("--cycles", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    # src.* resolves its data dir on import; keep it away from a real install
+    os.environ["LOCALAPPDATA"] = tempfile.mkdtemp(prefix="stasis-bench-")
+
+    from src.services.limit_rules import CompiledRules
+
+    rng = random.Random(args.seed)
+    counters = synthetic_counters(args.apps, args.hosts, rng)
+    rows = synthetic_rules(args.rules, counters, rng)
+
+    started = time.perf_counter()
+    rules = CompiledRules(rows)
+    compile_ms = (time.perf_counter() - started) * 1000
+
+    now = datetime.now()
+    started = time.perf_counter()
+    for _ in range(args.cycles):
+        result = rules.evaluate(now, counters)
+    evaluate_us = (time.perf_counter() - started) / args.cycles * 1e6
+
+    print(f"{len(rules)} rules, {args.apps} apps, {args.hosts} hosts")
+    print(f"\n{'compile':<12}{compile_ms:>10.2f} ms")
+    print(f"{'evaluate':<12}{evaluate_us:>10.1f} µs/cycle  ({evaluate_us / len(rules):.2f} µs/rule)")
+    print(f"{'matched':<12}{len(result.matches):>10}")
+    print(f"{'blocked':<12}{len(result.blocked_apps):>10} apps")
+    print(f"{'next wake':<12}{result.wait:>10.0f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
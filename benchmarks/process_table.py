@@ -0,0 +1,157 @@
+"""
+process_table.py
+────────────────
+Benchmark: the shared process table vs. per-tick psutil calls.
+
+Simulates a desktop with --processes synthetic processes (a few start and
+exit every second) behind a fake OS that counts calls and spends --call-us
+per call, roughly what one OpenProcess / NtQueryInformationProcess costs.
+For --seconds of simulated time it compares, per second:
+
+  old   ProcessCache.get_info(): Process(pid) + create_time() every logger
+        tick; process guard: process_iter(['name']) over every process
+        every 2 s while anything is blocked
+  new   ProcessTable.scan(): one PID listing, metadata only for new PIDs;
+        get_info() is a dict read plus a create_time check; the guard
+        sees start events
+
+and checks that the new guard kills every launch of a blocked app.
+Runs on any OS (psutil must be installed but is never called):
+
+  python -m benchmarks.process_table --processes 600 --seconds 300
+"""
+
+import argparse
+import random
+import sys
+import time
+
+NAMES = ["svchost.exe", "chrome.exe", "code.exe", "explorer.exe", "RuntimeBroker.exe",
+         "slack.exe", "python.exe", "conhost.exe", "discord.exe"]
+# Launched once per simulated second; only ever started explicitly
+BLOCKED = "steam.exe"
+
+
+class FakeOS:
+    """A process list plus a call counter; every call burns `call_us`."""
+
+    def __init__(self, count: int, call_us: float, rng: random.Random):
+        self.rng = rng
+        self.call_us = call_us
+        self.calls = 0
+        self.next_pid = 1000
+        self.procs: dict[int, tuple[float, str]] = {}
+        for _ in range(count):
+            self.spawn(rng.choice(NAMES))
+
+    def _call(self):
+        self.calls += 1
+        if self.call_us:
+            end = time.perf_counter() + self.call_us / 1e6
+            while time.perf_counter() < end:
+                pass
+
+    def spawn(self, name: str) -> int:
+        self.next_pid += 4
+        self.procs[self.next_pid] = (time.time(), name)
+        return self.next_pid
+
+    def churn(self, n: int):
+        for pid in self.rng.sample(list(self.procs), n):
+            del self.procs[pid]
+        for _ in range(n):
+            self.spawn(self.rng.choice(NAMES))
+
+    # -- the psutil surface the two implementations use ----------------
+    def pids(self):
+        self._call()
+        return list(self.procs)
+
+    def create_time(self, pid):
+        self._call()
+        return self.procs[pid][0]
+
+    def name(self, pid):
+        self._call()
+        return self.procs[pid][1]
+
+    def exe(self, pid):
+        self._call()
+        return f"C:/Apps/{self.procs[pid][1]}"
+
+
+def run_old(fake: FakeOS, seconds: int, foreground: int) -> float:
+    """ProcessCache as it was (one create_time per tick on a hit) + the 2 s guard rescan."""
+    cache = {}
+    started = time.perf_counter()
+    for second in range(seconds):
+        fake.churn(3)
+        pid = foreground if foreground in fake.procs else next(iter(fake.procs))
+        key = (pid, fake.create_time(pid))
+        if key not in cache:
+            cache[key] = (fake.name(pid), fake.exe(pid))
+        if second % 2 == 0:
+            for p in fake.pids():
+                if fake.name(p) == BLOCKED:
+                    pass  # would kill
+    return time.perf_counter() - started
+
+
+def run_new(fake: FakeOS, seconds: int, foreground: int) -> tuple[float, int, int]:
+    from src.core.process_table import ProcessInfo, ProcessTable
+
+    def resolve(pid):
+        if pid not in fake.procs:
+            return None
+        return ProcessInfo(pid, fake.create_time(pid), fake.name(pid), fake.exe(pid))
+
+    def create_time(pid):
+        return fake.create_time(pid) if pid in fake.procs else None
+
+    table = ProcessTable(list_pids=fake.pids, resolve=resolve, create_time=create_time)
+    killed, launched = [], 0
+    table.subscribe(lambda new: killed.extend(i.pid for i in new if i.name == BLOCKED))
+    table.scan(announce=False)
+
+    started = time.perf_counter()
+    for _ in range(seconds):
+        fake.churn(3)
+        fake.spawn(BLOCKED)
+        launched += 1
+        table.scan()
+        pid = foreground if foreground in fake.procs else next(iter(fake.procs))
+        table.get_info(pid)
+    return time.perf_counter() - started, launched, len(killed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, default=600)
+    parser.add_argument("--seconds", type=int, default=300, help="simulated seconds (one logger tick each)")
+    parser.add_argument("--call-us", type=float, default=20, help="simulated cost of one OS call")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    results = {}
+    for label in ("old", "new"):
+        fake = FakeOS(args.processes, args.call_us, random.Random(args.seed))
+        foreground = next(iter(fake.procs))
+        if label == "old":
+            elapsed = run_old(fake, args.seconds, foreground)
+        else:
+            elapsed, launched, killed = run_new(fake, args.seconds, foreground)
+        results[label] = (elapsed, fake.calls)
+
+    print(f"{args.processes} processes, {args.seconds} simulated s, {args.call_us:.0f} µs per OS call\n")
+    print(f"{'':<6}{'OS calls/s':>14}{'ms/s':>10}")
+    for label, (elapsed, calls) in results.items():
+        print(f"{label:<6}{calls / args.seconds:>14.1f}{elapsed / args.seconds * 1000:>10.2f}")
+    old, new = results["old"], results["new"]
+    print(f"\n{'speed-up':<22}{old[0] / new[0]:>8.1f} x")
+    print(f"{'blocked launches':<22}{launched:>8}")
+    print(f"{'killed on start event':<22}{killed:>8}")
+    return 0 if killed == launched else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
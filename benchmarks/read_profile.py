@@ -0,0 +1,182 @@
+"""
+read_profile.py
+───────────────
+Benchmark: read-only analytics connection profile vs. the read-write one.
+
+Seeds a synthetic database in a temporary LOCALAPPDATA (or uses an existing
+one with --localappdata), then requests /api/weekly-report and
+/api/dashboard through Flask's test client from several threads while a
+background thread writes activity rows the way the logger does. Each write
+and each request bumps today's data version, as flush_session() does, so
+today's memoized day snapshot, goal and focus results are re-read from the
+database on every request instead of answered from memory. Prints p50 / p99
+latency per endpoint for each profile:
+
+  rw  — routes read through the read-write pool settings (old behaviour)
+  ro  — routes read through analytics_db (mode=ro, query_only, mmap, …)
+
+Run from the repo root on Windows (the API imports win32 modules):
+
+  python -m benchmarks.read_profile --days 90 --requests 300 --threads 4
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+APPS = [
+    ("chrome.exe", "neutral"), ("code.exe", "productive"), ("slack.exe", "communication"),
+    ("spotify.exe", "entertainment"), ("explorer.exe", "system"), ("winword.exe", "productive"),
+    ("discord.exe", "communication"), ("steam.exe", "entertainment"),
+]
+
+
+def seed(db, days: int, rows_per_day: int):
+    """Fill daily_stats / hourly_stats / activity_facts with `days` of synthetic history."""
+    rng = random.Random(42)
+    today = date.today()
+    with db.transaction() as conn:
+        for name, _ in APPS:
+            conn.execute("INSERT OR IGNORE INTO dim_apps (app_name, exe_path) VALUES (?, '')", (name,))
+        app_ids = dict(conn.execute("SELECT app_name, id FROM dim_apps").fetchall())
+
+        for offset in range(days):
+            day = (today - timedelta(days=offset)).isoformat()
+            midnight = int(datetime.strptime(day, "%Y-%m-%d").timestamp())
+            facts, hourly, daily = [], {}, {}
+            for i in range(rows_per_day):
+                name, cat = rng.choice(APPS)
+                ts = midnight + int(i * 86400 / rows_per_day)
+                hour = (ts - midnight) // 3600
+                active, keys, clicks = rng.randint(5, 60), rng.randint(0, 80), rng.randint(0, 20)
+                facts.append((ts, day, app_ids[name], active, keys, clicks))
+                h = hourly.setdefault((day, hour, name, cat), [0, 0, 0])
+                d = daily.setdefault((day, name, cat), [0, 0, 0, 0])
+                h[0] += active; h[1] += keys; h[2] += clicks
+                d[0] += active; d[1] += keys; d[2] += clicks; d[3] += 1
+
+            conn.executemany("""
+                INSERT INTO activity_facts (ts_epoch, day, app_id, active_seconds, keystrokes, clicks)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, facts)
+            conn.executemany("""
+                INSERT OR REPLACE INTO hourly_stats (day, hour, app_name, main_category, active, keys, clicks)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, [(*k, *v) for k, v in hourly.items()])
+            conn.executemany("""
+                INSERT OR REPLACE INTO daily_stats
+                    (date, app_name, main_category, active_seconds, keystrokes, clicks, sessions)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, [(*k, *v) for k, v in daily.items()])
+
+
+def background_writes(db, stop: threading.Event):
+    """Mimic the logger: one small write transaction every ~50 ms, then a data-version bump."""
+    from src.analytics.data_version import data_versions
+
+    today = date.today().isoformat()
+    while not stop.is_set():
+        with db.transaction() as conn:
+            conn.execute("""
+                INSERT INTO activity_facts (ts_epoch, day, app_id, active_seconds)
+                VALUES (?, ?, 1, 5)
+            """, (int(time.time()), today))
+            conn.execute("""
+                UPDATE daily_stats SET active_seconds = active_seconds + 5
+                WHERE date = ? AND app_name = ?
+            """, (today, APPS[0][0]))
+        data_versions.bump(today)
+        stop.wait(0.05)
+
+
+def run_profile(client, urls, requests_per_url: int, threads: int) -> dict:
+    from src.analytics.data_version import data_versions
+
+    timings = {url: [] for url in urls}
+    lock = threading.Lock()
+    today = date.today().isoformat()
+
+    def worker(n):
+        for _ in range(n):
+            for url in urls:
+                # Time the database read, not a cache hit
+                data_versions.bump(today)
+                started = time.perf_counter()
+                resp = client.get(url)
+                elapsed = (time.perf_counter() - started) * 1000
+                if resp.status_code != 200:
+                    raise RuntimeError(f"{url} -> {resp.status_code}")
+                with lock:
+                    timings[url].append(elapsed)
+
+    per_thread = max(1, requests_per_url // threads)
+    pool = [threading.Thread(target=worker, args=(per_thread,)) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return timings
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--rows-per-day", type=int, default=1500)
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint per profile")
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--localappdata", help="use an existing data dir instead of seeding a temp one")
+    args = parser.parse_args()
+
+    seeded = args.localappdata is None
+    os.environ["LOCALAPPDATA"] = args.localappdata or tempfile.mkdtemp(prefix="stasis-bench-")
+
+    from src.database.database import db, analytics_db, init_db
+    init_db()
+    if seeded:
+        print(f"Seeding {args.days} days x {args.rows_per_day} rows into {os.environ['LOCALAPPDATA']} ...")
+        seed(db, args.days, args.rows_per_day)
+
+    from src.api.api_server import create_app
+    client = create_app(None).test_client()
+
+    urls = ["/api/weekly-report", "/api/dashboard"]
+    stop = threading.Event()
+    writer_thread = threading.Thread(target=background_writes, args=(db, stop), daemon=True)
+    writer_thread.start()
+
+    results = {}
+    try:
+        for profile, readonly in (("rw", False), ("ro", True)):
+            analytics_db.close_idle()
+            analytics_db.readonly = readonly
+            run_profile(client, urls, max(1, args.requests // 10), args.threads)   # warm-up
+            results[profile] = run_profile(client, urls, args.requests, args.threads)
+    finally:
+        stop.set()
+        writer_thread.join()
+
+    print(f"\n{'endpoint':<22}{'profile':<9}{'n':>6}{'p50 ms':>10}{'p99 ms':>10}{'mean ms':>10}")
+    for url in urls:
+        for profile in ("rw", "ro"):
+            samples = results[profile][url]
+            print(
+                f"{url:<22}{profile:<9}{len(samples):>6}"
+                f"{percentile(samples, 50):>10.2f}{percentile(samples, 99):>10.2f}"
+                f"{statistics.fmean(samples):>10.2f}"
+            )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+"""
+replay_logger.py
+────────────────
+Benchmark: the activity logger's tick loop, headless, from a replayed trace.
+
+Runs start_logging() against the replay platform backend on a virtual clock
+(see src/core/platform/replay.py) in a temporary LOCALAPPDATA, then prints
+how fast the loop ran, how many flushes it made, and whether the seconds it
+recorded add up to the time the trace spent on tracked windows:
+
+  virtual / wall  speed-up over real time (capped by --speed)
+  flushes/s       flush_session() calls per wall-clock second
+  accounted       active + idle seconds in activity_logs vs. window time
+  per day         active seconds in hourly_stats vs. daily_stats for every
+                  day the replay touched; the run exits 1 if they differ
+
+Uses a recorded trace (--trace, e.g. one captured with
+STASIS_RECORD_TRACE=trace.jsonl on Windows) or generates a synthetic one.
+Runs on any OS:
+
+  python -m benchmarks.replay_logger --hours 8 --speed 1000
+  python -m benchmarks.replay_logger --start 20:00 --hours 8 --speed 0   # crosses midnight
+  python -m benchmarks.replay_logger --trace trace.jsonl --speed 0
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+APPS = [
+    ("code.exe", "main.py - Visual Studio Code", "N/A"),
+    ("chrome.exe", "GitHub", "https://github.com/arshsisodiya/Stasis"),
+    ("chrome.exe", "YouTube", "https://www.youtube.com/watch?v=dQw4w9WgXcQ"),
+    ("slack.exe", "general | Slack", "N/A"),
+    ("winword.exe", "report.docx - Word", "N/A"),
+    ("explorer.exe", "Downloads", "N/A"),
+]
+
+
+def synthetic_trace(hours: float, seed: int, start_at: str = "09:00") -> tuple[dict, list[dict]]:
+    """A working day: window switches, typing bursts, idle breaks, one suspend."""
+    rng = random.Random(seed)
+    hour, minute = (int(part) for part in start_at.split(":"))
+    start = datetime.now().replace(hour=hour, minute=minute, second=0, microsecond=0).timestamp()
+    end = hours * 3600
+    samples = [{"t": 0, "idle": 0}]
+    t = 0.0
+    suspended = False
+
+    while t < end:
+        roll = rng.random()
+        if roll < 0.05:
+            samples.append({"t": t, "window": None})
+        else:
+            app, title, url = rng.choice(APPS)
+            samples.append({
+                "t": t,
+                "window": {"app_name": app, "pid": 1000 + APPS.index((app, title, url)),
+                           "title": title, "url": url, "exe_path": f"C:/Apps/{app}"},
+                "media": [app] if "youtube" in url else [],
+            })
+
+        dwell = rng.choice([15, 45, 120, 300, 900])
+        cursor = t
+        # Typing bursts, or one long idle stretch
+        if rng.random() < 0.15:
+            cursor += dwell
+        else:
+            while cursor < t + dwell:
+                cursor += rng.uniform(1, 20)
+                samples.append({"t": round(cursor, 1), "keys": rng.randint(1, 40), "clicks": rng.randint(0, 3)})
+        t = round(cursor + rng.uniform(0, 5), 1)
+
+        if not suspended and t > end / 2:
+            samples.append({"t": t, "suspend": True})
+            t += 1800
+            suspended = True
+
+    samples.append({"t": t, "window": None})
+    return {"trace": 1, "start": start}, samples
+
+
+def window_seconds(samples: list[dict]) -> float:
+    """Seconds the trace spends on a foreground window, excluding suspends."""
+    total, since, window = 0.0, None, None
+    for sample in samples:
+        if since is not None and window:
+            total += sample["t"] - since
+        if "window" in sample:
+            window = sample["window"]
+        since = None if sample.get("suspend") else sample["t"]
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trace", help="replay this JSONL trace instead of a synthetic one")
+    parser.add_argument("--hours", type=float, default=8, help="length of the synthetic trace")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--start", default="09:00", help="wall-clock start of the synthetic trace (HH:MM)")
+    parser.add_argument("--speed", type=float, default=1000, help="x real time; 0 = as fast as possible")
+    parser.add_argument("--write-trace", help="also save the synthetic trace here")
+    parser.add_argument("--localappdata", help="use an existing data dir instead of a temp one")
+    args = parser.parse_args()
+
+    os.environ["LOCALAPPDATA"] = args.localappdata or tempfile.mkdtemp(prefix="stasis-replay-")
+
+    from src.core.platform import set_backend
+    from src.core.platform.replay import ReplayBackend, load_trace
+    from src.database.database import db, init_db
+    import src.core.activity_logger as activity_logger
+
+    init_db()
+
+    if args.trace:
+        header, samples = load_trace(args.trace)
+    else:
+        header, samples = synthetic_trace(args.hours, args.seed, args.start)
+        if args.write_trace:
+            with open(args.write_trace, "w", encoding="utf-8") as f:
+                for record in [header, *samples]:
+                    f.write(json.dumps(record) + "\n")
+
+    backend = ReplayBackend((header, samples), speed=args.speed)
+    set_backend(backend)
+
+    flushes = 0
+    flush_session = activity_logger.flush_session
+
+    def counting_flush(session, **kwargs):
+        nonlocal flushes
+        flushes += 1
+        return flush_session(session, **kwargs)
+
+    activity_logger.flush_session = counting_flush
+
+    print(f"Replaying {len(samples)} samples ({samples[-1]['t'] / 3600:.1f} h) "
+          f"at {args.speed or 'unthrottled'}x into {os.environ['LOCALAPPDATA']} ...")
+    started = time.perf_counter()
+    activity_logger.start_logging()
+    wall = time.perf_counter() - started
+
+    with db.connection() as conn:
+        rows, active, idle = conn.execute(
+            "SELECT COUNT(*), SUM(active_seconds), SUM(idle_seconds) FROM activity_facts"
+        ).fetchone()
+        daily_active, sessions = conn.execute(
+            "SELECT SUM(active_seconds), SUM(sessions) FROM daily_stats"
+        ).fetchone()
+        # hourly_stats must add up to daily_stats day by day, midnight included
+        per_day = conn.execute("""
+            SELECT d.date, d.active, COALESCE(h.active, 0)
+            FROM (SELECT date, SUM(active_seconds) AS active FROM daily_stats GROUP BY date) d
+            LEFT JOIN (SELECT day, SUM(active) AS active FROM hourly_stats GROUP BY day) h
+                   ON h.day = d.date
+            UNION
+            SELECT h.day, 0, h.active
+            FROM (SELECT day, SUM(active) AS active FROM hourly_stats GROUP BY day) h
+            WHERE h.day NOT IN (SELECT date FROM daily_stats)
+            ORDER BY 1
+        """).fetchall()
+
+    virtual = backend.clock.elapsed
+    expected = window_seconds(samples)
+    accounted = (active or 0) + (idle or 0)
+    print(f"\n{'virtual time':<22}{virtual:>12.0f} s")
+    print(f"{'wall time':<22}{wall:>12.2f} s")
+    print(f"{'virtual / wall':<22}{virtual / wall:>12.0f} x")
+    print(f"{'flushes':<22}{flushes:>12}")
+    print(f"{'flushes/s':<22}{flushes / wall:>12.1f}")
+    print(f"{'activity rows':<22}{rows:>12}")
+    print(f"{'daily sessions':<22}{sessions or 0:>12}")
+    print(f"{'active (raw/daily)':<22}{active or 0:>6} / {daily_active or 0}")
+    print(f"{'accounted':<22}{accounted:>12} s of {expected:.0f} s window time "
+          f"({accounted / expected * 100 if expected else 0:.1f}%)")
+
+    mismatched = 0
+    for date, daily, hourly in per_day:
+        ok = daily == hourly
+        mismatched += not ok
+        print(f"{'  ' + date + ' daily/hourly':<22}{daily:>6} / {hourly}{'' if ok else '   MISMATCH'}")
+    return 1 if mismatched else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
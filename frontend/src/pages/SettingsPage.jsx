@@ -915,8 +915,8 @@ function GeneralSection({ push }) {
         <SectionLabel>Data Retention</SectionLabel>
         <div style={{ display: "flex", alignItems: "center", justifyContent: "space-between", gap: 16, paddingBottom: 14, borderBottom: `1px solid ${C.border}` }}>
           <div style={{ flex: 1, minWidth: 0 }}>
-            <div style={{ fontSize: 13, fontWeight: 500, color: C.text }}>Auto-delete activity older than</div>
-            <div style={{ fontSize: 12, color: C.textMuted, marginTop: 3, lineHeight: 1.4 }}>Data outside this window is permanently removed on next cleanup cycle</div>
+            <div style={{ fontSize: 13, fontWeight: 500, color: C.text }}>Keep detailed activity for</div>
+            <div style={{ fontSize: 12, color: C.textMuted, marginTop: 3, lineHeight: 1.4 }}>Older activity is folded into hourly and daily summaries, then removed on the next cleanup cycle</div>
           </div>
           <div style={{ display: "flex", alignItems: "center", gap: 8, flexShrink: 0 }}>
             {savingRetention && <span style={{ width: 10, height: 10, borderRadius: "50%", border: `2px solid ${C.green}40`, borderTopColor: C.green, animation: "sp-spin 0.65s linear infinite", display: "inline-block" }} />}
@@ -943,7 +943,7 @@ function GeneralSection({ push }) {
           <div style={{ paddingTop: 14, display: "flex", alignItems: "center", justifyContent: "space-between", gap: 12 }}>
             <div style={{ flex: 1 }}>
               <div style={{ fontSize: 12, color: C.textMuted, lineHeight: 1.5 }}>
-                <span style={{ color: C.yellow, fontWeight: 500 }}>Cleanup now</span> — immediately delete all activity older than <span style={{ color: C.text, fontWeight: 500 }}>{retentionLabel}</span>. This cannot be undone.
+                <span style={{ color: C.yellow, fontWeight: 500 }}>Cleanup now</span> — immediately summarise and delete detailed activity older than <span style={{ color: C.text, fontWeight: 500 }}>{retentionLabel}</span>. This cannot be undone.
               </div>
             </div>
             <Btn variant="warning" size="sm" loading={cleaningUp} onClick={() => setShowCleanupConfirm(true)}>
@@ -986,7 +986,7 @@ function GeneralSection({ push }) {
         <WarningModal
           variant="danger"
           title="Run cleanup now?"
-          body={`This will immediately and permanently delete all activity data older than ${retentionLabel}. This action cannot be undone.`}
+          body={`This will immediately and permanently delete detailed activity older than ${retentionLabel}. Hourly and daily summaries are kept. This action cannot be undone.`}
           confirmLabel={`Delete data older than ${retentionLabel}`}
           onConfirm={handleCleanupNow}
           onCancel={() => setShowCleanupConfirm(false)}
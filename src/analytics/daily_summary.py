@@ -1,40 +1,150 @@
+"""
+daily_summary.py
+────────────────
+Buffered maintenance of the daily_stats rollup.
+
+Every session flush used to run its own ``INSERT ... ON CONFLICT DO UPDATE``
+against daily_stats. The logger now adds each flush to ``daily_accumulator``
+instead, which sums the deltas per (date, app_name, main_category) in memory;
+``flush()`` writes them with a single ``executemany`` — one statement per
+touched key, however many flushes fed it. The logger flushes it every
+BATCH_COMMIT_INTERVAL, on midnight rollover and on shutdown.
+
+The same batch is added to the weekly_stats rollup (weekly_summary.py) in
+the same transaction.
+
+daily_stats therefore lags activity_facts by at most BATCH_COMMIT_INTERVAL;
+a crash loses at most that much of the rollup (the raw rows are already
+committed and retention can rebuild a missing day from them).
+
+Usage
+-----
+  from src.analytics.daily_summary import daily_accumulator
+
+  daily_accumulator.add(day, app_name, main_cat, sub_cat, active, idle, keys, clicks)
+  daily_accumulator.flush()          # one executemany, own transaction
+"""
+
 import datetime
-from src.config.category_manager import get_category
-
-
-def update_daily_stats(cursor, app_name, url, active_seconds, idle_seconds, keys, clicks):
-    today = datetime.datetime.now().strftime("%Y-%m-%d")
-    main_cat, sub_cat = get_category(app_name, url)
-
-    try:
-        cursor.execute("""
-            INSERT INTO daily_stats
-            (date, app_name, main_category, sub_category,
-             active_seconds, idle_seconds, sessions, keystrokes, clicks)
-            VALUES (?, ?, ?, ?, ?, ?, 1, ?, ?)
-            ON CONFLICT(date, app_name, main_category)
-            DO UPDATE SET
-                sub_category   = excluded.sub_category,
-                active_seconds = active_seconds + excluded.active_seconds,
-                idle_seconds   = idle_seconds   + excluded.idle_seconds,
-                sessions       = sessions       + 1,
-                keystrokes     = keystrokes     + excluded.keystrokes,
-                clicks         = clicks         + excluded.clicks
-        """, (
-            today,
-            app_name,
-            main_cat,
-            sub_cat,
-            int(active_seconds),
-            int(idle_seconds),
-            int(keys),
-            int(clicks)
-        ))
-    except Exception as e:
-        import traceback
-        import os
-        from src.config.storage import get_logs_dir
-        err_path = os.path.join(get_logs_dir(), "daily_stats_fatal.log")
-        with open(err_path, "a") as f:
-            f.write(f"\\n[{datetime.datetime.now()}] Error updating daily_stats:\\n")
-            traceback.print_exc(file=f)
+import threading
+from contextlib import contextmanager
+
+from src.analytics.data_version import data_versions
+from src.analytics.weekly_summary import update_weekly_stats
+from src.database.database import db
+
+
+class DailyStatsAccumulator:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Held from taking a batch until it has committed; see discarding()
+        self._flush_lock = threading.Lock()
+        # (date, app_name, main_category) -> [sub_category, active, idle, sessions, keys, clicks]
+        self._pending: dict[tuple, list] = {}
+
+    # ------------------------------------------------------------------
+    def add(self, day, app_name, main_cat, sub_cat, active_seconds, idle_seconds, keys, clicks,
+            new_session=True):
+        """
+        Buffer one flushed session interval. `sessions` only counts flushes
+        that started a new activity row, not periodic flushes that extended one.
+        """
+        with self._lock:
+            totals = self._pending.get((day, app_name, main_cat))
+            if totals is None:
+                totals = self._pending[(day, app_name, main_cat)] = [sub_cat, 0, 0, 0, 0, 0]
+            totals[0] = sub_cat
+            totals[1] += int(active_seconds)
+            totals[2] += int(idle_seconds)
+            totals[3] += 1 if new_session else 0
+            totals[4] += int(keys)
+            totals[5] += int(clicks)
+        return main_cat
+
+    def pending(self) -> int:
+        """Number of keys waiting to be written."""
+        with self._lock:
+            return len(self._pending)
+
+    def pending_for(self, day: str) -> list[tuple]:
+        """Unwritten [(app_name, main_category, sub_category, active, idle, sessions, keys, clicks)] for `day`."""
+        with self._lock:
+            return [
+                (app_name, main_cat, *totals)
+                for (date, app_name, main_cat), totals in self._pending.items()
+                if date == day
+            ]
+
+    @contextmanager
+    def discarding(self):
+        """
+        Drop buffered deltas and hold off flushes for the duration of the
+        block (clear-data / factory reset), so nothing buffered before or
+        during the DELETEs can resurrect rows. A flush already in progress
+        commits first.
+        """
+        with self._flush_lock:
+            with self._lock:
+                self._pending.clear()
+            yield
+            with self._lock:
+                self._pending.clear()
+
+    def flush(self) -> int:
+        """
+        Upsert every buffered key into daily_stats in one transaction and
+        clear the buffer. If the write fails the deltas are put back so the
+        next flush retries them. Returns rows written.
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+            self._write(batch)
+        for day in {key[0] for key in batch}:
+            data_versions.bump(day)
+        return len(batch)
+
+    def _write(self, batch: dict):
+        try:
+            with db.transaction() as conn:
+                conn.executemany("""
+                    INSERT INTO daily_stats
+                    (date, app_name, main_category, sub_category,
+                     active_seconds, idle_seconds, sessions, keystrokes, clicks)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(date, app_name, main_category)
+                    DO UPDATE SET
+                        sub_category   = excluded.sub_category,
+                        active_seconds = active_seconds + excluded.active_seconds,
+                        idle_seconds   = idle_seconds   + excluded.idle_seconds,
+                        sessions       = sessions       + excluded.sessions,
+                        keystrokes     = keystrokes     + excluded.keystrokes,
+                        clicks         = clicks         + excluded.clicks
+                """, [(*key, *totals) for key, totals in batch.items()])
+                # Same deltas, same transaction: weekly_stats never drifts from daily_stats
+                update_weekly_stats(conn, [(*key, *totals[1:]) for key, totals in batch.items()])
+        except Exception:
+            self._restore(batch)
+            import traceback
+            import os
+            from src.config.storage import get_logs_dir
+            err_path = os.path.join(get_logs_dir(), "daily_stats_fatal.log")
+            with open(err_path, "a") as f:
+                f.write(f"\n[{datetime.datetime.now()}] Error updating daily_stats:\n")
+                traceback.print_exc(file=f)
+            raise
+
+    def _restore(self, batch: dict):
+        with self._lock:
+            for key, totals in batch.items():
+                current = self._pending.get(key)
+                if current is None:
+                    self._pending[key] = totals
+                else:
+                    for i in range(1, 6):
+                        current[i] += totals[i]
+
+
+daily_accumulator = DailyStatsAccumulator()
@@ -1,5 +1,4 @@
 import datetime
-from src.database.database import get_connection
 
 def calculate_daily_wellbeing():
     """
@@ -0,0 +1,76 @@
+"""
+data_version.py
+───────────────
+Per-day change counters for caches of derived analytics.
+
+Goal actuals, focus scores and reports are pure functions of one day's
+rows (plus the ignore list and category rules), so they can be cached
+until that day's data changes instead of for a fixed TTL. Writers bump the
+day they touched; bulk changes bump everything:
+
+  bump(day)     flush_session() and the daily_stats flush, for the days written;
+                retention runs, for the days a tier horizon moved past
+  bump_all()    clear-data / factory reset (today_stats.invalidate) and
+                reloads of ignored_apps.json / app_categories.json
+
+Readers cache under ``version(day)`` and recompute when it differs. Today's
+live session changes every tick without a write; callers that read the live
+aggregate add ``today_stats.version`` to their key.
+
+Caches that outlive the process (report_snapshots.py) subscribe instead:
+listeners are called with the day after bump(day), and with None after
+bump_all().
+
+Usage
+-----
+  from src.analytics.data_version import data_versions
+
+  token = data_versions.version(date)
+  if cached_token != token:
+      ...recompute...
+  data_versions.subscribe(lambda day: ...)   # day, or None for everything
+"""
+
+import threading
+
+from src.config.config_registry import config_registry
+
+
+class DataVersions:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._epoch = 0
+        self._days: dict[str, int] = {}
+        self._listeners = []
+
+    def subscribe(self, callback):
+        self._listeners.append(callback)
+
+    def bump(self, day: str):
+        with self._lock:
+            self._days[day] = self._days.get(day, 0) + 1
+        self._notify(day)
+
+    def bump_all(self):
+        with self._lock:
+            self._epoch += 1
+            self._days.clear()
+        self._notify(None)
+
+    def _notify(self, day):
+        for callback in self._listeners:
+            try:
+                callback(day)
+            except Exception as e:
+                print(f"[DataVersion] Listener failed: {e}")
+
+    def version(self, day: str) -> tuple[int, int]:
+        with self._lock:
+            return self._epoch, self._days.get(day, 0)
+
+
+data_versions = DataVersions()
+
+# Which apps count and how they're categorised changes every derived value
+for _config in ("ignored_apps", "categories"):
+    config_registry.subscribe(_config, lambda _: data_versions.bump_all())
@@ -0,0 +1,210 @@
+"""
+day_totals.py
+─────────────
+One day's per-app and per-hour totals with ignored apps left out — the
+shared input of the dashboard routes, the focus score and the goal engine.
+
+Today is served from the logger's live aggregate (including the session
+that has not been flushed yet) without touching the database; any other
+date — or today before the logger has loaded it — reads daily_stats and
+hourly_stats in one query.
+
+Both come from a DaySnapshot, memoized per date until the day's data
+changes (data_version.py, plus the live aggregate's version for today).
+The snapshot also derives the dashboard payloads (wellbeing, daily-stats,
+hourly) in memory, once each, so /api/dashboard-bundle and the individual
+routes share one read per date.
+
+Usage
+-----
+  from src.analytics.day_totals import day_app_totals, day_hourly_totals, day_snapshot
+
+  for app, main, sub, active, idle, keys, clicks, sessions in day_app_totals(date):
+      ...
+  day_snapshot(date).wellbeing()
+"""
+
+import threading
+
+from src.analytics.data_version import data_versions
+from src.analytics.live_today import today_stats
+from src.config.ignored_apps_manager import is_ignored, not_ignored
+from src.database.database import analytics_db
+
+BASELINE_KPM = 35
+# Dates kept in the snapshot cache
+CACHE_DAYS = 32
+
+_cache: dict = {}  # date -> (token, DaySnapshot)
+_cache_lock = threading.Lock()
+
+
+class DaySnapshot:
+    """One day's totals and the payloads derived from them. Treat the results as read-only."""
+
+    def __init__(self, date: str, apps: list, hourly: list):
+        self.date = date
+        # (app_name, main_category, sub_category, active, idle, keys, clicks, sessions), busiest first
+        self.apps = apps
+        # (hour, app_name, active)
+        self.hourly = hourly
+        self._derived = {}
+
+    def _memo(self, name, build):
+        value = self._derived.get(name)
+        if value is None:
+            value = self._derived[name] = build()
+        return value
+
+    def totals(self) -> dict:
+        """Day totals over all apps, and the app with the most active time."""
+        return self._memo("totals", self._totals)
+
+    def _totals(self) -> dict:
+        totals = {"active": 0, "idle": 0, "keys": 0, "clicks": 0, "sessions": 0, "categories": {}}
+        app_totals = {}
+        for app_name, main_cat, _, active, idle, keys, clicks, sessions in self.apps:
+            active = active or 0
+            totals["active"] += active
+            totals["idle"] += idle or 0
+            totals["keys"] += keys or 0
+            totals["clicks"] += clicks or 0
+            totals["sessions"] += sessions or 0
+            totals["categories"][main_cat] = totals["categories"].get(main_cat, 0) + active
+            app_totals[app_name] = app_totals.get(app_name, 0) + active
+        totals["top_app"] = max(app_totals, key=app_totals.get) if app_totals else "N/A"
+        return totals
+
+    def app_stats(self) -> list[dict]:
+        """/api/daily-stats"""
+        return self._memo("app_stats", lambda: [
+            {
+                "app": app_name,
+                "main": main,
+                "sub": sub,
+                "active": active or 0,
+                "idle": idle or 0,
+                "keys": keys or 0,
+                "clicks": clicks or 0,
+            }
+            for app_name, main, sub, active, idle, keys, clicks, _ in self.apps
+        ])
+
+    def hourly_minutes(self) -> list[int]:
+        """/api/hourly: active minutes in each hour of the day."""
+        return self._memo("hourly_minutes", self._hourly_minutes)
+
+    def _hourly_minutes(self) -> list[int]:
+        hourly_map = {}
+        for hour, _, active in self.hourly:
+            hourly_map[hour] = hourly_map.get(hour, 0) + (active or 0)
+        return [(hourly_map.get(h) or 0) // 60 for h in range(24)]
+
+    def wellbeing(self) -> dict:
+        """/api/wellbeing"""
+        return self._memo("wellbeing", self._wellbeing)
+
+    def _wellbeing(self) -> dict:
+        totals = self.totals()
+        categories = totals["categories"]
+
+        productive = categories.get("productive", 0)
+        neutral = categories.get("neutral", 0) + categories.get("other", 0)
+        unproductive = categories.get("unproductive", 0)
+
+        # Screen time = ALL non-ignored usage (entertainment, communication, system, etc.)
+        total_active = totals["active"]
+
+        if total_active == 0:
+            productivity_percent = 0.0
+        else:
+            minutes_active = total_active / 60
+            kpm = totals["keys"] / minutes_active if minutes_active > 0 else 0
+            engagement_factor = min(1.0, kpm / BASELINE_KPM)
+            effective_productive = productive * engagement_factor
+            weighted_time = (
+                effective_productive * 1.0 +
+                neutral * 0.4 +
+                unproductive * 0.0
+            )
+            productivity_percent = round((weighted_time / total_active) * 100, 1)
+
+        return {
+            "totalScreenTime": total_active,
+            "totalIdleTime": totals["idle"],
+            "totalKeystrokes": totals["keys"],
+            "totalClicks": totals["clicks"],
+            "totalSessions": totals["sessions"],
+            "productivityPercent": productivity_percent,
+            "mostUsedApp": totals["top_app"]
+        }
+
+
+def _load(selected_date: str) -> DaySnapshot:
+    live = today_stats.snapshot(selected_date)
+    if live is not None:
+        return DaySnapshot(
+            selected_date,
+            [row for row in live.apps if not is_ignored(row[0])],
+            [row for row in live.hourly if not is_ignored(row[1])],
+        )
+
+    # Both rollups in one round-trip; hour is NULL on the daily_stats rows
+    with analytics_db.connection() as conn:
+        rows = conn.execute(f"""
+            SELECT
+                app_name,
+                main_category,
+                sub_category,
+                SUM(active_seconds),
+                SUM(idle_seconds),
+                SUM(keystrokes),
+                SUM(clicks),
+                SUM(sessions),
+                NULL AS hour
+            FROM daily_stats
+            WHERE date = ? AND {not_ignored("app_name")}
+            GROUP BY app_name, main_category
+
+            UNION ALL
+
+            SELECT app_name, NULL, NULL, SUM(active), NULL, NULL, NULL, NULL, hour
+            FROM hourly_stats
+            WHERE day = ? AND {not_ignored("app_name")}
+            GROUP BY hour, app_name
+        """, (selected_date, selected_date)).fetchall()
+
+    apps = [row[:8] for row in rows if row[8] is None]
+    apps.sort(key=lambda row: row[3] or 0, reverse=True)
+    hourly = [(row[8], row[0], row[3]) for row in rows if row[8] is not None]
+    return DaySnapshot(selected_date, apps, hourly)
+
+
+def day_snapshot(selected_date: str) -> DaySnapshot:
+    """The DaySnapshot of `selected_date`, reused until that day's data changes."""
+    live_version = today_stats.version if today_stats.day == selected_date else None
+    token = (data_versions.version(selected_date), live_version)
+    with _cache_lock:
+        cached = _cache.get(selected_date)
+    if cached is not None and cached[0] == token:
+        return cached[1]
+
+    snapshot = _load(selected_date)
+    with _cache_lock:
+        if len(_cache) >= CACHE_DAYS:
+            _cache.clear()
+        _cache[selected_date] = (token, snapshot)
+    return snapshot
+
+
+def day_app_totals(selected_date):
+    """
+    [(app_name, main_category, sub_category, active, idle, keys, clicks, sessions)]
+    per app and category for one day, busiest first, ignored apps left out.
+    """
+    return day_snapshot(selected_date).apps
+
+
+def day_hourly_totals(selected_date):
+    """[(hour, app_name, active)] for one day without ignored apps; today from the live aggregate."""
+    return day_snapshot(selected_date).hourly
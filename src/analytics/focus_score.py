@@ -0,0 +1,269 @@
+"""
+focus_score.py
+──────────────
+The daily focus score (0–100) behind /api/focus, the sparklines, the weekly
+report and daily_focus_score goals.
+
+  deep work     productive time weighted by typing engagement   (≤ 40)
+  flow bonus    +5 per 20-minute productive streak in one app   (≤ 15)
+  engagement    keystrokes per minute vs. BASELINE_KPM          (≤ 15)
+  switching     − for leaving productive apps                   (≤ 30)
+  idle          − idle / active ratio                           (≤ 20)
+
+Deep work, engagement and idle come from the day's per-app totals
+(day_totals.day_app_totals). Switching and flow depend on the order of the
+day's sessions and come from a FocusState (focus_state.py):
+
+  today       today_stats.focus_state() — stepped by the logger on every
+              flush, so the score never re-reads the day's rows
+  past days   the focus_daily row, reused while the totals stored with it
+              still match the day's; otherwise the day's rows are replayed
+              from whichever retention tier holds them and the result is
+              persisted. The retention job persists days before their raw
+              rows are pruned, so scores stay exact after downsampling.
+
+Each session counts under the category it was logged with.
+
+Usage
+-----
+  from src.analytics.focus_score import focus_for_day, focus_scores
+
+  focus_for_day("2024-01-15")["score"]
+  focus_scores("2024-01-01", "2024-01-31")   # {date: result}, days with activity
+"""
+
+import datetime
+import threading
+
+from src.analytics.data_version import data_versions
+from src.analytics.day_totals import day_app_totals
+from src.analytics.focus_state import FocusState
+from src.analytics.live_today import today_stats
+from src.config.category_manager import get_category
+from src.config.ignored_apps_manager import is_ignored, not_ignored
+from src.database.database import (
+    analytics_db, get_focus_daily_range, get_unscored_raw_days, save_focus_daily
+)
+from src.database.tiers import tier_for_day, raw_connection
+
+BASELINE_KPM = 35
+# Past days kept in the in-memory result cache
+CACHE_DAYS = 400
+
+_cache: dict = {}  # date -> (data version, result)
+_cache_lock = threading.Lock()
+
+
+def day_focus_state(date: str) -> FocusState:
+    """Replay one past day's activity rows, ignored apps left out."""
+    with analytics_db.connection() as conn:
+        tier = tier_for_day(conn, date)
+
+        if tier == "raw":
+            rows = conn.execute(f"""
+                SELECT id, app_name, url, active_seconds
+                FROM activity_logs
+                WHERE day = ? AND {not_ignored("app_name")}
+                ORDER BY ts_epoch ASC
+            """, (date,)).fetchall()
+        elif tier == "archive":
+            # Archive files have no ignored_apps table; filter here
+            with raw_connection(conn, tier, date) as source:
+                rows = [
+                    row for row in source.execute("""
+                        SELECT id, app_name, url, active_seconds
+                        FROM activity_logs
+                        WHERE day = ?
+                        ORDER BY ts_epoch ASC
+                    """, (date,))
+                    if not is_ignored(row[1])
+                ]
+        elif tier == "hourly":
+            # Coarser switch sequence once raw rows are gone: apps in each
+            # hour, busiest first
+            return FocusState.from_rows(
+                ((hour, app_name, main_cat), app_name, main_cat, active or 0)
+                for hour, app_name, main_cat, active in conn.execute(f"""
+                    SELECT hour, app_name, main_category, SUM(active) AS active
+                    FROM hourly_stats
+                    WHERE day = ?
+                      AND active > 0
+                      AND {not_ignored("app_name")}
+                    GROUP BY hour, app_name, main_category
+                    ORDER BY hour ASC, active DESC
+                """, (date,))
+            )
+        else:
+            return FocusState()
+
+    return FocusState.from_rows(
+        (row_id, app_name, get_category(app_name, url)[0], active or 0)
+        for row_id, app_name, url, active in rows
+    )
+
+
+def _totals(app_rows) -> tuple[int, int, int]:
+    """(active, idle, keystrokes) — what a focus_daily row is validated against."""
+    active = idle = keys = 0
+    for row in app_rows:
+        active += row[3] or 0
+        idle += row[4] or 0
+        keys += row[5] or 0
+    return active, idle, keys
+
+
+def _stored_result(row) -> dict:
+    _, score, deep_work, flow, engagement, switch, idle_penalty, *_ = row
+    return {
+        "score": score,
+        "deepWorkSeconds": deep_work,
+        "flowBonus": flow,
+        "engagementScore": engagement,
+        "switchPenalty": switch,
+        "idlePenalty": idle_penalty
+    }
+
+
+def score_day(app_rows, state: FocusState) -> dict:
+    """
+    The score and its components from day_app_totals() rows and the day's
+    session-sequence state.
+    """
+    productive_seconds = 0
+    total_active = 0
+    total_keys = 0
+    idle_seconds = 0
+
+    for app, category, _, active, idle, keys, _, _ in app_rows:
+        active = active or 0
+
+        total_active += active
+        total_keys += keys or 0
+        idle_seconds += idle or 0
+
+        if category == "productive":
+            productive_seconds += active
+
+    if total_active <= 0:
+        return {"score": 0}
+
+    switch_penalty, flow_bonus = state.components()
+
+    minutes_active = total_active / 60
+
+    kpm = total_keys / minutes_active if minutes_active > 0 else 0
+
+    engagement_factor = min(1.0, kpm / BASELINE_KPM)
+
+    effective_productive = productive_seconds * engagement_factor
+
+    engagement_score = engagement_factor * 15
+
+    deep_work_score = min(40, (effective_productive / 3600) * 20)
+
+    idle_ratio = idle_seconds / total_active
+
+    idle_penalty = min(20, idle_ratio * 25)
+
+    score = (
+        deep_work_score
+        + flow_bonus
+        + engagement_score
+        - switch_penalty
+        - idle_penalty
+    )
+
+    score = max(0, min(100, round(score)))
+
+    return {
+        "score": score,
+        "deepWorkSeconds": productive_seconds,
+        "flowBonus": flow_bonus,
+        "engagementScore": round(engagement_score, 1),
+        "switchPenalty": round(switch_penalty, 1),
+        "idlePenalty": round(idle_penalty, 1)
+    }
+
+
+def focus_for_day(date: str, app_rows=None) -> dict:
+    """
+    The focus score for `date`. Pass the day's day_app_totals() rows if they
+    are already at hand.
+    """
+    state = today_stats.focus_state(date)
+    if state is not None:
+        return score_day(day_app_totals(date) if app_rows is None else app_rows, state)
+
+    token = data_versions.version(date)
+    with _cache_lock:
+        cached = _cache.get(date)
+    if cached is not None and cached[0] == token:
+        return cached[1]
+
+    if app_rows is None:
+        app_rows = day_app_totals(date)
+    totals = _totals(app_rows)
+    if totals[0] <= 0:
+        result = {"score": 0}
+    else:
+        stored = get_focus_daily_range(date, date)
+        if stored and tuple(stored[0][7:]) == totals:
+            result = _stored_result(stored[0])
+        else:
+            result = score_day(app_rows, day_focus_state(date))
+            if date < datetime.date.today().isoformat():
+                save_focus_daily(date, result, totals)
+
+    with _cache_lock:
+        if len(_cache) >= CACHE_DAYS:
+            _cache.clear()
+        _cache[date] = (token, result)
+    return result
+
+
+def focus_scores(start: str, end: str) -> dict:
+    """
+    {date: focus_for_day() result} for the days in [start, end] with
+    activity. Persisted days cost two queries for the whole range.
+    """
+    today = datetime.date.today().isoformat()
+    with analytics_db.connection() as conn:
+        day_totals = conn.execute(f"""
+            SELECT date, SUM(active_seconds), SUM(idle_seconds), SUM(keystrokes)
+            FROM daily_stats
+            WHERE date >= ? AND date <= ? AND {not_ignored("app_name")}
+            GROUP BY date
+        """, (start, end)).fetchall()
+    stored = {row[0]: row for row in get_focus_daily_range(start, end)}
+
+    scores = {}
+    for date, active, idle, keys in day_totals:
+        if date == today or not active:
+            continue
+        row = stored.get(date)
+        if row is not None and tuple(row[7:]) == (active, idle or 0, keys or 0):
+            scores[date] = _stored_result(row)
+        else:
+            scores[date] = focus_for_day(date)
+
+    if start <= today <= end:
+        result = focus_for_day(today)
+        if "deepWorkSeconds" in result:
+            scores[today] = result
+    return scores
+
+
+def persist_finished_days(before: str) -> int:
+    """
+    Score and persist every day before `before` that still has raw rows but
+    no focus_daily row. The retention job calls this before pruning raw
+    rows. Returns the number of days scored.
+    """
+    today = datetime.date.today().isoformat()
+    days = [day for day in get_unscored_raw_days(before) if day < today]
+    for day in days:
+        # A cached result may predate a clear of focus_daily; score afresh
+        with _cache_lock:
+            _cache.pop(day, None)
+        focus_for_day(day)
+    return len(days)
@@ -0,0 +1,82 @@
+"""
+focus_state.py
+──────────────
+The order-dependent half of the focus score, as a state machine.
+
+Switch penalty and flow bonus depend on the sequence of a day's activity
+rows, not just its totals. FocusState consumes that sequence one flush at a
+time — the logger's live aggregate feeds it every flush_session(), so
+today's score never re-reads the day's rows:
+
+  step(row_id, app, category, active)
+      a new row_id is a new session: a switch away from a productive app
+      adds its penalty, and the productive streak continues (same app) or
+      restarts; a non-productive row ends the streak, earning the flow
+      bonus if it ran FLOW_STREAK_SECONDS. The same row_id again is a
+      periodic flush extending the current session.
+
+``components()`` returns the capped (switch_penalty, flow_bonus) so far,
+counting a streak still running. focus_score.py combines them with the
+day's totals.
+
+Usage
+-----
+  state = FocusState()
+  state.step(row_id, "code.exe", "productive", 60)
+  switch_penalty, flow_bonus = state.components()
+"""
+
+# Penalty for leaving a productive app, by the category switched to
+SWITCH_COST = {"productive": 0.2, "neutral": 1.0, "unproductive": 5.0}
+SWITCH_PENALTY_CAP = 30
+FLOW_STREAK_SECONDS = 1200
+FLOW_BONUS = 5
+FLOW_BONUS_CAP = 15
+
+
+class FocusState:
+    __slots__ = ("row_id", "app", "category", "streak", "switch_penalty", "flow_bonus")
+
+    def __init__(self):
+        self.row_id = None
+        self.app = None
+        self.category = None
+        self.streak = 0
+        self.switch_penalty = 0
+        self.flow_bonus = 0
+
+    @classmethod
+    def from_rows(cls, rows) -> "FocusState":
+        """Replay [(row_id, app_name, category, active)] in time order."""
+        state = cls()
+        for row in rows:
+            state.step(*row)
+        return state
+
+    def copy(self) -> "FocusState":
+        state = FocusState()
+        for name in self.__slots__:
+            setattr(state, name, getattr(self, name))
+        return state
+
+    def step(self, row_id, app_name: str, category: str, active: int):
+        if row_id is not None and row_id == self.row_id:
+            if self.category == "productive":
+                self.streak += active
+            return
+
+        if self.app is not None and app_name != self.app and self.category == "productive":
+            self.switch_penalty += SWITCH_COST.get(category, 0)
+
+        if category == "productive":
+            self.streak = self.streak + active if app_name == self.app else active
+        else:
+            if self.streak >= FLOW_STREAK_SECONDS:
+                self.flow_bonus += FLOW_BONUS
+            self.streak = 0
+
+        self.row_id, self.app, self.category = row_id, app_name, category
+
+    def components(self) -> tuple[float, int]:
+        flow_bonus = self.flow_bonus + (FLOW_BONUS if self.streak >= FLOW_STREAK_SECONDS else 0)
+        return min(SWITCH_PENALTY_CAP, self.switch_penalty), min(FLOW_BONUS_CAP, flow_bonus)
@@ -0,0 +1,222 @@
+"""
+goal_engine.py
+──────────────
+Goal actuals for a day, computed once and shared by /api/goals/progress,
+the blocking service's goal notifications and the weekly report.
+
+evaluate(date) takes the active goals (cached until a goal is created,
+edited or deleted) and derives every goal type from one pass over the
+day's per-app totals (day_totals.day_app_totals — the live aggregate for
+today, daily_stats otherwise):
+
+  daily_screen_time        total active seconds
+  daily_productive_time    active seconds in "productive" apps
+  daily_productivity_pct   productive / total, in percent
+  daily_focus_score        focus_score.focus_for_day(), only if such a goal exists
+
+Results are cached per date until that day's data changes (data_version.py,
+plus the live aggregate's version for today). goal_logs rows whose values
+changed since they were last written go to the writer thread as one
+executemany; the first write of a date compares with its stored rows, so a
+restart does not rewrite (and re-invalidate) days that have not changed.
+
+Usage
+-----
+  from src.analytics.goal_engine import goal_engine
+
+  for result in goal_engine.evaluate(date):
+      result.actual, result.met, result.progress_pct
+  goal_engine.backfill(monday, sunday).result()   # weekly report
+  goal_engine.invalidate_goals()                  # after goal CRUD
+"""
+
+import datetime
+import threading
+from typing import NamedTuple
+
+from src.analytics.data_version import data_versions
+from src.analytics.day_totals import day_app_totals
+from src.analytics.focus_score import focus_for_day
+from src.analytics.live_today import today_stats
+from src.database.database import (
+    get_all_goals, get_goal_log_keys, get_goal_log_values, log_goal_progress_batch
+)
+
+# Dates kept in the result cache
+CACHE_DAYS = 400
+
+
+class GoalResult(NamedTuple):
+    goal_id: int
+    goal_type: str
+    label: str | None
+    target_value: float
+    target_unit: str
+    direction: str
+    actual: float
+    met: bool
+    progress_pct: float
+
+    def as_dict(self) -> dict:
+        return {
+            "id": self.goal_id, "goal_type": self.goal_type, "label": self.label,
+            "target_value": self.target_value, "target_unit": self.target_unit,
+            "direction": self.direction, "actual_value": self.actual,
+            "met": self.met, "progress_pct": self.progress_pct
+        }
+
+
+def day_actuals(date: str, with_focus: bool) -> dict:
+    """Every goal type's actual value for `date`, from one pass over its app totals."""
+    app_rows = day_app_totals(date)
+    total = productive = 0
+    for _, main_category, _, active, *_ in app_rows:
+        active = active or 0
+        total += active
+        if main_category == "productive":
+            productive += active
+
+    actuals = {
+        "daily_screen_time": total,
+        "daily_productive_time": productive,
+        "daily_productivity_pct": round(productive / total * 100, 1) if total > 0 else 0.0,
+    }
+    if with_focus:
+        actuals["daily_focus_score"] = focus_for_day(date, app_rows).get("score", 0)
+    return actuals
+
+
+def _result(goal, actual: float) -> GoalResult:
+    goal_id, goal_type, label, target_value, target_unit, direction = goal[:6]
+    if direction == "under":
+        met = actual <= target_value
+    else:
+        met = actual >= target_value
+    pct = 0
+    if target_value > 0:
+        if direction == "under":
+            pct = round(max(0, (1 - actual / target_value)) * 100, 1)
+        else:
+            pct = round(min(100, actual / target_value * 100), 1)
+    return GoalResult(goal_id, goal_type, label, target_value, target_unit, direction, actual, met, pct)
+
+
+class GoalEngine:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Active goal rows; None = reload
+        self._goals: list | None = None
+        # date -> (token, results, total_active)
+        self._cache: dict[str, tuple] = {}
+        # (goal_id, date) -> (actual, target, met) as last written to goal_logs
+        self._logged: dict[tuple, tuple] = {}
+        # Dates whose stored goal_logs rows are in _logged
+        self._seeded: set[str] = set()
+
+    def invalidate_goals(self):
+        """A goal was created, edited or deleted."""
+        with self._lock:
+            self._goals = None
+            self._cache.clear()
+
+    def _active_goals(self) -> list:
+        goals = self._goals
+        if goals is None:
+            goals = [row for row in get_all_goals() if row[6]]
+            with self._lock:
+                self._goals = goals
+        return goals
+
+    @staticmethod
+    def _token(date: str):
+        live_version = today_stats.version if today_stats.day == date else None
+        return data_versions.version(date), live_version
+
+    # ------------------------------------------------------------------
+    def _evaluate(self, date: str) -> tuple[list, float]:
+        token = self._token(date)
+        with self._lock:
+            cached = self._cache.get(date)
+        if cached is not None and cached[0] == token:
+            return cached[1], cached[2]
+
+        goals = self._active_goals()
+        actuals = day_actuals(date, any(goal[1] == "daily_focus_score" for goal in goals))
+        results = [_result(goal, actuals.get(goal[1], 0)) for goal in goals]
+
+        with self._lock:
+            if len(self._cache) >= CACHE_DAYS:
+                self._cache.clear()
+            self._cache[date] = (token, results, actuals["daily_screen_time"])
+        return results, actuals["daily_screen_time"]
+
+    def evaluate(self, date: str, log: bool = True) -> list[GoalResult]:
+        """All active goals for `date`. With `log`, changed results are upserted into goal_logs."""
+        results, _ = self._evaluate(date)
+        if log:
+            written = self._write([(r, date) for r in results], overwrite=True)
+            # A past day's goal_logs are part of its week's stored report
+            if written is not None and date < datetime.date.today().isoformat():
+                data_versions.bump(date)
+        return results
+
+    def backfill(self, start: str, end: str):
+        """
+        Log the days in [start, end] (up to today) that have activity but no
+        goal_logs row yet, for goals that existed that day. Existing rows are
+        left alone. Returns the writer Future, or None if nothing was missing.
+        """
+        goals = self._active_goals()
+        if not goals:
+            return None
+        end = min(end, datetime.date.today().isoformat())
+        logged = set(get_goal_log_keys(start, end))
+        created = {goal[0]: (goal[7] or "")[:10] for goal in goals}
+
+        pending = []
+        day = datetime.date.fromisoformat(start)
+        while day.isoformat() <= end:
+            date = day.isoformat()
+            day += datetime.timedelta(days=1)
+            missing = {gid for gid, since in created.items() if since <= date and (gid, date) not in logged}
+            if not missing:
+                continue
+            results, total_active = self._evaluate(date)
+            if total_active > 0:
+                pending.extend((r, date) for r in results if r.goal_id in missing)
+        return self._write(pending, overwrite=False)
+
+    def _seed(self, dates: set):
+        """Load the stored goal_logs rows of `dates` not seen yet into _logged."""
+        with self._lock:
+            dates = dates - self._seeded
+        if not dates:
+            return
+        stored = get_goal_log_values(min(dates), max(dates))
+        with self._lock:
+            for goal_id, date, actual, target, met in stored:
+                if date in dates:
+                    # A value written since is newer than the stored row
+                    self._logged.setdefault((goal_id, date), (actual, target, bool(met)))
+            self._seeded |= dates
+
+    def _write(self, results, overwrite: bool):
+        self._seed({date for _, date in results})
+        rows = []
+        with self._lock:
+            for result, date in results:
+                values = (result.actual, result.target_value, result.met)
+                key = (result.goal_id, date)
+                if self._logged.get(key) == values:
+                    continue
+                self._logged[key] = values
+                rows.append((result.goal_id, date, *values))
+            if len(self._logged) > CACHE_DAYS * 8:
+                self._logged.clear()
+                self._seeded.clear()
+        if not rows:
+            return None
+        return log_goal_progress_batch(rows, overwrite=overwrite)
+
+
+goal_engine = GoalEngine()
@@ -0,0 +1,88 @@
+import datetime
+
+
+def split_by_hour(end: datetime.datetime, duration_seconds: float) -> list[tuple[str, int, float]]:
+    """
+    Split the wall-clock interval [end - duration, end] into clock-hour
+    buckets. Returns [(day, hour, fraction_of_interval), ...] in order.
+
+    Every bucket falls on `end`'s day: flush_session() records the whole
+    interval under that day in activity_facts and daily_stats, so the part
+    of an interval that began before midnight counts towards hour 0.
+    """
+    if duration_seconds <= 0:
+        return [(end.strftime("%Y-%m-%d"), end.hour, 1.0)]
+
+    midnight = end.replace(hour=0, minute=0, second=0, microsecond=0)
+    start = max(midnight, end - datetime.timedelta(seconds=duration_seconds))
+    if start >= end:
+        return [(end.strftime("%Y-%m-%d"), end.hour, 1.0)]
+    duration_seconds = (end - start).total_seconds()
+    pieces = []
+    cursor = start
+    while cursor < end:
+        next_hour = cursor.replace(minute=0, second=0, microsecond=0) + datetime.timedelta(hours=1)
+        bucket_end = min(end, next_hour)
+        pieces.append((
+            cursor.strftime("%Y-%m-%d"),
+            cursor.hour,
+            (bucket_end - cursor).total_seconds() / duration_seconds,
+        ))
+        cursor = bucket_end
+    return pieces
+
+
+def _apportion(total: int, fractions: list[float]) -> list[int]:
+    """Split an integer total by fractions so the parts always sum to total."""
+    parts = []
+    allotted = 0
+    cumulative = 0.0
+    for fraction in fractions:
+        cumulative += fraction
+        upto = round(total * cumulative)
+        parts.append(upto - allotted)
+        allotted = upto
+    # Float drift can leave the last bucket a second short
+    if parts:
+        parts[-1] += total - allotted
+    return parts
+
+
+def hourly_rows(app_name, main_category, end, active_seconds, idle_seconds, keys, clicks) -> list[tuple]:
+    """
+    Split a flushed session across every clock hour it overlapped (so a
+    10:50-11:10 session lands 10 min in each). Returns
+    [(day, hour, app_name, main_category, active, idle, keys, clicks), ...].
+    """
+    pieces = split_by_hour(end, float(active_seconds) + float(idle_seconds))
+    fractions = [p[2] for p in pieces]
+
+    rows = zip(
+        pieces,
+        _apportion(int(active_seconds), fractions),
+        _apportion(int(idle_seconds), fractions),
+        _apportion(int(keys), fractions),
+        _apportion(int(clicks), fractions),
+    )
+    return [
+        (day, hour, app_name, main_category, act, idl, k, c)
+        for (day, hour, _), act, idl, k, c in rows
+    ]
+
+
+def update_hourly_stats(cursor, app_name, main_category, end, active_seconds, idle_seconds, keys, clicks):
+    """Upsert a flushed session into hourly_stats; returns the rows written."""
+    rows = hourly_rows(app_name, main_category, end, active_seconds, idle_seconds, keys, clicks)
+
+    cursor.executemany("""
+        INSERT INTO hourly_stats
+            (day, hour, app_name, main_category, active, idle, keys, clicks)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(day, hour, app_name, main_category)
+        DO UPDATE SET
+            active = active + excluded.active,
+            idle   = idle   + excluded.idle,
+            keys   = keys   + excluded.keys,
+            clicks = clicks + excluded.clicks
+    """, rows)
+    return rows
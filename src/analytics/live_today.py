@@ -0,0 +1,337 @@
+"""
+live_today.py
+─────────────
+In-memory aggregate of today's usage, kept by the logger and read by the API.
+
+The dashboard polls today's numbers every few seconds. Reading them from
+daily_stats / hourly_stats / activity_logs costs a query per poll and misses
+whatever the current session has accumulated since its last flush (up to
+PERIODIC_FLUSH_INTERVAL). Instead the logger keeps ``today_stats`` current:
+
+  load(day)      once per day (startup, midnight, after clear-data): reads
+                 today's rollups, unwritten daily_accumulator deltas and
+                 activity rows from the database
+  add_flush()    every flush_session() — the same deltas it wrote
+  set_live()     every tick — the unflushed part of the current session
+
+``snapshot(date)`` merges the flushed totals with the live session and
+returns the same row shapes the routes read from SQL, with no database I/O.
+It returns None for any other date, or until the logger has loaded today,
+and routes then fall back to the database. ``counters(date)`` is the cheap
+per-app / per-category / per-host view of the same totals, used by the
+blocking service's limit monitor and limit rules. ``focus_state(date)`` is
+the focus score's session-sequence state (focus_state.py), stepped on every
+add_flush() so today's score never replays the day's rows.
+
+Usage
+-----
+  from src.analytics.live_today import today_stats
+
+  live = today_stats.snapshot(selected_date)
+  if live is not None:
+      rows = live.apps
+"""
+
+import datetime
+import threading
+from typing import NamedTuple
+
+from src.analytics.daily_summary import daily_accumulator
+from src.analytics.data_version import data_versions
+from src.analytics.focus_state import FocusState
+from src.analytics.hourly_summary import hourly_rows
+from src.config.category_manager import get_category, hostname
+from src.config.config_registry import config_registry
+from src.config.ignored_apps_manager import is_ignored
+from src.database.database import db
+
+
+class TodaySnapshot(NamedTuple):
+    date: str
+    # (app_name, main_category, sub_category, active, idle, keys, clicks, sessions), busiest first
+    apps: list
+    # (hour, app_name, active)
+    hourly: list
+    # (timestamp, app_name, active) per activity row, oldest first
+    rows: list
+
+
+class UsageCounters(NamedTuple):
+    # app_name -> active seconds
+    apps: dict
+    # (main_category, sub_category) -> active seconds
+    categories: dict
+    # hostname -> active seconds in a browser
+    hosts: dict
+
+
+def _timestamp(epoch: float) -> str:
+    # Same format as the activity_logs view's `timestamp` column
+    return datetime.datetime.fromtimestamp(epoch).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class TodayAggregate:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._day: str | None = None
+        # (app_name, main_category) -> [sub_category, active, idle, sessions, keys, clicks]
+        self._apps: dict[tuple, list] = {}
+        # (hour, app_name, main_category) -> active
+        self._hours: dict[tuple, int] = {}
+        # activity_facts id -> [ts_epoch, app_name, active, main_category]
+        self._rows: dict[int, list] = {}
+        # Focus sequence state over _rows, ignored apps skipped
+        self._focus = FocusState()
+        # hostname -> active
+        self._hosts: dict[str, int] = {}
+        self._live: dict | None = None
+        # Bumped by invalidate() so a load() racing a clear-data is dropped
+        self._generation = 0
+        # Bumped on every change, live session included (cache key for today)
+        self._version = 0
+
+    # ------------------------------------------------------------------
+    @property
+    def day(self) -> str | None:
+        return self._day
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def load(self, day: str):
+        """
+        (Re)build the aggregate for `day` from the database. Call on the
+        logger thread, which is also the only writer of the rows and deltas
+        being read, so nothing can be half-written.
+        """
+        generation = self._generation
+        with db.connection() as conn:
+            daily = conn.execute("""
+                SELECT app_name, main_category, sub_category,
+                       active_seconds, idle_seconds, sessions, keystrokes, clicks
+                FROM daily_stats
+                WHERE date = ?
+            """, (day,)).fetchall()
+            hourly = conn.execute("""
+                SELECT hour, app_name, main_category, active
+                FROM hourly_stats
+                WHERE day = ?
+            """, (day,)).fetchall()
+            rows = conn.execute("""
+                SELECT id, ts_epoch, app_name, active_seconds, url
+                FROM activity_logs
+                WHERE day = ?
+                ORDER BY ts_epoch
+            """, (day,)).fetchall()
+
+        apps = {}
+        for app_name, main_cat, sub_cat, *totals in daily + daily_accumulator.pending_for(day):
+            current = apps.setdefault((app_name, main_cat), [sub_cat, 0, 0, 0, 0, 0])
+            current[0] = sub_cat or current[0]
+            for i, value in enumerate(totals, start=1):
+                current[i] += value or 0
+
+        hours = {}
+        for hour, app_name, main_cat, active in hourly:
+            hours[(hour, app_name, main_cat)] = hours.get((hour, app_name, main_cat), 0) + (active or 0)
+
+        hosts = {}
+        for *_, active, url in rows:
+            host = hostname(url)
+            if host:
+                hosts[host] = hosts.get(host, 0) + (active or 0)
+
+        # activity_facts keeps no category, so each row's is recomputed with
+        # the current rules; after a category edit it can differ from the one
+        # daily_stats / hourly_stats were written under
+        rows = {
+            row_id: [ts_epoch or 0, app_name, active or 0, get_category(app_name, url)[0]]
+            for row_id, ts_epoch, app_name, active, url in rows
+        }
+
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._day = day
+            self._apps = apps
+            self._hours = hours
+            self._rows = rows
+            self._focus = self._replay_focus(rows)
+            self._hosts = hosts
+            self._live = None
+            self._version += 1
+
+    def invalidate(self):
+        """Forget everything; the logger reloads on its next tick (clear-data, factory reset)."""
+        with self._lock:
+            self._generation += 1
+            self._day = None
+            self._apps, self._hours, self._rows, self._hosts = {}, {}, {}, {}
+            self._focus = FocusState()
+            self._live = None
+            self._version += 1
+        # Clear-data / factory reset: every cached derivation is stale
+        data_versions.bump_all()
+
+    @staticmethod
+    def _replay_focus(rows: dict) -> FocusState:
+        return FocusState.from_rows(
+            (row_id, app_name, main_cat, active)
+            for row_id, (_, app_name, active, main_cat) in sorted(rows.items(), key=lambda item: item[1][0])
+            if not is_ignored(app_name)
+        )
+
+    def rebuild_focus(self):
+        """Replay today's rows into a fresh focus state (the ignore list changed)."""
+        with self._lock:
+            self._focus = self._replay_focus(self._rows)
+            self._version += 1
+
+    # ------------------------------------------------------------------
+    def add_flush(self, day, app_name, main_cat, sub_cat, active, idle, keys, clicks,
+                  new_session, row_id, started_at, hours, url=None):
+        """
+        Record one flush_session() write. `hours` is what update_hourly_stats()
+        wrote. Also clears the live session, which this flush just absorbed.
+        """
+        with self._lock:
+            self._live = None
+            self._version += 1
+            if day != self._day:
+                return
+
+            totals = self._apps.setdefault((app_name, main_cat), [sub_cat, 0, 0, 0, 0, 0])
+            totals[0] = sub_cat
+            totals[1] += int(active)
+            totals[2] += int(idle)
+            totals[3] += 1 if new_session else 0
+            totals[4] += int(keys)
+            totals[5] += int(clicks)
+
+            for row_day, hour, _, _, act, *_ in hours:
+                if row_day == day:
+                    key = (hour, app_name, main_cat)
+                    self._hours[key] = self._hours.get(key, 0) + act
+
+            row = self._rows.setdefault(row_id, [int(started_at), app_name, 0, main_cat])
+            row[2] += int(active)
+            if not is_ignored(app_name):
+                self._focus.step(row_id, app_name, main_cat, int(active))
+
+            host = hostname(url)
+            if host:
+                self._hosts[host] = self._hosts.get(host, 0) + int(active)
+
+    def set_live(self, app_name, main_cat, sub_cat, active, idle, keys, clicks, row_id, started_at, end,
+                 url=None):
+        """The current session's unflushed interval, ending at `end` (now)."""
+        live = {
+            "app_name": app_name, "main_cat": main_cat, "sub_cat": sub_cat,
+            "active": int(active), "idle": int(idle),
+            "keys": int(keys), "clicks": int(clicks),
+            "row_id": row_id, "started_at": started_at,
+            "end": end, "host": hostname(url),
+        }
+        with self._lock:
+            self._live = live
+            self._version += 1
+
+    def clear_live(self):
+        with self._lock:
+            if self._live is not None:
+                self._live = None
+                self._version += 1
+
+    # ------------------------------------------------------------------
+    def counters(self, date: str) -> UsageCounters | None:
+        """
+        Active seconds for `date` per app, per (main, sub) category and per
+        browser hostname, including the live session; None if not loaded.
+        A category is keyed by the sub-category the app was last seen with.
+        """
+        with self._lock:
+            if date != self._day:
+                return None
+            entries = [(app_name, main_cat, totals[0], totals[1])
+                       for (app_name, main_cat), totals in self._apps.items()]
+            hosts = dict(self._hosts)
+            live = self._live
+
+        if live is not None:
+            entries.append((live["app_name"], live["main_cat"], live["sub_cat"], live["active"]))
+            if live["host"]:
+                hosts[live["host"]] = hosts.get(live["host"], 0) + live["active"]
+
+        apps, categories = {}, {}
+        for app_name, main_cat, sub_cat, active in entries:
+            apps[app_name] = apps.get(app_name, 0) + active
+            categories[(main_cat, sub_cat)] = categories.get((main_cat, sub_cat), 0) + active
+        return UsageCounters(apps, categories, hosts)
+
+    def focus_state(self, date: str) -> FocusState | None:
+        """Today's focus sequence state including the live session, or None if `date` isn't loaded."""
+        with self._lock:
+            if date != self._day:
+                return None
+            state = self._focus.copy()
+            live = self._live
+
+        if live is not None and not is_ignored(live["app_name"]):
+            state.step(live["row_id"], live["app_name"], live["main_cat"], live["active"])
+        return state
+
+    def snapshot(self, date: str) -> TodaySnapshot | None:
+        """Today's totals including the live session, or None if `date` isn't loaded."""
+        with self._lock:
+            if date != self._day:
+                return None
+            apps = {key: list(totals) for key, totals in self._apps.items()}
+            hours = dict(self._hours)
+            rows = {row_id: list(row) for row_id, row in self._rows.items()}
+            live = self._live
+
+        if live is not None:
+            app_name, main_cat = live["app_name"], live["main_cat"]
+            totals = apps.setdefault((app_name, main_cat), [live["sub_cat"], 0, 0, 0, 0, 0])
+            totals[1] += live["active"]
+            totals[2] += live["idle"]
+            # First interval of a session becomes a new row when it flushes
+            totals[3] += 1 if live["row_id"] not in rows else 0
+            totals[4] += live["keys"]
+            totals[5] += live["clicks"]
+
+            for row_day, hour, _, _, act, *_ in hourly_rows(
+                app_name, main_cat, live["end"], live["active"], live["idle"], 0, 0
+            ):
+                if row_day == date:
+                    hours[(hour, app_name, main_cat)] = hours.get((hour, app_name, main_cat), 0) + act
+
+            row = rows.get(live["row_id"])
+            if row is None:
+                rows[None] = [int(live["started_at"]), app_name, live["active"], main_cat]
+            else:
+                row[2] += live["active"]
+
+        return TodaySnapshot(
+            date=date,
+            apps=sorted(
+                (
+                    (app_name, main_cat, sub_cat, act, idl, keys, clicks, sessions)
+                    for (app_name, main_cat), (sub_cat, act, idl, sessions, keys, clicks) in apps.items()
+                ),
+                key=lambda r: r[3],
+                reverse=True,
+            ),
+            hourly=[(hour, app_name, act) for (hour, app_name, _), act in hours.items()],
+            rows=[
+                (_timestamp(ts), app_name, act)
+                for ts, app_name, act, _ in sorted(rows.values(), key=lambda r: r[0])
+            ],
+        )
+
+
+today_stats = TodayAggregate()
+
+# Today's focus sequence skips ignored apps as it goes
+config_registry.subscribe("ignored_apps", lambda _: today_stats.rebuild_focus())
@@ -0,0 +1,122 @@
+"""
+report_snapshots.py
+───────────────────
+Finished weekly reports, stored so that opening a past week is one row read.
+
+Once a week is over its report only changes when the data behind it does:
+
+  bulk changes    clear-data / factory reset and reloads of ignored_apps.json /
+                  app_categories.json (data_versions.bump_all)
+  late writes     a flush landing on a day of a finished week, or a retention
+                  run moving a tier horizon past it (data_versions.bump)
+  goal edits      labels and targets shown in the goals section
+
+Snapshots are keyed by (week_start, verbosity, data_version). A bulk change
+or goal edit moves the persisted data_version on and drops every row; a late
+write drops the weeks whose report or trend series includes that day. The
+current week is never stored.
+
+A report built while an invalidation happens is not stored: put() takes the
+token() read before the build and discards the report if it has changed.
+The check and the queued INSERT happen under the same lock as an
+invalidation's bump and queued DELETE, so the writer thread always runs a
+stale report's INSERT before the DELETE that removes it.
+
+Usage
+-----
+  from src.analytics.report_snapshots import report_snapshots
+
+  report = report_snapshots.get(monday, "standard")
+  if report is None:
+      token = report_snapshots.token()
+      ...build...
+      report_snapshots.put(monday, {"standard": report}, token)
+"""
+
+import datetime
+import json
+import threading
+
+from src.analytics.data_version import data_versions
+from src.analytics.weekly_summary import week_start
+from src.config.settings_manager import SettingsManager
+from src.database.database import (
+    delete_report_snapshots, get_report_snapshot, get_report_snapshot_weeks, save_report_snapshots
+)
+
+# settings key holding the current data_version
+VERSION_KEY = "report_data_version"
+
+
+def _current_week() -> str:
+    return week_start(datetime.date.today().isoformat())
+
+
+class ReportSnapshots:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Bumped by every invalidation, persisted or not
+        self._generation = 0
+
+    def data_version(self) -> int:
+        try:
+            return int(SettingsManager.get(VERSION_KEY) or 0)
+        except ValueError:
+            return 0
+
+    def token(self) -> tuple[int, int]:
+        with self._lock:
+            return self._generation, self.data_version()
+
+    def is_finished(self, monday: str) -> bool:
+        return monday < _current_week()
+
+    # ------------------------------------------------------------------
+    def get(self, monday: str, verbosity: str) -> dict | None:
+        if not self.is_finished(monday):
+            return None
+        payload = get_report_snapshot(monday, verbosity, self.data_version())
+        return json.loads(payload) if payload is not None else None
+
+    def put(self, monday: str, reports: dict, token) -> bool:
+        """Store {verbosity: report} for a finished week, unless invalidated since `token`."""
+        if not self.is_finished(monday):
+            return False
+        rows = [
+            (monday, verbosity, token[1], json.dumps(report))
+            for verbosity, report in reports.items()
+        ]
+        with self._lock:
+            if token != (self._generation, self.data_version()):
+                return False
+            save_report_snapshots(rows)
+        return True
+
+    def missing(self, weeks) -> list[str]:
+        """The finished weeks of `weeks` without a current snapshot, in the given order."""
+        stored = get_report_snapshot_weeks(self.data_version())
+        return [monday for monday in weeks if self.is_finished(monday) and monday not in stored]
+
+    # ------------------------------------------------------------------
+    def invalidate(self):
+        """Everything may have changed: move the data_version on and drop every snapshot."""
+        with self._lock:
+            self._generation += 1
+            SettingsManager.set(VERSION_KEY, self.data_version() + 1)
+            delete_report_snapshots()
+
+    def _on_data_change(self, day):
+        if day is None:
+            self.invalidate()
+            return
+        monday = week_start(day)
+        if not self.is_finished(monday):
+            return
+        # Later weeks show this one in their trend series
+        with self._lock:
+            self._generation += 1
+            delete_report_snapshots(monday)
+
+
+report_snapshots = ReportSnapshots()
+data_versions.subscribe(report_snapshots._on_data_change)
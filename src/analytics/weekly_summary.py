@@ -0,0 +1,78 @@
+"""
+weekly_summary.py
+─────────────────
+Maintenance of the weekly_stats rollup: daily_stats summed per
+(week_start, app_name, main_category), with a bitmask of the weekdays the
+app was seen on (Monday = bit 0).
+
+weekly_stats is written with the same deltas as daily_stats, in the same
+transaction: daily_accumulator.flush() passes its batch through
+``update_weekly_stats``, and the retention downsamplers call
+``rollup_day`` for any day they add to daily_stats. The weekly report then
+reads the weeks it compares from a handful of rows per week instead of
+aggregating daily_stats again for each one.
+
+Usage
+-----
+  from src.analytics.weekly_summary import update_weekly_stats, week_start
+
+  update_weekly_stats(conn, [(day, app_name, main_cat, active, idle, sessions, keys, clicks)])
+  week_start("2024-01-17")   # "2024-01-15"
+"""
+
+import datetime
+
+
+def week_start(day: str) -> str:
+    """The Monday of `day`'s week."""
+    date = datetime.date.fromisoformat(day)
+    return (date - datetime.timedelta(days=date.weekday())).isoformat()
+
+
+def days_in_mask(day_mask: int) -> int:
+    return bin(day_mask or 0).count("1")
+
+
+def update_weekly_stats(conn, rows) -> int:
+    """
+    Add daily deltas [(day, app_name, main_category, active, idle, sessions,
+    keys, clicks)] to weekly_stats. Returns the number of rows upserted.
+    """
+    weekly = {}
+    for day, app_name, main_cat, active, idle, sessions, keys, clicks in rows:
+        date = datetime.date.fromisoformat(day)
+        key = ((date - datetime.timedelta(days=date.weekday())).isoformat(), app_name, main_cat)
+        totals = weekly.setdefault(key, [0, 0, 0, 0, 0, 0])
+        totals[0] += active or 0
+        totals[1] += idle or 0
+        totals[2] += sessions or 0
+        totals[3] += keys or 0
+        totals[4] += clicks or 0
+        totals[5] |= 1 << date.weekday()
+
+    conn.executemany("""
+        INSERT INTO weekly_stats
+            (week_start, app_name, main_category,
+             active_seconds, idle_seconds, sessions, keystrokes, clicks, day_mask)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(week_start, app_name, main_category)
+        DO UPDATE SET
+            active_seconds = active_seconds + excluded.active_seconds,
+            idle_seconds   = idle_seconds   + excluded.idle_seconds,
+            sessions       = sessions       + excluded.sessions,
+            keystrokes     = keystrokes     + excluded.keystrokes,
+            clicks         = clicks         + excluded.clicks,
+            day_mask       = day_mask       | excluded.day_mask
+    """, [(*key, *totals) for key, totals in weekly.items()])
+    return len(weekly)
+
+
+def rollup_day(conn, day: str) -> int:
+    """Add one whole day of daily_stats to weekly_stats (a day that was just written in full)."""
+    rows = conn.execute("""
+        SELECT date, app_name, main_category,
+               active_seconds, idle_seconds, sessions, keystrokes, clicks
+        FROM daily_stats
+        WHERE date = ?
+    """, (day,)).fetchall()
+    return update_weekly_stats(conn, rows)
@@ -1,12 +1,11 @@
 from flask import jsonify, request
 from collections import defaultdict
-from urllib.parse import urlparse
 from datetime import datetime, timedelta
 
-from src.api.wellbeing_routes import wellbeing_bp, safe, get_selected_date
-from src.database.database import get_connection
-from src.config.category_manager import get_category
-from src.config.ignored_apps_manager import is_ignored
+from src.api.wellbeing_routes import wellbeing_bp, safe, get_selected_date, day_snapshot
+from src.database.database import analytics_db
+from src.database.tiers import tier_for_day, raw_connection, domain_of
+from src.config.ignored_apps_manager import is_ignored, not_ignored
 
 
 def _week_bounds(date_str=None):
@@ -25,10 +24,9 @@ def _week_bounds(date_str=None):
 
 @wellbeing_bp.route("/api/available-dates")
 def available_dates():
-    conn = get_connection()
-    cursor = conn.cursor()
+    with analytics_db.connection() as conn:
+        cursor = conn.cursor()
 
-    try:
         cursor.execute(
             "SELECT DISTINCT date FROM daily_stats ORDER BY date DESC"
         )
@@ -37,9 +35,6 @@ def available_dates():
 
         return jsonify(dates)
 
-    finally:
-        conn.close()
-
 
 # =====================================
 # Heatmap Data
@@ -47,43 +42,32 @@ def available_dates():
 
 @wellbeing_bp.route("/api/heatmap")
 def heatmap():
-    conn = get_connection()
-    cursor = conn.cursor()
+    with analytics_db.connection() as conn:
+        cursor = conn.cursor()
 
-    try:
-        cursor.execute("""
+        cursor.execute(f"""
             SELECT
                 date,
-                app_name,
-                active_seconds,
-                CASE
+                SUM(active_seconds),
+                SUM(CASE
                     WHEN main_category = 'productive'
                     THEN active_seconds
                     ELSE 0
-                END
+                END)
             FROM daily_stats
             WHERE date >= date('now', '-60 days')
+              AND {not_ignored("app_name")}
+            GROUP BY date
             ORDER BY date DESC
         """)
 
-        rows = cursor.fetchall()
-
-        result = {}
-
-        for row in rows:
-            date, app, screen, prod = row
-
-            if is_ignored(app):
-                continue
-
-            if date not in result:
-                result[date] = {
-                    "screen_time": 0,
-                    "productive_time": 0
-                }
-
-            result[date]["screen_time"] += safe(screen)
-            result[date]["productive_time"] += safe(prod)
+        result = {
+            date: {
+                "screen_time": safe(screen),
+                "productive_time": safe(prod)
+            }
+            for date, screen, prod in cursor.fetchall()
+        }
 
         filtered = {}
 
@@ -100,9 +84,6 @@ def heatmap():
 
         return jsonify(filtered)
 
-    finally:
-        conn.close()
-
 
 # =====================================
 # Session Timeline
@@ -112,31 +93,65 @@ def heatmap():
 def sessions():
     selected_date = get_selected_date()
 
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    try:
-        cursor.execute("""
-            SELECT
-                al.timestamp,
-                al.app_name,
-                al.active_seconds,
-                al.idle_seconds,
-                al.keystrokes,
-                al.clicks,
-                ds.main_category
-            FROM activity_logs al
-            LEFT JOIN daily_stats ds
-                ON ds.date = ?
-                AND ds.app_name = al.app_name
-            WHERE al.timestamp LIKE ?
-              AND al.active_seconds > 0
-            ORDER BY al.timestamp ASC
-        """, (selected_date, selected_date + "%"))
-
-        rows = cursor.fetchall()
-
-        return jsonify([
+    with analytics_db.connection() as conn:
+        cursor = conn.cursor()
+        tier = tier_for_day(conn, selected_date)
+
+        if tier in ("raw", "archive"):
+            cursor.execute("""
+                SELECT app_name, main_category
+                FROM daily_stats
+                WHERE date = ?
+            """, (selected_date,))
+            categories = dict(cursor.fetchall())
+
+            # Archived months answer the same query from their own file, which
+            # has no ignored_apps table — those rows are filtered in Python
+            archived = tier == "archive"
+            ignored_filter = "" if archived else f"AND {not_ignored('app_name')}"
+            with raw_connection(conn, tier, selected_date) as source:
+                rows = [
+                    (*r, categories.get(r[1]))
+                    for r in source.execute(f"""
+                        SELECT
+                            timestamp,
+                            app_name,
+                            active_seconds,
+                            idle_seconds,
+                            keystrokes,
+                            clicks
+                        FROM activity_logs
+                        WHERE day = ?
+                          AND active_seconds > 0
+                          {ignored_filter}
+                        ORDER BY ts_epoch ASC
+                    """, (selected_date,))
+                    if not (archived and is_ignored(r[1]))
+                ]
+
+        elif tier == "hourly":
+            # Raw rows are gone: one entry per app per hour
+            cursor.execute(f"""
+                SELECT
+                    printf('%s %02d:00:00', day, hour),
+                    app_name,
+                    active,
+                    idle,
+                    keys,
+                    clicks,
+                    main_category
+                FROM hourly_stats
+                WHERE day = ?
+                  AND active > 0
+                  AND {not_ignored("app_name")}
+                ORDER BY hour ASC, active DESC
+            """, (selected_date,))
+            rows = cursor.fetchall()
+
+        else:
+            rows = []
+
+        response = jsonify([
             {
                 "ts": r[0],
                 "app": r[1],
@@ -146,11 +161,10 @@ def sessions():
                 "clicks": safe(r[5]),
                 "cat": r[6] or "other"
             }
-            for r in rows if not is_ignored(r[1])
+            for r in rows
         ])
-
-    finally:
-        conn.close()
+        response.headers["X-Data-Tier"] = tier
+        return response
 
 
 # =====================================
@@ -159,43 +173,32 @@ def sessions():
 
 @wellbeing_bp.route("/api/weekly-trend")
 def weekly_trend():
-    conn = get_connection()
-    cursor = conn.cursor()
+    with analytics_db.connection() as conn:
+        cursor = conn.cursor()
 
-    try:
-        cursor.execute("""
+        cursor.execute(f"""
             SELECT
                 date,
-                app_name,
-                active_seconds,
-                CASE
+                SUM(active_seconds),
+                SUM(CASE
                     WHEN main_category = 'productive'
                     THEN active_seconds
                     ELSE 0
-                END
+                END)
             FROM daily_stats
             WHERE date >= date('now', '-14 days')
+              AND {not_ignored("app_name")}
+            GROUP BY date
             ORDER BY date DESC
         """)
 
-        rows = cursor.fetchall()
-
-        grouped = {}
-
-        for row in rows:
-            date, app, screen, prod = row
-
-            if is_ignored(app):
-                continue
-
-            if date not in grouped:
-                grouped[date] = {
-                    "screen_time": 0,
-                    "prod_time": 0
-                }
-
-            grouped[date]["screen_time"] += safe(screen)
-            grouped[date]["prod_time"] += safe(prod)
+        grouped = {
+            date: {
+                "screen_time": safe(screen),
+                "prod_time": safe(prod)
+            }
+            for date, screen, prod in cursor.fetchall()
+        }
 
         result = []
 
@@ -215,9 +218,6 @@ def weekly_trend():
 
         return jsonify(result)
 
-    finally:
-        conn.close()
-
 
 # =====================================
 # Hourly Activity
@@ -225,42 +225,7 @@ def weekly_trend():
 
 @wellbeing_bp.route("/api/hourly")
 def hourly():
-    selected_date = get_selected_date()
-
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    try:
-        cursor.execute("""
-            SELECT
-                strftime('%H', timestamp),
-                app_name,
-                SUM(active_seconds)
-            FROM activity_logs
-            WHERE timestamp LIKE ?
-            GROUP BY 1,2
-        """, (selected_date + "%",))
-
-        rows = cursor.fetchall()
-
-        hourly_map = {}
-
-        for hour, app, act in rows:
-
-            if is_ignored(app):
-                continue
-
-            hourly_map[hour] = hourly_map.get(hour, 0) + act
-
-        hourly_data = [
-            safe(hourly_map.get(f"{h:02d}")) // 60
-            for h in range(24)
-        ]
-
-        return jsonify(hourly_data)
-
-    finally:
-        conn.close()
+    return jsonify(day_snapshot(get_selected_date()).hourly_minutes())
 
 
 @wellbeing_bp.route("/api/hourly-activity")
@@ -272,41 +237,32 @@ def weekly_hourly_activity():
     except ValueError:
         return jsonify({"error": "week_of must be YYYY-MM-DD"}), 400
 
-    week_end_exclusive = (
-        datetime.strptime(sunday, "%Y-%m-%d") + timedelta(days=1)
-    ).strftime("%Y-%m-%d")
+    with analytics_db.connection() as conn:
+        cursor = conn.cursor()
 
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    try:
-        cursor.execute("""
+        cursor.execute(f"""
             SELECT
-                substr(timestamp, 1, 10) AS log_date,
-                strftime('%H', timestamp) AS hour,
-                app_name,
-                url,
-                SUM(active_seconds) AS total_active
-            FROM activity_logs
-            WHERE timestamp >= ?
-              AND timestamp < ?
-              AND active_seconds > 0
-            GROUP BY log_date, hour, app_name, url
+                day AS log_date,
+                hour,
+                main_category,
+                SUM(active) AS total_active
+            FROM hourly_stats
+            WHERE day >= ?
+              AND day <= ?
+              AND active > 0
+              AND {not_ignored("app_name")}
+            GROUP BY log_date, hour, main_category
             ORDER BY log_date ASC, hour ASC
-        """, (monday, week_end_exclusive))
+        """, (monday, sunday))
 
         buckets = defaultdict(lambda: {"total_seconds": 0, "productive_seconds": 0, "category_seconds": {}})
-        for log_date, hour, app_name, url, total_active in cursor.fetchall():
-            if is_ignored(app_name):
-                continue
-
+        for log_date, hour, main_category, total_active in cursor.fetchall():
             seconds = safe(total_active)
             if seconds <= 0:
                 continue
 
-            main_category, _ = get_category(app_name, url)
-            # After you compute main_category, track which category dominates the bucket
-            bucket = buckets[(log_date, int(hour))]
+            # Track which category dominates the bucket
+            bucket = buckets[(log_date, hour)]
             bucket["total_seconds"] += seconds
             bucket["category_seconds"][main_category] = bucket["category_seconds"].get(main_category, 0) + seconds
             if main_category == "productive":
@@ -337,9 +293,6 @@ def weekly_hourly_activity():
             "grid": grid,
         })
 
-    finally:
-        conn.close()
-
 
 # =====================================
 # Hourly Top Apps
@@ -350,20 +303,19 @@ def hourly_stats():
 
     selected_date = get_selected_date()
 
-    conn = get_connection()
-    cursor = conn.cursor()
+    with analytics_db.connection() as conn:
+        cursor = conn.cursor()
 
-    try:
-        cursor.execute("""
+        cursor.execute(f"""
             SELECT
-                strftime('%H', timestamp),
+                hour,
                 app_name,
-                SUM(active_seconds)
-            FROM activity_logs
-            WHERE timestamp LIKE ?
+                SUM(active)
+            FROM hourly_stats
+            WHERE day = ? AND {not_ignored("app_name")}
             GROUP BY 1,2
-            HAVING SUM(active_seconds) > 0
-        """, (selected_date + "%",))
+            HAVING SUM(active) > 0
+        """, (selected_date,))
 
         rows = cursor.fetchall()
 
@@ -371,9 +323,6 @@ def hourly_stats():
 
         for hour, app, active in rows:
 
-            if is_ignored(app):
-                continue
-
             by_hour.setdefault(hour, []).append({
                 "app": app.replace(".exe", ""),
                 "active": int(active)
@@ -384,7 +333,7 @@ def hourly_stats():
         for h in range(24):
             h_str = f"{h:02d}"
 
-            apps = by_hour.get(h_str, [])
+            apps = by_hour.get(h, [])
 
             apps.sort(key=lambda x: x["active"], reverse=True)
 
@@ -392,9 +341,6 @@ def hourly_stats():
 
         return jsonify(result)
 
-    finally:
-        conn.close()
-
 
 # =====================================
 # Website Stats
@@ -406,53 +352,55 @@ def site_stats():
     selected_date = get_selected_date()
     app = request.args.get("app")
 
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    try:
-
-        query = """
-            SELECT url, app_name, SUM(active_seconds)
-            FROM activity_logs
-            WHERE timestamp LIKE ?
-              AND url IS NOT NULL
-              AND url != 'N/A'
-        """
-
-        params = [selected_date + "%"]
+    with analytics_db.connection() as conn:
+        tier = tier_for_day(conn, selected_date)
+
+        raw = tier in ("raw", "archive")
+
+        if raw:
+            query = """
+                SELECT url, app_name, SUM(active_seconds)
+                FROM activity_logs
+                WHERE day = ?
+                  AND url IS NOT NULL
+                  AND url != 'N/A'
+            """
+        else:
+            # Domains were folded into domain_stats before the raw rows went
+            query = """
+                SELECT domain, app_name, active_seconds
+                FROM domain_stats
+                WHERE day = ?
+            """
+
+        params = [selected_date]
+
+        # Archive files have no ignored_apps table; those rows are filtered below
+        archived = tier == "archive"
+        if not archived:
+            query += f" AND {not_ignored('app_name')}"
 
         if app:
             query += " AND app_name = ?"
             params.append(app)
 
-        query += " GROUP BY url, app_name ORDER BY SUM(active_seconds) DESC"
-
-        cursor.execute(query, tuple(params))
+        if raw:
+            query += " GROUP BY url, app_name ORDER BY SUM(active_seconds) DESC"
 
-        rows = cursor.fetchall()
+        with raw_connection(conn, tier, selected_date) as source:
+            rows = source.execute(query, tuple(params)).fetchall()
 
         domain_map = defaultdict(int)
 
-        for url, app_name, active in rows:
+        for key, app_name, active in rows:
 
-            if is_ignored(app_name):
+            if archived and is_ignored(app_name):
                 continue
 
-            try:
-                parsed = urlparse(url)
-
-                domain = parsed.netloc or parsed.path
-
-                domain = domain.lower().replace("www.", "")
+            domain = domain_of(key) if raw else key
 
-                if "reply" in domain or ".." in domain:
-                    continue
-
-                if domain:
-                    domain_map[domain] += safe(active)
-
-            except Exception:
-                continue
+            if domain:
+                domain_map[domain] += safe(active)
 
         result = [
             {
@@ -466,6 +414,3 @@ def site_stats():
         result = sorted(result, key=lambda x: x["seconds"], reverse=True)[:50]
 
         return jsonify(result)
-
-    finally:
-        conn.close()
\ No newline at end of file
@@ -11,10 +11,14 @@ from src.database.database import (
     clear_all_tracked_events,
     factory_reset,
     set_auto_delete_days,
-    get_auto_delete_days,
-    delete_activity_older_than,
+    set_retention_tier_days,
+    set_retention_archive,
+    get_retention_policy,
     set_setting
 )
+from src.core.data_retention import retention_job
+from src.analytics.daily_summary import daily_accumulator
+from src.analytics.live_today import today_stats
 
 
 # =====================================
@@ -34,7 +38,11 @@ def clear_data():
 
     try:
 
-        clear_all_tracked_events()
+        # Unwritten daily_stats deltas, queued writes, DELETEs and the live
+        # reload in one step, so nothing written before the clear comes back
+        with daily_accumulator.discarding():
+            clear_all_tracked_events()
+            today_stats.invalidate()
 
         return jsonify({
             "success": True,
@@ -67,7 +75,9 @@ def reset_everything():
     try:
 
         # 1️⃣ wipe database
-        factory_reset()
+        with daily_accumulator.discarding():
+            factory_reset()
+            today_stats.invalidate()
 
         # 2️⃣ restart application after response is sent
         def delayed_restart():
@@ -100,6 +110,11 @@ def reset_everything():
 # Data Retention
 # =====================================
 
+@wellbeing_bp.route("/api/settings/data-retention", methods=["GET"])
+def get_data_retention():
+    return jsonify(get_retention_policy())
+
+
 @wellbeing_bp.route("/api/settings/data-retention", methods=["POST"])
 def set_data_retention():
 
@@ -112,15 +127,25 @@ def set_data_retention():
 
             set_auto_delete_days(None)
 
-        else:
+        elif days is not None:
 
             days = int(days)
 
             set_auto_delete_days(days)
 
+        # Optional per-tier overrides for the aggregates
+        for tier in ("hourly", "daily"):
+            value = data.get(f"{tier}_days")
+            if value is not None:
+                set_retention_tier_days(tier, None if value == "forever" else int(value))
+
+        if "archive_raw" in data:
+            set_retention_archive(bool(data["archive_raw"]))
+
         return jsonify({
             "status": "success",
-            "retention_days": days
+            "retention_days": days,
+            "policy": get_retention_policy()
         })
 
     except Exception as e:
@@ -140,7 +165,8 @@ def cleanup_retention_now():
 
     try:
 
-        days = get_auto_delete_days()
+        policy = get_retention_policy()
+        days = policy["raw_days"]
 
         if days is None:
 
@@ -149,11 +175,14 @@ def cleanup_retention_now():
                 "message": "Retention is set to forever"
             })
 
-        delete_activity_older_than(days)
+        # Runs in the background in small chunks; poll /status for progress
+        started = retention_job.start(policy)
 
         return jsonify({
             "status": "success",
-            "deleted_older_than_days": days
+            "deleted_older_than_days": days,
+            "already_running": not started,
+            "job": retention_job.status()
         })
 
     except Exception as e:
@@ -164,6 +193,11 @@ def cleanup_retention_now():
         }), 500
 
 
+@wellbeing_bp.route("/api/settings/data-retention/status", methods=["GET"])
+def retention_status():
+    return jsonify(retention_job.status())
+
+
 # =====================================
 # Browser Tracking Toggle
 # =====================================
@@ -1,7 +1,19 @@
 from flask import jsonify
 from src.api.wellbeing_routes import wellbeing_bp
+from src.database.database import db, analytics_db, writer
+from src.database import archive
 
 
 @wellbeing_bp.route("/api/health")
 def health():
-    return jsonify({"status": "running"})
\ No newline at end of file
+    return jsonify({"status": "running"})
+
+
+@wellbeing_bp.route("/api/health/db")
+def health_db():
+    """Connection-pool counters, write-queue depth / batch / commit latency, archive size."""
+    stats = db.stats()
+    stats["analytics"] = analytics_db.stats()
+    stats["writer"] = writer.stats()
+    stats["archive"] = archive.stats()
+    return jsonify(stats)
@@ -9,8 +9,13 @@ from src.database.database import (
     set_temporary_unblock,
     get_limit_for_app,
     log_limit_event,
-    force_reblock_app
+    force_reblock_app,
+    set_limit_rule,
+    get_limit_rules,
+    toggle_limit_rule,
+    delete_limit_rule
 )
+from src.services.limit_rules import SCOPES, format_minute, normalize_target, parse_days, parse_minute
 
 
 @wellbeing_bp.route("/limits/set", methods=["POST"])
@@ -30,6 +35,7 @@ def api_set_limit():
 
     from src.services.blocking_service import BlockingService
     BlockingService().start()
+    BlockingService().wake()
 
     return jsonify({"status": "success"})
 
@@ -57,6 +63,9 @@ def api_toggle_limit():
     data = request.json
     toggle_limit(data["app_name"], bool(data["enabled"]))
 
+    from src.services.blocking_service import BlockingService
+    BlockingService().wake()
+
     return jsonify({"status": "updated"})
 
 
@@ -92,9 +101,85 @@ def api_reblock_now():
 def api_delete_limit():
     delete_app_limit(request.json["app_name"])
 
+    from src.services.blocking_service import BlockingService
+    BlockingService().wake()
+
     return jsonify({"status": "limit_deleted"})
 
 
 @wellbeing_bp.route("/limits/blocked", methods=["GET"])
 def api_blocked_apps():
-    return jsonify(get_blocked_apps())
\ No newline at end of file
+    return jsonify(get_blocked_apps())
+
+
+# ==========================================================
+# Category / domain / schedule rules (src/services/limit_rules.py)
+# ==========================================================
+
+@wellbeing_bp.route("/limits/rules", methods=["GET"])
+def api_get_limit_rules():
+    from src.services.blocking_service import BlockingService
+    matches = BlockingService().rule_matches
+
+    rules = []
+    for rule_id, scope, target, limit, days, start, end, enabled in get_limit_rules():
+        match = matches.get(rule_id)
+        rules.append({
+            "id": rule_id,
+            "scope": scope,
+            "target": target,
+            "daily_limit_seconds": limit,
+            "days": days,
+            "start": format_minute(start),
+            "end": format_minute(end),
+            "is_enabled": bool(enabled),
+            "matched": match.reason if match else None,
+            "usage_seconds": match.usage if match else None,
+        })
+    return jsonify(rules)
+
+
+@wellbeing_bp.route("/limits/rules/set", methods=["POST"])
+def api_set_limit_rule():
+    data = request.json or {}
+    scope = data.get("scope")
+    target = normalize_target(scope, data.get("target"))
+    if scope not in SCOPES or not target:
+        return jsonify({"error": f"scope must be one of {', '.join(SCOPES)} and target is required"}), 400
+
+    try:
+        limit = data.get("daily_limit_seconds")
+        limit = None if limit is None else max(0, int(limit))
+        days = parse_days(data.get("days"))
+        start, end = parse_minute(data.get("start")), parse_minute(data.get("end"))
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    rule_id = set_limit_rule(scope, target, limit, days, start, end, rule_id=data.get("id"))
+
+    from src.services.blocking_service import BlockingService
+    BlockingService().start()
+    BlockingService().reload_rules()
+
+    return jsonify({"status": "success", "id": rule_id})
+
+
+@wellbeing_bp.route("/limits/rules/toggle", methods=["POST"])
+def api_toggle_limit_rule():
+    data = request.json
+    toggle_limit_rule(int(data["id"]), bool(data["enabled"]))
+
+    from src.services.blocking_service import BlockingService
+    BlockingService().reload_rules()
+
+    return jsonify({"status": "updated"})
+
+
+@wellbeing_bp.route("/limits/rules/delete", methods=["POST"])
+def api_delete_limit_rule():
+    delete_limit_rule(int(request.json["id"]))
+
+    from src.services.blocking_service import BlockingService
+    BlockingService().reload_rules()
+
+    return jsonify({"status": "rule_deleted"})
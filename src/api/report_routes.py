@@ -1,15 +1,26 @@
 from flask import jsonify, request
+from src.analytics.focus_score import focus_scores
+from src.analytics.daily_summary import daily_accumulator
+from src.analytics.goal_engine import goal_engine
+from src.analytics.report_snapshots import report_snapshots
+from src.analytics.weekly_summary import days_in_mask
 from src.api.wellbeing_routes import wellbeing_bp
 from src.database.database import (
-    get_connection, get_all_goals, get_all_goal_logs_range,
+    analytics_db, get_all_goals, get_all_goal_logs_range,
     get_limit_events_range, get_limit_events_summary
 )
-from src.config.ignored_apps_manager import is_ignored
+from src.config.ignored_apps_manager import not_ignored
 from src.config.settings_manager import SettingsManager
 from datetime import datetime, timedelta
 import math
 import time
 
+# Weeks in the report's trend series, ending with the report week
+TREND_WEEKS = 6
+VERBOSITIES = ("compact", "standard", "detailed")
+# Pause between reports built by the background pre-warm
+PREWARM_PAUSE_SEC = 1.0
+
 
 def _normalize_verbosity(value):
     v = (value or "").strip().lower()
@@ -18,36 +29,36 @@ def _normalize_verbosity(value):
     return "standard"
 
 
-def _range_app_totals(conn, start_date, end_date):
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT app_name, SUM(active_seconds)
-        FROM daily_stats
-        WHERE date >= ? AND date <= ?
-        GROUP BY app_name
-    """, (start_date, end_date))
-    totals = {}
-    for app_name, secs in cursor.fetchall():
-        if is_ignored(app_name):
-            continue
-        totals[app_name] = (totals.get(app_name, 0) + (secs or 0))
-    return totals
-
-
-def _range_category_totals(conn, start_date, end_date):
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT main_category, app_name, SUM(active_seconds)
-        FROM daily_stats
-        WHERE date >= ? AND date <= ?
-        GROUP BY main_category, app_name
-    """, (start_date, end_date))
-    totals = {}
-    for cat, app_name, secs in cursor.fetchall():
-        if is_ignored(app_name):
-            continue
-        totals[cat] = totals.get(cat, 0) + (secs or 0)
-    return totals
+def _weekly_totals(conn, first_monday, last_monday):
+    """
+    {week_start: totals} for every week in [first_monday, last_monday] with
+    data, from weekly_stats — one indexed range read however long the
+    history. totals: total / productive / keys / clicks seconds and counts,
+    "apps" and "categories" dicts of active seconds, and "active_days".
+    """
+    weeks = {}
+    for week, app_name, main_cat, active, keys, clicks, day_mask in conn.execute(f"""
+        SELECT week_start, app_name, main_category, active_seconds, keystrokes, clicks, day_mask
+        FROM weekly_stats
+        WHERE week_start >= ? AND week_start <= ? AND {not_ignored("app_name")}
+    """, (first_monday, last_monday)):
+        w = weeks.setdefault(week, {
+            "total": 0, "productive": 0, "keys": 0, "clicks": 0,
+            "apps": {}, "categories": {}, "day_mask": 0
+        })
+        active = active or 0
+        w["total"] += active
+        w["keys"] += keys or 0
+        w["clicks"] += clicks or 0
+        if main_cat == "productive":
+            w["productive"] += active
+        w["apps"][app_name] = w["apps"].get(app_name, 0) + active
+        w["categories"][main_cat] = w["categories"].get(main_cat, 0) + active
+        w["day_mask"] |= day_mask or 0
+
+    for w in weeks.values():
+        w["active_days"] = days_in_mask(w["day_mask"])
+    return weeks
 
 
 def _week_bounds(date_str=None):
@@ -70,43 +81,25 @@ def _fmt_time(sec):
     return f"{m}m"
 
 
-def _weekly_trend_series(conn, week_of, weeks=6):
-    """Build compact trend series for recent weeks ending at week_of."""
-    end_monday, _ = _week_bounds(week_of)
+def _weekly_trend_series(weeks_totals, scores, end_monday, weeks=6):
+    """Build compact trend series for the `weeks` weeks ending at end_monday."""
     end_monday_date = datetime.strptime(end_monday, "%Y-%m-%d").date()
     series = []
 
     for i in range(weeks - 1, -1, -1):
-        mon = end_monday_date - timedelta(days=7 * i)
-        sun = mon + timedelta(days=6)
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT date, app_name, main_category, SUM(active_seconds)
-            FROM daily_stats
-            WHERE date >= ? AND date <= ?
-            GROUP BY date, app_name, main_category
-            ORDER BY date
-        """, (mon.isoformat(), sun.isoformat()))
-        rows = cursor.fetchall()
+        mon = (end_monday_date - timedelta(days=7 * i)).isoformat()
+        sun = (end_monday_date - timedelta(days=7 * i - 6)).isoformat()
+        w = weeks_totals.get(mon, {})
+        total = w.get("total", 0)
+        productive = w.get("productive", 0)
 
-        total = 0
-        productive = 0
-        daily_totals = {}
-        for date, app_name, main_category, active in rows:
-            if is_ignored(app_name):
-                continue
-            total += active
-            daily_totals[date] = daily_totals.get(date, 0) + active
-            if main_category == "productive":
-                productive += active
-
-        active_days = len(daily_totals) if daily_totals else 1
-        avg_daily = round(total / active_days)
+        avg_daily = round(total / (w.get("active_days") or 1))
         prod_pct = round((productive / total) * 100, 1) if total > 0 else 0
-        focus_score = round((max(daily_totals.values()) / total) * 100, 1) if total > 0 and daily_totals else 0
+        week_scores = [result["score"] for date, result in scores.items() if mon <= date <= sun]
+        focus_score = round(sum(week_scores) / len(week_scores), 1) if week_scores else 0
 
         series.append({
-            "week_start": mon.isoformat(),
+            "week_start": mon,
             "screen_time": total,
             "avg_daily": avg_daily,
             "productivity_pct": prod_pct,
@@ -116,37 +109,83 @@ def _weekly_trend_series(conn, week_of, weeks=6):
     return series
 
 
-def _generate_report(week_of=None, verbosity=None, include_previous=True):
-    """Generate the full weekly report data dict."""
+def _generate_report(week_of=None, verbosity=None):
+    """
+    The weekly report for the week containing `week_of`. Finished weeks are
+    served from report_snapshots; a miss builds the report once and stores
+    it for every verbosity.
+    """
     verbosity = _normalize_verbosity(verbosity or SettingsManager.get("weekly_report_verbosity") or "standard")
-    monday, sunday = _week_bounds(week_of)
+    monday, _ = _week_bounds(week_of)
+
+    report = report_snapshots.get(monday, verbosity)
+    if report is not None:
+        return report
+
+    token = report_snapshots.token()
+    full = _build_report(monday)
+    report_snapshots.put(monday, {v: _with_verbosity(full, v) for v in VERBOSITIES}, token)
+    return _with_verbosity(full, verbosity)
+
+
+def _with_verbosity(report, verbosity):
+    """`report` with its insight lists trimmed to `verbosity`."""
+    report = dict(report, verbosity=verbosity)
+    if verbosity == "compact":
+        report["insights"] = report["insights"][:3]
+        report["category_insights"] = report["category_insights"][:1]
+    elif verbosity == "standard":
+        report["insights"] = report["insights"][:6]
+        report["category_insights"] = report["category_insights"][:2]
+    return report
+
+
+def _build_report(monday):
+    """
+    Build the full (detailed) report for the week starting `monday`. The
+    week, the previous week it is compared with and the trend weeks all come
+    from one weekly_stats read; only the report week's day-by-day breakdown
+    reads daily_stats.
+    """
+    monday, sunday = _week_bounds(monday)
     monday_date = datetime.strptime(monday, "%Y-%m-%d").date()
     prev_monday = (monday_date - timedelta(days=7)).isoformat()
-    prev_sunday = (monday_date - timedelta(days=1)).isoformat()
-    conn = get_connection()
-    cursor = conn.cursor()
+    first_trend_monday = (monday_date - timedelta(days=7 * (TREND_WEEKS - 1))).isoformat()
 
-    try:
-        # 1. Daily breakdown
-        cursor.execute("""
-            SELECT date, app_name, main_category, SUM(active_seconds), SUM(keystrokes), SUM(clicks)
+    # Goals are only logged when evaluated; fill in the week's active days
+    # that nobody looked at before the logs are read below
+    pending = goal_engine.backfill(monday, sunday)
+    if pending is not None:
+        pending.result(timeout=10)
+
+    with analytics_db.connection() as conn:
+        cursor = conn.cursor()
+
+        # 1. Weekly totals: this week, last week and the trend weeks
+        weeks_totals = _weekly_totals(conn, first_trend_monday, monday)
+        week = weeks_totals.get(monday, {})
+        prev_week = weeks_totals.get(prev_monday, {})
+
+        app_totals = week.get("apps", {})
+        cat_totals = {"productive": 0, "neutral": 0, "unproductive": 0, "other": 0}
+        for main_cat, active in week.get("categories", {}).items():
+            cat_totals[main_cat] = cat_totals.get(main_cat, 0) + active
+        total_screen = week.get("total", 0)
+        total_keys = week.get("keys", 0)
+        total_clicks = week.get("clicks", 0)
+
+        # Daily breakdown
+        cursor.execute(f"""
+            SELECT date, main_category, SUM(active_seconds), SUM(keystrokes), SUM(clicks)
             FROM daily_stats
-            WHERE date >= ? AND date <= ?
-            GROUP BY date, app_name, main_category
+            WHERE date >= ? AND date <= ? AND {not_ignored("app_name")}
+            GROUP BY date, main_category
             ORDER BY date
         """, (monday, sunday))
         rows = cursor.fetchall()
 
         daily = {}
-        app_totals = {}
-        cat_totals = {"productive": 0, "neutral": 0, "unproductive": 0, "other": 0}
-        total_screen = 0
-        total_keys = 0
-        total_clicks = 0
-
-        for date, app_name, main_cat, active, keys, clicks in rows:
-            if is_ignored(app_name):
-                continue
+        for date, main_cat, active, keys, clicks in rows:
             if date not in daily:
                 daily[date] = {"screen_time": 0, "productive": 0, "neutral": 0, "unproductive": 0, "keys": 0, "clicks": 0}
             daily[date]["screen_time"] += active
@@ -159,16 +198,10 @@ def _generate_report(week_of=None, verbosity=None, include_previous=True):
             else:
                 daily[date]["unproductive"] += active
 
-            app_totals[app_name] = app_totals.get(app_name, 0) + active
-            cat_totals[main_cat] = cat_totals.get(main_cat, 0) + active
-            total_screen += active
-            total_keys += keys or 0
-            total_clicks += clicks or 0
-
         # Top apps
         top_apps = sorted(app_totals.items(), key=lambda x: -x[1])[:8]
 
-        prev_app_totals = _range_app_totals(conn, prev_monday, prev_sunday)
+        prev_app_totals = prev_week.get("apps", {})
 
         # Average daily screen time
         active_days = len(daily) if daily else 1
@@ -218,21 +251,13 @@ def _generate_report(week_of=None, verbosity=None, include_previous=True):
             lightest_day["date"] if lightest_day else None
         )
 
-        prev_cat_totals = _range_category_totals(conn, prev_monday, prev_sunday)
+        prev_cat_totals = prev_week.get("categories", {})
         category_insights = _build_category_insights(cat_totals, prev_cat_totals)
 
-        # 5. Focus score average (from daily_stats)
-        cursor.execute("""
-            SELECT AVG(focus_score) FROM (
-                SELECT date, CASE WHEN SUM(active_seconds) > 0
-                    THEN ROUND(100.0 * MAX(active_seconds) / SUM(active_seconds))
-                    ELSE 0 END as focus_score
-                FROM daily_stats
-                WHERE date >= ? AND date <= ?
-                GROUP BY date
-            )
-        """, (monday, sunday))
-        avg_focus = cursor.fetchone()[0] or 0
+        # 5. Focus score average over the days with activity
+        scores = focus_scores(first_trend_monday, sunday)
+        week_scores = [result["score"] for date, result in scores.items() if date >= monday]
+        avg_focus = sum(week_scores) / len(week_scores) if week_scores else 0
 
         # Build daily breakdown array (always Mon-Sun, including empty days)
         daily_breakdown = []
@@ -249,7 +274,7 @@ def _generate_report(week_of=None, verbosity=None, include_previous=True):
                 "productive_pct": ppct,
             })
 
-        trends = _weekly_trend_series(conn, week_of, weeks=6)
+        trends = _weekly_trend_series(weeks_totals, scores, monday, weeks=TREND_WEEKS)
 
         # Goal drift alerts + goal impact correlation
         date_goal_met = {}
@@ -296,30 +321,20 @@ def _generate_report(week_of=None, verbosity=None, include_previous=True):
         }
 
         # What changed this week
-        prev_report = _generate_report(prev_monday, verbosity="compact", include_previous=False) if (include_previous and total_screen > 0) else None
         changed = []
-        if prev_report:
-            prev_summary = prev_report.get("summary", {})
-            prev_top = (prev_report.get("top_apps") or [{}])[0].get("app_name")
+        if total_screen > 0:
+            prev_top = max(prev_app_totals.items(), key=lambda x: x[1])[0] if prev_app_totals else None
             cur_top = (top_apps[0][0] if top_apps else None)
-            prev_screen = prev_summary.get("total_screen_time", 0) or 0
+            prev_screen = prev_week.get("total", 0)
             if prev_screen > 0:
                 pct = round(((total_screen - prev_screen) / prev_screen) * 100, 1)
                 changed.append(f"Screen time {'rose' if pct >= 0 else 'dropped'} {abs(pct)}% vs last week.")
             if cur_top and prev_top and cur_top != prev_top:
                 changed.append(f"Top app changed from {prev_top.replace('.exe','')} to {cur_top.replace('.exe','')}.")
-            prod_prev = prev_summary.get("productivity_pct", 0)
+            prod_prev = round(prev_week["productive"] / prev_screen * 100, 1) if prev_screen > 0 else 0
             prod_delta = round(prod_pct - prod_prev, 1)
             changed.append(f"Productivity {'improved' if prod_delta >= 0 else 'declined'} by {abs(prod_delta)} points week-over-week.")
 
-        # Verbosity filtering
-        if verbosity == "compact":
-            insights = insights[:3]
-            category_insights = category_insights[:1]
-        elif verbosity == "standard":
-            insights = insights[:6]
-            category_insights = category_insights[:2]
-
         return {
             "period": {"start": monday, "end": sunday},
             "summary": {
@@ -332,7 +347,7 @@ def _generate_report(week_of=None, verbosity=None, include_previous=True):
                 "avg_focus_score": round(avg_focus, 1),
             },
             "trends": trends,
-            "verbosity": verbosity,
+            "verbosity": "detailed",
             "daily_breakdown": daily_breakdown,
             "category_breakdown": [
                 {"category": k, "total_seconds": v}
@@ -381,8 +396,6 @@ def _generate_report(week_of=None, verbosity=None, include_previous=True):
             "what_changed": changed,
             "insights": insights,
         }
-    finally:
-        conn.close()
 
 
 def _generate_insights(daily, total_screen, avg_daily, prod_pct, top_apps,
@@ -547,33 +560,27 @@ def api_weekly_report_compare():
     return jsonify({"week_a": a, "week_b": b, "diff": diff})
 
 
+def _report_weeks():
+    """Every week with data, plus the current one, newest first, as (monday, sunday)."""
+    with analytics_db.connection() as conn:
+        # One row per week, not per day of history
+        rows = [r[0] for r in conn.execute("SELECT DISTINCT week_start FROM weekly_stats") if r and r[0]]
+    weeks = {_week_bounds(date_str) for date_str in rows}
+    weeks.add(_week_bounds())
+    return sorted(weeks, key=lambda x: x[0], reverse=True)
+
+
 @wellbeing_bp.route("/api/weekly-report/available-weeks")
 def api_weekly_report_available_weeks():
-    conn = get_connection()
-    cursor = conn.cursor()
-    try:
-        cursor.execute("SELECT DISTINCT date FROM daily_stats ORDER BY date DESC")
-        rows = [r[0] for r in cursor.fetchall() if r and r[0]]
-        weeks = set()
-        for date_str in rows:
-            monday, sunday = _week_bounds(date_str)
-            weeks.add((monday, sunday))
-
-        current_monday, current_sunday = _week_bounds()
-        weeks.add((current_monday, current_sunday))
-
-        sorted_weeks = sorted(weeks, key=lambda x: x[0], reverse=True)
-        return jsonify([
-            {
-                "value": monday,
-                "start": monday,
-                "end": sunday,
-                "label": f"{datetime.strptime(monday, '%Y-%m-%d').strftime('%b %d')} - {datetime.strptime(sunday, '%Y-%m-%d').strftime('%b %d, %Y')}"
-            }
-            for monday, sunday in sorted_weeks
-        ])
-    finally:
-        conn.close()
+    return jsonify([
+        {
+            "value": monday,
+            "start": monday,
+            "end": sunday,
+            "label": f"{datetime.strptime(monday, '%Y-%m-%d').strftime('%b %d')} - {datetime.strptime(sunday, '%Y-%m-%d').strftime('%b %d, %Y')}"
+        }
+        for monday, sunday in _report_weeks()
+    ])
 
 
 @wellbeing_bp.route("/api/weekly-report/send-telegram", methods=["POST"])
@@ -616,12 +623,35 @@ def api_send_weekly_report_telegram():
         return jsonify({"error": str(e)}), 500
 
 
+def _prewarm_report_snapshots(stop_event=None):
+    """
+    Build and store the report of every finished week that has no snapshot
+    yet, newest first, pausing between weeks so the job stays in the
+    background. Returns the number of weeks built.
+    """
+    built = 0
+    finished = [monday for monday, _ in _report_weeks()]
+    for monday in report_snapshots.missing(finished):
+        if stop_event and stop_event.is_set():
+            break
+        _generate_report(monday, verbosity="standard")
+        built += 1
+        time.sleep(PREWARM_PAUSE_SEC)
+    return built
+
+
 def run_weekly_report_scheduler(stop_event=None, check_interval_sec=300):
-    """Background worker: auto-send weekly report once each Sunday when enabled."""
+    """
+    Background worker: auto-send weekly report once each Sunday when enabled,
+    and keep report_snapshots filled. Each pass pre-warms the finished weeks
+    without a snapshot; the pass right after Monday 00:00 stores the week
+    that just closed.
+    """
     from src.config.settings_manager import TelegramSettingsManager
     from src.config.crypto import decrypt
     from src.core.telegram.api import TelegramAPI
 
+    week_closes = datetime.max
     while True:
         if stop_event and stop_event.is_set():
             return
@@ -654,8 +684,18 @@ def run_weekly_report_scheduler(stop_event=None, check_interval_sec=300):
         except Exception:
             pass
 
+        try:
+            if datetime.now() >= week_closes:
+                # Land Sunday's buffered deltas before the closed week is stored
+                daily_accumulator.flush()
+            _prewarm_report_snapshots(stop_event)
+        except Exception as e:
+            print(f"[Reports] Snapshot pre-warm failed: {e}")
+
+        monday, _ = _week_bounds()
+        week_closes = datetime.strptime(monday, "%Y-%m-%d") + timedelta(days=7)
         slept = 0
-        while slept < check_interval_sec:
+        while slept < check_interval_sec and datetime.now() < week_closes:
             if stop_event and stop_event.is_set():
                 return
             time.sleep(1)
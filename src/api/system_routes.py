@@ -2,9 +2,9 @@ import os
 import io
 import base64
 import hashlib
-from flask import jsonify, send_file, current_app
+from flask import jsonify, send_file
 from src.api.wellbeing_routes import wellbeing_bp
-from src.database.database import get_connection
+from src.database.database import analytics_db
 from src.config.storage import get_icons_dir
 from src.utils.icon_extractor import extract_icon_as_base64, get_exe_path_by_name
 from src.utils.app_discovery import get_installed_apps
@@ -20,31 +20,30 @@ def init_bundle():
     """
     Returns everything the frontend needs on first mount in a single
     round-trip: settings, ignored apps, available dates, heatmap,
-    spark series, and update status.
+    spark series, and update status. The view functions are called
+    directly inside this request rather than dispatched as sub-requests.
     """
-    client = current_app.test_client()
-    keys = {
-        "settings":       "/api/settings",
-        "ignoredApps":    "/api/ignored-apps",
-        "availableDates": "/api/available-dates",
-        "heatmap":        "/api/heatmap",
-        "sparkSeries":    "/api/spark-series?days=7",
+    # Imported here: these modules register their routes after this one
+    from src.api.activity_routes import available_dates, heatmap
+    from src.api.settings_routes import get_settings
+    from src.api.spark_routes import spark_series
+    from src.api.update_routes import update_status
+
+    views = {
+        "settings":       get_settings,
+        "ignoredApps":    ignored_apps,
+        "availableDates": available_dates,
+        "heatmap":        heatmap,
+        "sparkSeries":    spark_series,       # default window: 7 days
+        "updateStatus":   update_status,
     }
     result = {}
-    for key, path in keys.items():
+    for key, view in views.items():
         try:
-            resp = client.get(path)
-            result[key] = resp.get_json()
+            result[key] = view().get_json()
         except Exception:
             result[key] = None
 
-    # Update status comes from a different blueprint
-    try:
-        resp = client.get("/api/update/status")
-        result["updateStatus"] = resp.get_json()
-    except Exception:
-        result["updateStatus"] = None
-
     return jsonify(result)
 
 
@@ -67,11 +66,9 @@ def app_icon(app_name):
     if os.path.exists(cache_path):
         return send_file(cache_path, mimetype='image/png', max_age=86400)
 
-    conn = get_connection()
-    cursor = conn.cursor()
-
     try:
-        exe_path = get_exe_path_by_name(cursor, app_name)
+        with analytics_db.connection() as conn:
+            exe_path = get_exe_path_by_name(conn.cursor(), app_name)
         if not exe_path:
             return "No icon", 404
 
@@ -94,22 +91,15 @@ def app_icon(app_name):
         print(f"Error serving icon for {app_name}: {e}")
         return str(e), 500
 
-    finally:
-        conn.close()
-
 
 @wellbeing_bp.route("/api/system/apps", methods=["GET"])
 def api_system_apps():
-    conn = get_connection()
-    cursor = conn.cursor()
+    with analytics_db.connection() as conn:
+        cursor = conn.cursor()
 
-    try:
         apps = get_installed_apps(cursor)
 
         return jsonify({
             "total": len(apps),
             "apps": apps
         })
-
-    finally:
-        conn.close()
\ No newline at end of file
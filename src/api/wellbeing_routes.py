@@ -11,6 +11,9 @@ Contains:
 import datetime
 from flask import Blueprint, request
 
+# Re-exported for the route modules
+from src.analytics.day_totals import day_app_totals, day_hourly_totals, day_snapshot  # noqa: F401
+
 # =====================================
 # Blueprint
 # =====================================
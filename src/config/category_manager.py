@@ -1,8 +1,9 @@
 import json
 import os
-import re
 from functools import lru_cache
 
+from src.config.config_registry import config_registry
+
 CATEGORY_FILE = os.path.join(
     os.path.dirname(__file__),
     "app_categories.json"
@@ -18,30 +19,37 @@ BROWSER_EXES = {
 }
 
 
-@lru_cache(maxsize=1)
 def load_categories():
-    if not os.path.exists(CATEGORY_FILE):
-        return {}
-    with open(CATEGORY_FILE, "r", encoding="utf-8") as f:
-        return json.load(f)
+    """The parsed app_categories.json (kept current by the config registry)."""
+    return _rules().data
 
 
 def reload_categories():
-    """Force reload the category file (clears the lru_cache)."""
-    load_categories.cache_clear()
+    """Force reload the category file (rebuilds the compiled index, clears cached results)."""
+    config_registry.register("categories", CATEGORY_FILE, _parse, default=CategoryIndex({}))
     return load_categories()
 
 
-def _hostname(url: str) -> str:
+def hostname(url: str) -> str:
     """Extract lowercase hostname from a URL string."""
     if not url or url == "N/A":
         return ""
     # Remove protocol
-    url = re.sub(r'^https?://', '', url.lower())
+    url = url.lower()
+    if url.startswith("https://"):
+        url = url[8:]
+    elif url.startswith("http://"):
+        url = url[7:]
     # Take only up to the first / or ?
     return url.split("/")[0].split("?")[0]
 
 
+def _is_path_rule(rule: str) -> bool:
+    # Rules with a slash or query are matched as substrings of the whole URL;
+    # anything else is a domain: exact host or any subdomain of it
+    return "/" in rule or "?" in rule
+
+
 def _url_matches_rule(url_lower: str, domain_rule: str) -> bool:
     """
     Returns True if url_lower belongs to domain_rule.
@@ -51,40 +59,177 @@ def _url_matches_rule(url_lower: str, domain_rule: str) -> bool:
       - Path match:            "youtube.com/watch?v=" matches "youtube.com/watch?v="
     """
     # Path-based rule: contains a slash — do substring check on full URL
-    if "/" in domain_rule or "?" in domain_rule:
+    if _is_path_rule(domain_rule):
         return domain_rule in url_lower
 
     # Domain/subdomain rule
-    host = _hostname(url_lower)
+    host = hostname(url_lower)
     # Direct match OR subdomain: domain = "github.com" → host ends with ".github.com" or == "github.com"
     return host == domain_rule or host.endswith("." + domain_rule)
 
 
-def get_app_category(app_name: str) -> str:
-    categories = load_categories()
-    return categories.get(app_name.lower(), DEFAULT_CATEGORY)
+# ==========================================================
+# Compiled rule index
+# ==========================================================
 
+# Bounded memo of get_category() results; cleared with the rules
+RESULT_CACHE_SIZE = 4096
 
-def get_category(app_name: str, url: str = None):
-    data = load_categories()
-    app_name = app_name.lower()
 
-    # 1️⃣  URL-based rule — applies to ALL browsers when a URL is present
-    if url and url != "N/A":
-        url_lower = url.lower()
+class CategoryIndex:
+    """
+    url_rules / apps from one load of app_categories.json, compiled so a
+    lookup never scans the rule list:
+
+      domain rules   trie over reversed host labels: com → github → rule.
+                     Walking the host's labels from the TLD visits exactly
+                     the rules it equals or is a subdomain of.
+      path rules     Aho-Corasick automaton over the rule strings, so one
+                     pass over the URL finds every rule it contains.
+      app rules      the `apps` dict.
+
+    Every URL rule keeps its rank in the old longest-first scan order, and
+    the best-ranked candidate wins, so results are identical to the scan.
+    """
+
+    def __init__(self, data: dict):
+        self.data = data
         url_rules = data.get("url_rules", {})
-        # Sort rules longest-first so specific paths beat generic domains
-        for domain, cat in sorted(url_rules.items(), key=lambda x: -len(x[0])):
-            if _url_matches_rule(url_lower, domain):
-                return cat["main"], cat["sub"]
+        self.apps = data.get("apps", {})
+
+        # Rank 0 = longest rule; ties keep file order (sorted() is stable)
+        ranked = sorted(url_rules.items(), key=lambda x: -len(x[0]))
+        self.results = [(cat["main"], cat["sub"]) for _, cat in ranked]
+
+        self._domains: dict = {}
+        paths = []
+        for rank, (rule, _) in enumerate(ranked):
+            if _is_path_rule(rule):
+                paths.append((rule, rank))
+            else:
+                node = self._domains
+                for label in reversed(rule.split(".")):
+                    node = node.setdefault(label, {})
+                # None can't collide with a label (labels are strings)
+                node.setdefault(None, rank)
+
+        self._build_automaton(paths)
+
+    # ------------------------------------------------------------------
+    def _build_automaton(self, patterns: list[tuple[str, int]]):
+        """Aho-Corasick: goto / fail tables plus the best rank ending at each state."""
+        goto = [{}]
+        best = [None]
+        for pattern, rank in patterns:
+            state = 0
+            for ch in pattern:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = goto[state][ch] = len(goto)
+                    goto.append({})
+                    best.append(None)
+                state = nxt
+            if best[state] is None or rank < best[state]:
+                best[state] = rank
+
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        for state in queue:
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                # Depth-1 states fail to the root
+                fail[nxt] = goto[f].get(ch, 0) if state else 0
+                inherited = best[fail[nxt]]
+                if inherited is not None and (best[nxt] is None or inherited < best[nxt]):
+                    best[nxt] = inherited
+
+        self._goto, self._fail, self._best = goto, fail, best
+
+    def _best_path_rank(self, url_lower: str):
+        goto, fail, best = self._goto, self._fail, self._best
+        found = None
+        state = 0
+        for ch in url_lower:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            rank = best[state]
+            if rank is not None and (found is None or rank < found):
+                found = rank
+        return found
+
+    def _best_domain_rank(self, host: str):
+        found = None
+        node = self._domains
+        for label in reversed(host.split(".")):
+            node = node.get(label)
+            if node is None:
+                break
+            rank = node.get(None)
+            if rank is not None and (found is None or rank < found):
+                found = rank
+        return found
+
+    # ------------------------------------------------------------------
+    def url_category(self, url_lower: str) -> tuple[str, str] | None:
+        """Category of the best-ranked URL rule matching `url_lower`, or None."""
+        ranks = [
+            r for r in (self._best_path_rank(url_lower), self._best_domain_rank(hostname(url_lower)))
+            if r is not None
+        ]
+        return self.results[min(ranks)] if ranks else None
+
+    def category(self, app_name: str, url: str | None) -> tuple[str, str]:
+        """Same contract as get_category(); `app_name` already lowercased."""
+        # 1️⃣  URL-based rule — applies to ALL browsers when a URL is present
+        if url and url != "N/A":
+            matched = self.url_category(url.lower())
+            if matched is not None:
+                return matched
+
+            # URL present but no rule matched → browser default = neutral
+            if app_name in BROWSER_EXES or app_name.replace(".exe", "") in BROWSER_EXES:
+                return "neutral", "browser"
+
+        # 2️⃣  App-based fallback
+        if app_name in self.apps:
+            return self.apps[app_name]["main"], self.apps[app_name]["sub"]
+
+        return "other", "other"
+
+
+def _rules() -> CategoryIndex:
+    return config_registry.get("categories")
+
+
+@lru_cache(maxsize=RESULT_CACHE_SIZE)
+def _cached_category(app_name: str, url: str | None, rules: CategoryIndex) -> tuple[str, str]:
+    # `rules` is part of the key so a lookup racing a reload can't cache a stale answer
+    return rules.category(app_name, url)
+
+
+def _parse(path: str) -> CategoryIndex:
+    with open(path, "r", encoding="utf-8") as f:
+        return CategoryIndex(json.load(f))
+
+
+# Compiled once per change of the file; cached results go with the old rules
+config_registry.register("categories", CATEGORY_FILE, _parse, default=CategoryIndex({}))
+config_registry.subscribe("categories", lambda _: _cached_category.cache_clear())
+
 
-        # URL present but no rule matched → browser default = neutral
-        if app_name in BROWSER_EXES or app_name.replace(".exe", "") in BROWSER_EXES:
-            return "neutral", "browser"
+def get_app_category(app_name: str) -> str:
+    categories = load_categories()
+    return categories.get(app_name.lower(), DEFAULT_CATEGORY)
 
-    # 2️⃣  App-based fallback
-    app_rules = data.get("apps", {})
-    if app_name in app_rules:
-        return app_rules[app_name]["main"], app_rules[app_name]["sub"]
 
-    return "other", "other"
+def get_category(app_name: str, url: str = None):
+    """
+    (main, sub) category for an app, and its URL for browsers. URL rules win
+    (longest rule first), then the browser default, then app rules.
+    Answered from the compiled CategoryIndex through a bounded LRU.
+    """
+    return _cached_category(app_name.lower(), url, _rules())
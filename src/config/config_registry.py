@@ -0,0 +1,212 @@
+"""
+config_registry.py
+──────────────────
+Watched, pre-parsed snapshots of the JSON config files.
+
+ignored_apps.json and app_categories.json are read on hot paths: every
+analytics route checks is_ignored() once per result row, and the logger
+categorises every tick. Instead of stat()-ing or re-reading the files per
+call, each file is registered here with a parser that turns it into an
+immutable snapshot (lowercased sets, compiled rule index). Readers just
+take the current snapshot; nothing touches the disk.
+
+The registry watches the files' directory with watchdog (already used by
+file_monitor.py) and falls back to polling mtimes every POLL_INTERVAL if the
+observer can't start. When a file changes it is re-parsed off the hot path,
+the new snapshot is swapped in, and subscribers are told — so caches built
+from the old config (category results, focus scores, reports) can drop out.
+A file that fails to parse keeps its previous snapshot.
+
+Usage
+-----
+  from src.config.config_registry import config_registry
+
+  config_registry.register("ignored_apps", path, parse)   # loads immediately
+  snapshot = config_registry.get("ignored_apps")
+  config_registry.subscribe("ignored_apps", lambda snapshot: cache.clear())
+  config_registry.start()                                  # main.py, once
+"""
+
+import os
+import threading
+
+from src.core.shutdown import shutdown_event
+
+# Editors save in bursts (truncate, write, rename); reload once it settles
+DEBOUNCE_SECONDS = 0.25
+# Only used when the watchdog observer can't be started
+POLL_INTERVAL = 5
+
+
+class _Entry:
+    def __init__(self, name: str, path: str, parse, default):
+        self.name = name
+        self.path = os.path.abspath(path)
+        self.parse = parse
+        self.default = default
+        self.snapshot = default
+        self.signature = None
+        self.timer: threading.Timer | None = None
+
+
+def _signature(path: str):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class ConfigRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: dict[str, _Entry] = {}
+        # name -> callbacks; may be subscribed before the name is registered
+        self._subscribers: dict[str, list] = {}
+        self._observer = None
+        self._handler = None
+        self._watched: set[str] = set()
+        self._poller: threading.Thread | None = None
+
+    # ------------------------------------------------------------------
+    def register(self, name: str, path: str, parse, default=None):
+        """
+        Watch `path` as `name`. `parse(path)` returns the snapshot and is only
+        called when the file exists; `default` stands in when it doesn't.
+        Re-registering a name points it at a new path and reloads it.
+        """
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                entry = self._entries[name] = _Entry(name, path, parse, default)
+            else:
+                entry.path, entry.parse, entry.default = os.path.abspath(path), parse, default
+            watching = self._observer is not None
+        self.reload(name)
+        if watching:
+            self._watch_dir(os.path.dirname(entry.path))
+        return entry.snapshot
+
+    def get(self, name: str):
+        """The current snapshot of `name` (never touches the disk)."""
+        return self._entries[name].snapshot
+
+    def subscribe(self, name: str, callback):
+        """Call `callback(snapshot)` after every reload of `name`."""
+        with self._lock:
+            self._subscribers.setdefault(name, []).append(callback)
+
+    # ------------------------------------------------------------------
+    def reload(self, name: str):
+        """Re-read `name` now and notify subscribers. Returns the new snapshot."""
+        entry = self._entries[name]
+        signature = _signature(entry.path)
+        try:
+            snapshot = entry.parse(entry.path) if signature is not None else entry.default
+        except Exception as e:
+            # Don't retry until the file changes again
+            entry.signature = signature
+            print(f"[Config] Failed to load {os.path.basename(entry.path)}, keeping previous: {e}")
+            return entry.snapshot
+
+        entry.snapshot = snapshot
+        entry.signature = signature
+        for callback in list(self._subscribers.get(name, ())):
+            try:
+                callback(snapshot)
+            except Exception as e:
+                print(f"[Config] Subscriber of {name} failed: {e}")
+        return snapshot
+
+    def check(self):
+        """Reload every file whose mtime or size changed since it was loaded."""
+        for entry in list(self._entries.values()):
+            if _signature(entry.path) != entry.signature:
+                self.reload(entry.name)
+
+    def _changed(self, path: str):
+        """A filesystem event touched `path`; reload matching entries once it settles."""
+        path = os.path.abspath(path)
+        for entry in list(self._entries.values()):
+            if os.path.normcase(entry.path) != os.path.normcase(path):
+                continue
+            with self._lock:
+                if entry.timer is not None:
+                    entry.timer.cancel()
+                entry.timer = threading.Timer(DEBOUNCE_SECONDS, self._settled, args=(entry,))
+                entry.timer.daemon = True
+                entry.timer.start()
+
+    def _settled(self, entry: _Entry):
+        with self._lock:
+            entry.timer = None
+        if _signature(entry.path) != entry.signature:
+            self.reload(entry.name)
+
+    # ==========================================================
+    # Watching
+    # ==========================================================
+
+    def start(self):
+        """Start watching the registered files (watchdog, else mtime polling)."""
+        if self._observer is not None or self._poller is not None:
+            return
+        try:
+            from watchdog.observers import Observer
+            from watchdog.events import FileSystemEventHandler
+
+            registry = self
+
+            class _Handler(FileSystemEventHandler):
+                def on_any_event(self, event):
+                    if event.is_directory:
+                        return
+                    registry._changed(event.src_path)
+                    dest = getattr(event, "dest_path", None)
+                    if dest:
+                        registry._changed(dest)
+
+            observer = Observer()
+            observer.daemon = True
+            self._handler = _Handler()
+            with self._lock:
+                self._observer = observer
+            for directory in {os.path.dirname(e.path) for e in self._entries.values()}:
+                self._watch_dir(directory)
+            observer.start()
+            print("[Config] Watching config files for changes")
+        except Exception as e:
+            with self._lock:
+                self._observer = None
+            print(f"[Config] File watcher unavailable ({e}); polling every {POLL_INTERVAL}s")
+            self._poller = threading.Thread(target=self._poll_loop, daemon=True, name="ConfigPoller")
+            self._poller.start()
+        # Catch anything that changed between registration and the watch starting
+        self.check()
+
+    def _watch_dir(self, directory: str):
+        if directory in self._watched:
+            return
+        self._observer.schedule(self._handler, directory, recursive=False)
+        self._watched.add(directory)
+
+    def _poll_loop(self):
+        while not shutdown_event.wait(POLL_INTERVAL):
+            self.check()
+
+    def stop(self):
+        with self._lock:
+            observer, self._observer = self._observer, None
+            self._watched.clear()
+            timers = [e.timer for e in self._entries.values() if e.timer is not None]
+        for timer in timers:
+            timer.cancel()
+        if observer is not None:
+            try:
+                observer.stop()
+                observer.join(timeout=2)
+            except Exception:
+                pass
+
+
+config_registry = ConfigRegistry()
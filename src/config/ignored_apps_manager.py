@@ -1,43 +1,90 @@
 import json
 import os
+from typing import NamedTuple
+
+from src.config.config_registry import config_registry
 
 IGNORED_APPS_FILE = os.path.join(
     os.path.dirname(__file__),
     "ignored_apps.json"
 )
 
-_cached_list: list = []
-_cached_mtime: float = 0.0
+
+class IgnoredApps(NamedTuple):
+    # Names as listed in the file, for /api/ignored-apps
+    names: tuple
+    # app_key() of every name, for is_ignored() and the ignored_apps table
+    keys: frozenset
+
+
+def app_key(app_name: str | None) -> str | None:
+    """
+    The name ignore checks compare: lowercased (Unicode-aware), ".exe"
+    stripped. Also registered as the SQL function app_key() on every pooled
+    connection, so not_ignored() and is_ignored() agree on every name.
+    """
+    if app_name is None:
+        return None
+    return app_name.lower().replace(".exe", "")
+
+
+def _parse(path: str) -> IgnoredApps:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    names = tuple(data.get("ignore_processes", []))
+    return IgnoredApps(names, frozenset(app_key(n) for n in names))
+
+
+# Reloaded by the config registry when the file changes
+config_registry.register(
+    "ignored_apps", IGNORED_APPS_FILE, _parse, default=IgnoredApps((), frozenset())
+)
 
 
 def load_ignored_apps():
-    global _cached_list, _cached_mtime
-    if not os.path.exists(IGNORED_APPS_FILE):
-        return []
-    try:
-        mtime = os.path.getmtime(IGNORED_APPS_FILE)
-        if mtime != _cached_mtime:
-            with open(IGNORED_APPS_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            _cached_list = data.get("ignore_processes", [])
-            _cached_mtime = mtime
-        return _cached_list
-    except Exception as e:
-        print(f"Error loading ignored apps: {e}")
-        return []
-
-
-# Pre-built lowercase set for O(1) lookup, refreshed when file changes
-_ignored_set: set = set()
-_ignored_set_mtime: float = 0.0
+    return list(config_registry.get("ignored_apps").names)
 
 
 def is_ignored(app_name: str) -> bool:
-    global _ignored_set, _ignored_set_mtime
     if not app_name:
         return False
-    ignored_list = load_ignored_apps()
-    if _ignored_set_mtime != _cached_mtime:
-        _ignored_set = {n.lower().replace(".exe", "") for n in ignored_list}
-        _ignored_set_mtime = _cached_mtime
-    return app_name.lower().replace(".exe", "") in _ignored_set
+    return app_key(app_name) in config_registry.get("ignored_apps").keys
+
+
+# ==========================================================
+# SQL side
+# ==========================================================
+
+def not_ignored(column: str = "app_name") -> str:
+    """
+    WHERE-clause predicate dropping ignored apps, for queries against the
+    main database. Both sides are app_key() — the table is filled with it
+    and the column goes through the same Python function — so non-ASCII
+    names match exactly as in is_ignored(); the lookup is a primary-key
+    probe into the ignored_apps mirror table.
+    """
+    return (
+        "NOT EXISTS (SELECT 1 FROM ignored_apps "
+        f"WHERE ignored_apps.app_key = app_key({column}))"
+    )
+
+
+def sync_ignored_table(snapshot: IgnoredApps | None = None) -> bool:
+    """
+    Make the ignored_apps table match the file. Called by init_db() and on
+    every reload of ignored_apps.json. Returns True if it changed anything.
+    """
+    from src.database.database import db
+
+    keys = (snapshot or config_registry.get("ignored_apps")).keys
+    with db.transaction() as conn:
+        current = {row[0] for row in conn.execute("SELECT app_key FROM ignored_apps")}
+        if current == keys:
+            return False
+        conn.execute("DELETE FROM ignored_apps")
+        conn.executemany("INSERT INTO ignored_apps (app_key) VALUES (?)", [(k,) for k in sorted(keys)])
+    print(f"[Config] ignored_apps table synced: {len(keys)} app(s)")
+    return True
+
+
+config_registry.subscribe("ignored_apps", sync_ignored_table)
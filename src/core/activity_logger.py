@@ -1,297 +1,24 @@
-import win32gui
-import win32process
 import datetime
-import time
-import asyncio
 import gc
-from pynput import mouse, keyboard
 
-from src.core.url_sniffer import get_browser_url, url_resolver
-from src.analytics.daily_summary import update_daily_stats
-from src.database.database import get_connection, get_setting
+from src.analytics.daily_summary import daily_accumulator
+from src.analytics.hourly_summary import update_hourly_stats
+from src.analytics.data_version import data_versions
+from src.analytics.live_today import today_stats
+from src.config.category_manager import get_category
+from src.database.database import db
+from src.database.dimensions import dimensions
+from src.core.platform import get_backend, clock
 from src.core.settings_cache import settings_cache
-from src.core.process_cache import process_cache
 from src.core.shutdown import shutdown_event
-import win32con
-import threading
 
 APP_NAME = "Stasis"
 IDLE_THRESHOLD = 120        # seconds of no input = idle
 SLEEP_DELTA_THRESHOLD = 15 # seconds gap = assume sleep/resume
 POLL_INTERVAL = 1          # main loop interval in seconds
-BATCH_COMMIT_INTERVAL = 15 # commit to disk every N seconds
+BATCH_COMMIT_INTERVAL = 15 # write buffered daily_stats deltas every N seconds
 PERIODIC_FLUSH_INTERVAL = 60 # flush active session to DB every N seconds even without tab switch
 
-# Browser process names — used to match SMTC source_app_user_model_id
-BROWSER_PROCESSES = {"chrome", "msedge", "brave", "firefox", "opera"}
-
-
-# ===============================
-# SMTC MEDIA SESSION MONITOR
-# ===============================
-class MediaSessionMonitor:
-    """
-    Polls the Windows Global System Media Transport Controls (SMTC) API
-    on a background thread to determine whether any app (especially browsers)
-    is actively playing media.
-
-    Uses winsdk (pip install winsdk) which wraps the WinRT APIs.
-    Falls back to False on import errors so the rest of the app keeps working
-    even if winsdk is not installed.
-
-    Thread-safety: _is_playing is written only from the background asyncio loop
-    and read from the main thread — a boolean assignment is atomic in CPython,
-    so no lock is needed.
-    """
-
-    # Maps WinRT PlaybackStatus integer to a human-readable string
-    _STATUS_PLAYING = 4   # GlobalSystemMediaTransportControlsSessionPlaybackStatus.Playing
-
-    def __init__(self):
-        self._is_playing: bool = False
-        self._playing_sources: dict = {}  # {app_name_lower: bool}
-        self._available: bool = False   # False if winsdk not installed
-        self._loop: asyncio.AbstractEventLoop | None = None
-        self._thread: threading.Thread | None = None
-        self._lock = threading.Lock() # Added for thread safety
-        self._start_background_loop()
-
-    # ------------------------------------------------------------------
-    # Public API
-    # ------------------------------------------------------------------
-    @property
-    def is_available(self) -> bool:
-        """False when winsdk is not installed — caller should fall back."""
-        return self._available
-
-    def is_media_playing(self) -> bool:
-        """
-        Returns True if any SMTC session reports PlaybackStatus == Playing.
-        Always False when winsdk is unavailable.
-        """
-        with self._lock:
-            return self._is_playing
-
-    def is_app_playing(self, app_name: str) -> bool:
-        """
-        Returns True ONLY if the specific foreground app has an active
-        SMTC playing session. app_name is the process name e.g. 'chrome.exe'.
-
-        This prevents a background Spotify session from blocking idle
-        detection when the foreground window is a paused YouTube tab.
-        """
-        name_lower = app_name.lower().replace(".exe", "")
-        with self._lock:
-            return self._playing_sources.get(name_lower, False)
-
-    # ------------------------------------------------------------------
-    # Background asyncio loop (runs in a daemon thread)
-    # ------------------------------------------------------------------
-    def _start_background_loop(self):
-        try:
-            # Validate import early so we can set _available correctly
-            import winsdk.windows.media.control as wmc  # noqa: F401
-            self._available = True
-        except ImportError:
-            print("[MediaSessionMonitor] winsdk not installed — SMTC unavailable. "
-                  "Run: pip install winsdk")
-            return
-
-        self._loop = asyncio.new_event_loop()
-        self._thread = threading.Thread(
-            target=self._run_loop, daemon=True, name="SMTCMonitor"
-        )
-        self._thread.start()
-
-    def _run_loop(self):
-        asyncio.set_event_loop(self._loop)
-        try:
-            self._loop.run_until_complete(self._poll_forever())
-        except asyncio.CancelledError:
-            pass
-
-    async def _poll_forever(self):
-        import winsdk.windows.media.control as wmc
-
-        manager = None
-        while not shutdown_event.is_set():
-            try:
-                # Re-acquire manager if needed (e.g. after resume from sleep)
-                if manager is None:
-                    manager = await wmc.GlobalSystemMediaTransportControlsSessionManager.request_async()
-
-                sessions = manager.get_sessions()
-                any_playing     = False
-
-                playing_sources = {}
-                for session in sessions:
-                    pb_info = session.get_playback_info()
-                    if pb_info is None:
-                        continue
-
-                    status = pb_info.playback_status
-                    # PlaybackStatus: 0=Unknown,1=Closed,2=Opened,3=Changing,4=Stopped,5=Playing,6=Paused
-                    is_playing = (int(status) == 5)
-
-                    # source_app_user_model_id looks like "Chrome_Audio",
-                    # "MSEdge", "Spotify.exe", "vlc.exe" etc.
-                    source = (session.source_app_user_model_id or "").lower()
-
-                    # Normalise to bare app name: "chrome_audio" -> "chrome"
-                    # Strip common suffixes so we can match against app_name
-                    for suffix in ("_audio", ".exe"):
-                        source = source.replace(suffix, "")
-
-                    if source:
-                        playing_sources[source] = is_playing
-
-                    if is_playing:
-                        any_playing = True
-
-                with self._lock:
-                    self._is_playing       = any_playing
-                    self._playing_sources  = playing_sources
-
-            except Exception as e:
-                # Manager can fail after sleep/resume; reset so we re-acquire next tick
-                print(f"[MediaSessionMonitor] Poll error: {e}")
-                manager = None
-                with self._lock:
-                    self._is_playing      = False
-                    self._playing_sources = {}
-
-            await asyncio.sleep(2)   # poll every 2 s — plenty for idle detection
-
-
-# ===============================
-# SLEEP MANAGER
-# ===============================
-class SleepManager:
-    def __init__(self):
-        self.is_sleeping = False
-        self._create_message_window()
-
-    def _create_message_window(self):
-        CLASS_NAME = "SleepDetectorWindow"
-        wc = win32gui.WNDCLASS()
-        wc.lpfnWndProc = self._wnd_proc
-        wc.lpszClassName = CLASS_NAME
-
-        try:
-            win32gui.RegisterClass(wc)
-        except Exception:
-            # Error 1410 = class already registered (e.g. hot-reload / second import).
-            # Safe to ignore — CreateWindow still works with the existing class name.
-            pass
-
-        self.hwnd = win32gui.CreateWindow(
-            CLASS_NAME,          # pass the string name, not the atom — always valid
-            "SleepDetector", 0,
-            0, 0, 0, 0, 0, 0, 0, None
-        )
-        threading.Thread(target=self._message_loop, daemon=True).start()
-
-    def _message_loop(self):
-        win32gui.PumpMessages()
-
-    def _wnd_proc(self, hwnd, msg, wparam, lparam):
-        if msg == win32con.WM_POWERBROADCAST:
-            if wparam == win32con.PBT_APMSUSPEND:
-                self.is_sleeping = True
-            elif wparam == win32con.PBT_APMRESUMEAUTOMATIC:
-                self.is_sleeping = False
-        return 1
-
-
-# ===============================
-# WIN32 IDLE TIME
-# ===============================
-import ctypes
-import ctypes.wintypes
-
-class _LASTINPUTINFO(ctypes.Structure):
-    _fields_ = [("cbSize", ctypes.wintypes.UINT),
-                ("dwTime",  ctypes.wintypes.DWORD)]
-
-def _get_win32_idle_seconds() -> float:
-    """
-    Ask Windows directly how long since the last hardware input event
-    (keyboard, mouse move, mouse click, touch, pen).
-
-    This is the same API used by screensavers and power managers.
-    It is immune to software-generated events because it reads from
-    the kernel raw-input timestamp, not from pynput hooks.
-    """
-    lii = _LASTINPUTINFO()
-    lii.cbSize = ctypes.sizeof(_LASTINPUTINFO)
-    if ctypes.windll.user32.GetLastInputInfo(ctypes.byref(lii)):
-        # Both values are milliseconds since boot; subtraction handles
-        # the 49.7-day DWORD rollover safely.
-        elapsed_ms = (ctypes.windll.kernel32.GetTickCount() - lii.dwTime) & 0xFFFFFFFF
-        return elapsed_ms / 1000.0
-    return 0.0
-
-
-# ===============================
-# INPUT TRACKER
-# ===============================
-class InputCounter:
-    """
-    Counts keystrokes and mouse clicks for productivity metrics.
-
-    Idle time comes from Win32 GetLastInputInfo, NOT from pynput.
-    Reason: pynput on_move fires constantly from OS cursor rendering,
-    which would reset idle every frame and prevent detection entirely.
-    Win32 GetLastInputInfo only responds to real hardware events.
-    """
-    def __init__(self):
-        self.kb_count    = 0
-        self.mouse_count = 0
-        self._lock       = threading.Lock()
-
-        self.kb_listener = keyboard.Listener(on_press=self._on_key_press)
-        self.mouse_listener = mouse.Listener(
-            on_click=self._on_mouse_click,
-            # on_move deliberately omitted — kills idle detection
-        )
-        self.kb_listener.start()
-        self.mouse_listener.start()
-
-    def _on_key_press(self, key):
-        with self._lock:
-            self.kb_count += 1
-
-    def _on_mouse_click(self, x, y, button, pressed):
-        if pressed:
-            with self._lock:
-                self.mouse_count += 1
-
-    def get_idle_seconds(self) -> float:
-        """True hardware idle time from the OS kernel."""
-        return _get_win32_idle_seconds()
-
-    def get_and_reset_counts(self):
-        """Return (keystrokes, clicks) accumulated since last call and reset."""
-        with self._lock:
-            counts = (self.kb_count, self.mouse_count)
-            self.kb_count    = 0
-            self.mouse_count = 0
-        return counts
-
-    def stop(self):
-        """Cleanly stop pynput listeners."""
-        self.kb_listener.stop()
-        self.mouse_listener.stop()
-
-
-# ===============================
-# SINGLETONS
-# ===============================
-input_tracker = InputCounter()
-sleep_manager  = SleepManager()
-media_monitor  = MediaSessionMonitor()
-
-
 # ===============================
 # GLOBAL SESSION TRACKER
 # ===============================
@@ -302,7 +29,7 @@ def get_current_session_duration() -> float:
     """Returns the seconds elapsed in the current unbroken window session."""
     if _current_session_start_mono is None:
         return 0.0
-    return time.monotonic() - _current_session_start_mono
+    return clock.monotonic() - _current_session_start_mono
 
 
 # ===============================
@@ -325,8 +52,9 @@ def is_media_active(info: dict) -> bool:
         return False
 
     # --- 1. Primary: SMTC (The gold standard) ---
-    if media_monitor.is_available:
-        if media_monitor.is_app_playing(info["app_name"]):
+    backend = get_backend()
+    if backend.is_media_available():
+        if backend.is_app_playing(info["app_name"]):
             return True
 
     # --- 2. Fullscreen Heuristic ---
@@ -360,61 +88,9 @@ def is_media_active(info: dict) -> bool:
     return False
 
 
-def is_window_fullscreen(hwnd) -> bool:
-    """
-    Checks if a window is in fullscreen mode by comparing its 
-    dimensions to the primary monitor resolution.
-    """
-    try:
-        from win32api import GetSystemMetrics
-        rect = win32gui.GetWindowRect(hwnd)
-        w = rect[2] - rect[0]
-        h = rect[3] - rect[1]
-        sw = GetSystemMetrics(0)
-        sh = GetSystemMetrics(1)
-        # Covers both exact match and 'borderless' which can be slightly larger
-        return w >= sw and h >= sh
-    except Exception:
-        return False
-
 def get_active_window_info() -> dict | None:
-    try:
-        hwnd = win32gui.GetForegroundWindow()
-        if not hwnd:
-            return None
-        title = win32gui.GetWindowText(hwnd)
-        if not title:
-            return None
-
-        _, pid = win32process.GetWindowThreadProcessId(hwnd)
-        app_name, exe_path = process_cache.get_info(pid)
-        
-        if not app_name:
-            return None
-
-        browser_tracking = settings_cache.get("browser_tracking", "true") in ("true", "1")
-
-        url = "N/A"
-
-        if browser_tracking:
-            try:
-                # Fast path: read cached URL from background resolver (never blocks)
-                detected = url_resolver.get_cached_url(hwnd, app_name)
-                if detected:
-                    url = detected
-            except Exception:
-                pass
-
-        return {
-            "app_name": app_name, 
-            "pid": pid, 
-            "title": title.strip(), 
-            "url": url, 
-            "exe_path": exe_path,
-            "is_fullscreen": is_window_fullscreen(hwnd)
-        }
-    except Exception:
-        return None
+    """The foreground window, from the active platform backend."""
+    return get_backend().get_active_window_info()
 
 
 # ===============================
@@ -452,7 +128,7 @@ class SessionState:
 
     Idle accounting works like this:
     - When the user goes idle (idle_seconds > IDLE_THRESHOLD), we record
-      idle_start_time = time.monotonic() - idle_seconds  (i.e. when idle began).
+      idle_start_time = clock.monotonic() - idle_seconds  (i.e. when idle began).
     - While idle, each loop we extend idle_wall_seconds to cover the gap.
     - When the user returns from idle, we finalize the idle block and reset.
     - On flush, active_seconds = wall_seconds - idle_wall_seconds.
@@ -460,33 +136,60 @@ class SessionState:
     Tab-switch detection:
     - A pending_key counter debounces rapid URL/title changes (e.g. typing
       in the address bar) so only stable tab switches create new sessions.
+
+    Row coalescing:
+    - A SessionState covers one flush interval. The activity_facts row it
+      writes to (row_id / row_day / row_started_at) is carried over to the
+      next interval on periodic flushes via extend(), so one unbroken focus
+      block is one row that is UPDATEd in place instead of a new row per
+      PERIODIC_FLUSH_INTERVAL.
     """
     def __init__(self, info: dict):
         self.info            = info
         self.key             = session_key(info)
-        self.wall_start      = time.monotonic()
+        self.wall_start      = clock.monotonic()
         self.idle_wall_secs  = 0.0
+        # Open activity_facts row; None until the first flush inserts it
+        self.row_id: int | None   = None
+        self.row_day: str | None  = None
+        self.row_started_at       = clock.time()
+        self.row_start_mono       = self.wall_start
         self._idle_block_start: float | None = None
+        self._category: tuple | None = None   # ((app_name, url), (main, sub))
         # Debounce state: track a candidate new session before committing
         self._pending_key:   tuple | None = None
         self._pending_ticks: int          = 0
 
+    def extend(self, previous: "SessionState"):
+        """Continue writing into `previous`'s activity_facts row."""
+        self.row_id         = previous.row_id
+        self.row_day        = previous.row_day
+        self.row_started_at = previous.row_started_at
+        self.row_start_mono = previous.row_start_mono
+
+    def category(self) -> tuple[str, str]:
+        """(main, sub) category for the current app/url, resolved once per change."""
+        key = (self.info["app_name"], self.info["url"])
+        if self._category is None or self._category[0] != key:
+            self._category = (key, get_category(*key))
+        return self._category[1]
+
     def tick_idle(self, currently_idle: bool, idle_seconds_from_input: float):
         """
         Call once per loop.  currently_idle = True when user is idle right now.
-        idle_seconds_from_input = input_tracker.get_idle_seconds()
+        idle_seconds_from_input = backend.get_idle_seconds()
         """
         if currently_idle:
             if self._idle_block_start is None:
                 # Idle just started; back-date the start by how long idle_seconds says
-                self._idle_block_start = time.monotonic() - idle_seconds_from_input
+                self._idle_block_start = clock.monotonic() - idle_seconds_from_input
                 # But never set it before the session wall_start
                 if self._idle_block_start < self.wall_start:
                     self._idle_block_start = self.wall_start
         else:
             if self._idle_block_start is not None:
                 # User just became active again — finalize this idle block
-                idle_block = time.monotonic() - self._idle_block_start
+                idle_block = clock.monotonic() - self._idle_block_start
                 self.idle_wall_secs += max(0.0, idle_block)
                 self._idle_block_start = None
 
@@ -525,12 +228,13 @@ class SessionState:
 
         return False   # still debouncing
 
-    def finalize(self) -> tuple[float, float]:
+    def finalize(self, until: float | None = None) -> tuple[float, float]:
         """
         Returns (active_seconds, idle_seconds) for the whole session.
-        Closes any open idle block at the current moment.
+        Closes any open idle block at the current moment (or at `until`,
+        a clock.monotonic() value).
         """
-        now = time.monotonic()
+        now = clock.monotonic() if until is None else until
         extra_idle = (now - self._idle_block_start) if self._idle_block_start is not None else 0.0
         total_idle   = self.idle_wall_secs + max(0.0, extra_idle)
         total_wall   = now - self.wall_start
@@ -541,38 +245,99 @@ class SessionState:
 # ===============================
 # SESSION FLUSH
 # ===============================
-def flush_session(session: SessionState, cursor) -> bool:
-    active_secs, idle_secs = session.finalize()
+def flush_session(session: SessionState, ended_mono: float | None = None) -> bool:
+    """
+    Write the session's interval to the DB. The first flush INSERTs the
+    session's activity_facts row; later flushes of the same session (see
+    SessionState.extend) add to that row in place. A new row is started
+    when the day changes so every row stays within one `day`.
+
+    `ended_mono` ends the interval at an earlier clock.monotonic() time
+    instead of now — the last tick before a suspend, so the time the
+    machine was asleep is not counted.
+    """
+    active_secs, idle_secs = session.finalize(ended_mono)
 
     if active_secs <= 0 and idle_secs <= 0:
         return False
 
-    keys, clicks = input_tracker.get_and_reset_counts()
-    timestamp    = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    keys, clicks = get_backend().get_and_reset_counts()
+    now          = clock.now()
+    if ended_mono is not None:
+        now -= datetime.timedelta(seconds=max(0.0, clock.monotonic() - ended_mono))
+    day          = now.strftime("%Y-%m-%d")
     info         = session.info
 
     try:
-        cursor.execute("""
-            INSERT INTO activity_logs
-                (timestamp, app_name, exe_path, pid, window_title, url,
-                 active_seconds, idle_seconds, keystrokes, clicks)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            timestamp,
-            info["app_name"], info.get("exe_path"), info["pid"], info["title"], info["url"],
-            int(active_secs), int(idle_secs),
-            int(keys), int(clicks)
-        ))
-
-        update_daily_stats(cursor, info["app_name"], info["url"], active_secs, idle_secs, keys, clicks)
+        # Intern strings first (outside the write transaction) so the ids
+        # can be cached — see src/database/dimensions.py
+        app_id   = dimensions.app_id(info["app_name"], info.get("exe_path"))
+        title_id = dimensions.title_id(info["title"])
+        url_id   = dimensions.url_id(info["url"])
+        main_cat, sub_cat = session.category()
+
+        # Raw row + hourly aggregate commit (or roll back) together; the
+        # daily aggregate is buffered in daily_accumulator
+        with db.transaction() as conn:
+            cursor = conn.cursor()
+            extended = False
+
+            if session.row_id is not None and session.row_day == day:
+                # 0 rows if retention / clear-data removed it meanwhile
+                extended = cursor.execute("""
+                    UPDATE activity_facts
+                    SET title_id       = ?,
+                        url_id         = ?,
+                        active_seconds = active_seconds + ?,
+                        idle_seconds   = idle_seconds   + ?,
+                        keystrokes     = keystrokes     + ?,
+                        clicks         = clicks         + ?
+                    WHERE id = ?
+                """, (
+                    title_id, url_id,
+                    int(active_secs), int(idle_secs),
+                    int(keys), int(clicks),
+                    session.row_id
+                )).rowcount > 0
+
+            if not extended:
+                # ts_epoch is when the row's session started, clamped to
+                # local midnight so it always falls on `day`
+                midnight = now.replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
+                started_at = session.row_started_at if session.row_day in (None, day) else clock.time() - active_secs - idle_secs
+                started_at = max(started_at, midnight)
+
+                cursor.execute("""
+                    INSERT INTO activity_facts
+                        (ts_epoch, day, app_id, pid, title_id, url_id,
+                         active_seconds, idle_seconds, keystrokes, clicks)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (
+                    int(started_at), day,
+                    app_id, info["pid"], title_id, url_id,
+                    int(active_secs), int(idle_secs),
+                    int(keys), int(clicks)
+                ))
+                row_id = cursor.lastrowid
+
+            hours = update_hourly_stats(cursor, info["app_name"], main_cat, now, active_secs, idle_secs, keys, clicks)
+
+        daily_accumulator.add(
+            day, info["app_name"], main_cat, sub_cat, active_secs, idle_secs, keys, clicks,
+            new_session=not extended
+        )
+        if not extended:
+            session.row_id, session.row_day, session.row_started_at = row_id, day, started_at
+        today_stats.add_flush(
+            day, info["app_name"], main_cat, sub_cat, active_secs, idle_secs, keys, clicks,
+            not extended, session.row_id, session.row_started_at, hours,
+            url=info.get("url")
+        )
+        data_versions.bump(day)
         # Throttled call for wellbeing calculation moved to main loop to save memory/CPU
         return True
 
     except Exception as e:
-        try:
-            cursor.connection.rollback()
-        except Exception:
-            pass
         print(f"[Logger] DB flush error: {e}")
         return False
 
@@ -581,138 +346,163 @@ def flush_session(session: SessionState, cursor) -> bool:
 # MAIN LOGGER LOOP
 # ===============================
 def start_logging():
-    # Start background URL resolver so get_active_window_info() never blocks
-    url_resolver.start()
+    backend = get_backend()
+    backend.start()
 
     session: SessionState | None = None
-    conn   = get_connection()
-    cursor = conn.cursor()
 
-    today = datetime.datetime.now().date()
-    current_date = today
-    last_loop_mono = time.monotonic()
-    last_commit_mono = time.monotonic() # Track for batching
+    current_date = clock.now().date()
+    last_loop_mono = clock.monotonic()
+    last_batch_mono = last_loop_mono
     
     # Efficiency counters
     gc_throttle_ticks = 0
 
-    def reset_session(new_info: dict | None):
+    def flush_daily_stats():
+        nonlocal last_batch_mono
+        last_batch_mono = clock.monotonic()
+        try:
+            daily_accumulator.flush()
+        except Exception as e:
+            print(f"[Logger] daily_stats flush error: {e}")
+
+    def reset_session(new_info: dict | None, extend: SessionState | None = None):
         nonlocal session
         global _current_session_start_mono
         session = SessionState(new_info) if new_info else None
-        _current_session_start_mono = session.wall_start if session else None
-        input_tracker.get_and_reset_counts()  # discard stale counts
-
-    try:
-        while not shutdown_event.is_set():
-            # ---- sleep guard ----
-            if sleep_manager.is_sleeping:
-                last_loop_mono = time.monotonic()
-                time.sleep(POLL_INTERVAL)
-                continue
-
-            now_mono = time.monotonic()
-            delta    = now_mono - last_loop_mono
-            last_loop_mono = now_mono
-
-            # ---- resume / large-gap guard ----
-            if delta > SLEEP_DELTA_THRESHOLD:
-                if session:
-                    flush_session(session, cursor)
-                    conn.commit()
-                reset_session(None)
-                time.sleep(POLL_INTERVAL)
-                continue
-
-            # ---- midnight rollover ----
-            if today != current_date:
-                if session:
-                    flush_session(session, cursor)
-                conn.commit()
-                last_commit_mono = time.monotonic()
-                current_date = today
-                reset_session(None)
-
-            # ---- get current window ----
-            info = get_active_window_info()
-
-            # ---- determine idle state ----
-            idle_detection_enabled = settings_cache.get("idle_detection", "true") in ("true", "1")
-            idle_secs = input_tracker.get_idle_seconds() if idle_detection_enabled else 0
-            media_playing = is_media_active(info)
+        if session and extend:
+            session.extend(extend)
+        _current_session_start_mono = session.row_start_mono if session else None
+        backend.get_and_reset_counts()  # discard stale counts
+
+    # Keep one pooled connection checked out for the logger's lifetime;
+    # every flush_session() transaction re-uses it.
+    with db.connection():
+        try:
+            while not shutdown_event.is_set():
+                # ---- sleep guard ----
+                if backend.is_sleeping():
+                    last_loop_mono = clock.monotonic()
+                    clock.sleep(POLL_INTERVAL)
+                    continue
+
+                now_mono = clock.monotonic()
+                delta    = now_mono - last_loop_mono
+                last_loop_mono = now_mono
+
+                # ---- resume / large-gap guard ----
+                if delta > SLEEP_DELTA_THRESHOLD:
+                    if session:
+                        # End it at the last tick before the gap
+                        flush_session(session, ended_mono=now_mono - delta)
+                    reset_session(None)
+                    clock.sleep(POLL_INTERVAL)
+                    continue
+
+                # ---- midnight rollover ----
+                today = clock.now().date()
+                if today != current_date:
+                    if session:
+                        flush_session(session)
+                    flush_daily_stats()
+                    current_date = today
+                    reset_session(None)
+
+                # ---- live "today" aggregate: (re)load once per day ----
+                if today_stats.day != current_date.isoformat():
+                    try:
+                        today_stats.load(current_date.isoformat())
+                    except Exception as e:
+                        print(f"[Logger] today aggregate load error: {e}")
+
+                # ---- buffered daily_stats ----
+                if now_mono - last_batch_mono >= BATCH_COMMIT_INTERVAL:
+                    flush_daily_stats()
+
+                # ---- get current window ----
+                info = backend.get_active_window_info()
+
+                # ---- determine idle state ----
+                idle_detection_enabled = settings_cache.get("idle_detection", "true") in ("true", "1")
+                idle_secs = backend.get_idle_seconds() if idle_detection_enabled else 0
+                media_playing = is_media_active(info)
             
-            # User is idle if: there's a window, no input for threshold, and no media
-            currently_idle = (
-                idle_detection_enabled
-                and info is not None
-                and idle_secs > IDLE_THRESHOLD
-                and not media_playing
-            )
-
-            from src.config.ignored_apps_manager import is_ignored
-
-            if info is None:
-                # No foreground window (lock screen, UAC prompt, etc.)
-                if session:
-                    flush_session(session, cursor)
-                    conn.commit()
-                reset_session(None)
+                # User is idle if: there's a window, no input for threshold, and no media
+                currently_idle = (
+                    idle_detection_enabled
+                    and info is not None
+                    and idle_secs > IDLE_THRESHOLD
+                    and not media_playing
+                )
+
+                from src.config.ignored_apps_manager import is_ignored
+
+                if info is None:
+                    # No foreground window (lock screen, UAC prompt, etc.)
+                    if session:
+                        flush_session(session)
+                    reset_session(None)
+
+                elif is_ignored(info.get("app_name")):
+                    # App is in the ignored list — treat as "no window" to skip tracking
+                    if session:
+                        flush_session(session)
+                    reset_session(None)
+
+                elif session is None:
+                    # First window seen (that isn't ignored) — start tracking
+                    reset_session(info)
 
-            elif is_ignored(info.get("app_name")):
-                # App is in the ignored list — treat as "no window" to skip tracking
-                if session:
-                    flush_session(session, cursor)
-                    conn.commit()
-                reset_session(None)
-
-            elif session is None:
-                # First window seen (that isn't ignored) — start tracking
-                reset_session(info)
-
-            elif session.check_tab_switch(info):
-                # Stable tab/window switch confirmed after debounce —
-                # flush the completed session and start a new one.
-                flush_session(session, cursor)
-                # Note: No immediate conn.commit() here anymore -> Batching
-                reset_session(info)
-
-            else:
-                # Same session — update idle accounting
-                session.tick_idle(currently_idle, idle_secs)
-                
-                # Periodic flush to keep DB fresh even without window switch
-                if time.monotonic() - session.wall_start > PERIODIC_FLUSH_INTERVAL:
-                    flush_session(session, cursor)
+                elif session.check_tab_switch(info):
+                    # Stable tab/window switch confirmed after debounce —
+                    # flush the completed session and start a new one.
+                    flush_session(session)
                     reset_session(info)
 
-            # ---- Database Batching Commit ----
-            if time.monotonic() - last_commit_mono > BATCH_COMMIT_INTERVAL:
-                conn.commit()
-                last_commit_mono = time.monotonic()
-
-            # ---- Periodic Efficiency Logic ----
-            # 1. Periodic Garbage Collection (every ~1 hour)
-            gc_throttle_ticks += 1
-            if gc_throttle_ticks >= 3600:
-                gc.collect()
-                gc_throttle_ticks = 0
-
-            # 2. Adaptive Polling: if we are deeply idle, sleep longer to save CPU/RAM cycles
-            if currently_idle and idle_secs > 600: # 10 minutes of deep idle
-                time.sleep(min(delta * 5, 5))   # Cap at 5s between checks
-            else:
-                time.sleep(POLL_INTERVAL)
-
-    except KeyboardInterrupt:
-        print("[Logger] Stopping...")
-    except Exception as e:
-        print(f"[Logger] Fatal error: {e}")
-    finally:
-        url_resolver.stop()
-        if session:
-            flush_session(session, cursor)
-        try:
-            conn.commit()
-            conn.close()
-        except Exception:
-            pass
\ No newline at end of file
+                else:
+                    # Same session — update idle accounting
+                    session.tick_idle(currently_idle, idle_secs)
+                
+                    # Periodic flush to keep DB fresh even without window switch;
+                    # the next interval keeps extending the same row
+                    if clock.monotonic() - session.wall_start > PERIODIC_FLUSH_INTERVAL:
+                        flush_session(session)
+                        reset_session(info, extend=session)
+
+                # ---- publish the unflushed session to the API ----
+                if session:
+                    live_active, live_idle = session.finalize()
+                    live_keys, live_clicks = backend.peek_counts()
+                    main_cat, sub_cat = session.category()
+                    today_stats.set_live(
+                        session.info["app_name"], main_cat, sub_cat,
+                        live_active, live_idle, live_keys, live_clicks,
+                        session.row_id if session.row_day == current_date.isoformat() else None,
+                        session.row_started_at, clock.now(),
+                        url=session.info.get("url")
+                    )
+                else:
+                    today_stats.clear_live()
+
+                # ---- Periodic Efficiency Logic ----
+                # 1. Periodic Garbage Collection (every ~1 hour)
+                gc_throttle_ticks += 1
+                if gc_throttle_ticks >= 3600:
+                    gc.collect()
+                    gc_throttle_ticks = 0
+
+                # 2. Adaptive Polling: if we are deeply idle, sleep longer to save CPU/RAM cycles
+                if currently_idle and idle_secs > 600: # 10 minutes of deep idle
+                    clock.sleep(min(delta * 5, 5))   # Cap at 5s between checks
+                else:
+                    clock.sleep(POLL_INTERVAL)
+
+        except KeyboardInterrupt:
+            print("[Logger] Stopping...")
+        except Exception as e:
+            print(f"[Logger] Fatal error: {e}")
+        finally:
+            backend.stop()
+            if session:
+                flush_session(session)
+            flush_daily_stats()
\ No newline at end of file
@@ -1,10 +1,15 @@
+import threading
 import time
+from datetime import datetime, timedelta
 
 from src.database.database import (
-    get_auto_delete_days,
-    delete_activity_older_than
+    get_retention_policy,
+    apply_retention_policy,
+    incremental_vacuum
 )
 
+from src.analytics.data_version import data_versions
+from src.analytics.focus_score import persist_finished_days
 from src.utils.logger import setup_logger
 from src.core.shutdown import shutdown_event
 
@@ -14,25 +19,178 @@ logger = setup_logger()
 RETENTION_CHECK_INTERVAL = 6 * 3600
 
 
+class RetentionJob:
+    """
+    One retention pass: archiving closed raw months (when enabled), per-tier
+    downsampling and chunked deletes, then incremental vacuum.
+
+    Tracks progress (months archived, days downsampled, rows deleted per
+    table, archive files deleted, bytes reclaimed) for GET /api/settings/data-retention/status. Only one pass
+    runs at a time; the background worker and the manual cleanup endpoint
+    share it.
+    """
+
+    _ACTIVE = ("archiving", "downsampling", "deleting", "vacuuming")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._status = {"state": "idle"}
+
+    # ------------------------------------------------------------------
+    def status(self) -> dict:
+        with self._lock:
+            snapshot = dict(self._status)
+            for key in ("policy", "cutoff_dates", "months_archived", "days_downsampled", "rows_deleted"):
+                if key in snapshot:
+                    snapshot[key] = dict(snapshot[key])
+        return snapshot
+
+    def start(self, policy: dict) -> bool:
+        """Run a pass on a background thread. Returns False if one is already running."""
+        with self._lock:
+            if self._status["state"] in self._ACTIVE:
+                return False
+            self._begin(policy)
+            self._thread = threading.Thread(
+                target=self._run, args=(policy,), daemon=True, name="RetentionCleanup"
+            )
+            self._thread.start()
+        return True
+
+    def run(self, policy: dict) -> dict:
+        """Run a pass on the calling thread and return the final status."""
+        with self._lock:
+            busy = self._status["state"] in self._ACTIVE
+            if not busy:
+                self._begin(policy)
+        if not busy:
+            self._run(policy)
+        return self.status()
+
+    # ------------------------------------------------------------------
+    def _begin(self, policy: dict):
+        # Caller holds self._lock
+        now = datetime.now()
+        self._status = {
+            "state": "archiving" if policy.get("archive_raw") else "downsampling",
+            "policy": dict(policy),
+            "cutoff_dates": {
+                tier: None if policy.get(f"{tier}_days") is None
+                else (now - timedelta(days=policy[f"{tier}_days"])).strftime("%Y-%m-%d")
+                for tier in ("raw", "hourly", "daily")
+            },
+            "started_at": now.isoformat(timespec="seconds"),
+            "finished_at": None,
+            "duration_seconds": None,
+            "current_table": None,
+            "months_archived": {},
+            "days_downsampled": {},
+            "rows_deleted": {},
+            "total_rows_deleted": 0,
+            "archive_files_deleted": 0,
+            "bytes_reclaimed": 0,
+            "free_pages": None,
+            "error": None,
+        }
+
+    def _on_archive_progress(self, month: str, rows: int):
+        with self._lock:
+            self._status["state"] = "archiving"
+            self._status["months_archived"][month] = rows
+
+    def _on_downsample_progress(self, tier: str, days: int):
+        with self._lock:
+            self._status["state"] = "downsampling"
+            self._status["current_table"] = None
+            self._status["days_downsampled"][tier] = days
+
+    def _on_delete_progress(self, table: str, rows: int):
+        with self._lock:
+            self._status["state"] = "deleting"
+            self._status["current_table"] = table
+            self._status["rows_deleted"][table] = rows
+            self._status["total_rows_deleted"] = sum(self._status["rows_deleted"].values())
+
+    def _on_days_changed(self, days: list[str]):
+        # Those days now read from a coarser tier, or not at all
+        for day in days:
+            data_versions.bump(day)
+
+    def _on_vacuum_progress(self, reclaimed: int, free_pages: int):
+        with self._lock:
+            self._status["bytes_reclaimed"] = reclaimed
+            self._status["free_pages"] = free_pages
+
+    def _run(self, policy: dict):
+        started = time.monotonic()
+        try:
+            # Focus scores need the raw session order; keep them exact past the prune
+            with self._lock:
+                raw_cutoff = self._status["cutoff_dates"].get("raw")
+            if raw_cutoff:
+                persist_finished_days(raw_cutoff)
+
+            deleted, archive_files = apply_retention_policy(
+                policy,
+                on_progress=self._on_delete_progress,
+                on_downsample=self._on_downsample_progress,
+                on_archive=self._on_archive_progress,
+                on_days_changed=self._on_days_changed,
+                should_stop=shutdown_event.is_set,
+            )
+            with self._lock:
+                self._status["rows_deleted"] = deleted
+                self._status["total_rows_deleted"] = sum(deleted.values())
+                self._status["archive_files_deleted"] = archive_files
+                self._status["current_table"] = None
+                self._status["state"] = "vacuuming"
+
+            reclaimed = incremental_vacuum(
+                on_progress=self._on_vacuum_progress,
+                should_stop=shutdown_event.is_set,
+            )
+            with self._lock:
+                self._status["bytes_reclaimed"] = reclaimed
+                self._status["state"] = "done"
+
+            logger.info(
+                f"Retention cleanup (raw {policy.get('raw_days')}d, hourly {policy.get('hourly_days')}d, "
+                f"daily {policy.get('daily_days')}d): "
+                f"{sum(deleted.values())} rows deleted, {reclaimed} bytes reclaimed"
+            )
+        except Exception as e:
+            logger.exception("Retention cleanup failed")
+            with self._lock:
+                self._status["state"] = "error"
+                self._status["error"] = str(e)
+        finally:
+            with self._lock:
+                self._status["finished_at"] = datetime.now().isoformat(timespec="seconds")
+                self._status["duration_seconds"] = round(time.monotonic() - started, 2)
+
+
+retention_job = RetentionJob()
+
+
 def retention_worker():
     """
-    Background worker that periodically deletes
-    activity data older than the configured retention period.
+    Background worker that periodically downsamples and deletes
+    activity data older than each tier's retention period.
     """
 
     logger.info("Data retention worker started")
 
     while not shutdown_event.is_set():
         try:
-            days = get_auto_delete_days()
+            policy = get_retention_policy()
 
-            if days is None:
+            if policy["raw_days"] is None:
                 logger.debug("Retention disabled (forever)")
             else:
-                delete_activity_older_than(days)
-                logger.info(f"Retention cleanup executed (>{days} days)")
+                retention_job.run(policy)
 
         except Exception:
             logger.exception("Retention cleanup failed")
 
-        shutdown_event.wait(RETENTION_CHECK_INTERVAL)
\ No newline at end of file
+        shutdown_event.wait(RETENTION_CHECK_INTERVAL)
@@ -186,30 +186,26 @@ class DesktopNotifier:
 
         # Best-effort focus-session detection from optional schema variants.
         try:
-            from src.database.database import get_connection
-
-            conn = get_connection()
-            cursor = conn.cursor()
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='focus_sessions'")
-            if cursor.fetchone():
-                cursor.execute("PRAGMA table_info(focus_sessions)")
-                cols = {row[1] for row in cursor.fetchall()}
-                if "is_active" in cols:
-                    cursor.execute("SELECT 1 FROM focus_sessions WHERE is_active = 1 LIMIT 1")
-                    if cursor.fetchone():
-                        conn.close()
-                        return True
-                elif "end_time" in cols:
-                    cursor.execute("SELECT 1 FROM focus_sessions WHERE (end_time IS NULL OR end_time = '') LIMIT 1")
-                    if cursor.fetchone():
-                        conn.close()
-                        return True
-                elif "ended_at" in cols:
-                    cursor.execute("SELECT 1 FROM focus_sessions WHERE (ended_at IS NULL OR ended_at = '') LIMIT 1")
-                    if cursor.fetchone():
-                        conn.close()
-                        return True
-            conn.close()
+            from src.database.database import db
+
+            with db.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='focus_sessions'")
+                if cursor.fetchone():
+                    cursor.execute("PRAGMA table_info(focus_sessions)")
+                    cols = {row[1] for row in cursor.fetchall()}
+                    if "is_active" in cols:
+                        cursor.execute("SELECT 1 FROM focus_sessions WHERE is_active = 1 LIMIT 1")
+                        if cursor.fetchone():
+                            return True
+                    elif "end_time" in cols:
+                        cursor.execute("SELECT 1 FROM focus_sessions WHERE (end_time IS NULL OR end_time = '') LIMIT 1")
+                        if cursor.fetchone():
+                            return True
+                    elif "ended_at" in cols:
+                        cursor.execute("SELECT 1 FROM focus_sessions WHERE (ended_at IS NULL OR ended_at = '') LIMIT 1")
+                        if cursor.fetchone():
+                            return True
         except Exception:
             pass
 
@@ -30,7 +30,7 @@ from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 from src.core.shutdown import shutdown_event
 from src.config.storage import get_data_dir
-from src.database.database import get_connection
+from src.database.database import db
 from src.utils.logger import setup_logger
 
 logger = setup_logger()
@@ -118,21 +118,20 @@ class _ActivityHandler(FileSystemEventHandler):
         if not batch:
             return
         try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            cursor.executemany(
-                "INSERT INTO file_logs (timestamp, action, file_path) VALUES (?, ?, ?)",
-                batch,
-            )
-            conn.commit()
-            conn.close()
+            with db.transaction() as conn:
+                conn.executemany(
+                    "INSERT INTO file_logs (timestamp, action, file_path) VALUES (?, ?, ?)",
+                    batch,
+                )
         except Exception as exc:
             logger.error("File DB batch insert error: %s", exc)
 
     def _flush_loop(self):
-        while not self._stop.is_set():
-            self._stop.wait(self._FLUSH_INTERVAL)
-            self._flush_pending()
+        # Hold one pooled connection for the lifetime of the flusher thread
+        with db.connection():
+            while not self._stop.is_set():
+                self._stop.wait(self._FLUSH_INTERVAL)
+                self._flush_pending()
 
     def on_created(self, event):
         if not event.is_directory and not self._should_ignore(event.src_path):
@@ -0,0 +1,146 @@
+"""
+platform
+────────
+Everything the activity logger needs from the operating system, behind one
+interface so the tick loop can run without Windows.
+
+  PlatformBackend     foreground window, idle time, input counts, media
+                      playback, sleep/resume and the clock the loop runs on
+  win32.Win32Backend  the real thing (win32gui, pynput, GetLastInputInfo,
+                      SMTC, WM_POWERBROADCAST) — the default on Windows
+  replay.ReplayBackend
+                      plays a recorded JSONL trace on a virtual clock, for
+                      headless benchmarks and regression runs on any OS
+
+The logger never calls time.time() / time.monotonic() / datetime.now() /
+time.sleep() directly; it goes through ``clock``, which follows the active
+backend, so a replay can run a day of activity in a couple of minutes.
+
+Usage
+-----
+  from src.core.platform import get_backend, set_backend, clock
+
+  backend = get_backend()          # Win32Backend unless one was set
+  info = backend.get_active_window_info()
+  clock.sleep(1)
+"""
+
+import datetime
+import os
+import sys
+import time
+
+
+class Clock:
+    """Real wall-clock and monotonic time."""
+
+    def time(self) -> float:
+        return time.time()
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def now(self) -> datetime.datetime:
+        return datetime.datetime.now()
+
+    def sleep(self, seconds: float):
+        time.sleep(seconds)
+
+
+class PlatformBackend:
+    """
+    Interface between the logger loop and the OS. Subclasses override
+    every method; the defaults describe "no window, never idle, no input".
+    """
+
+    name = "none"
+    clock = Clock()
+
+    # ------------------------------------------------------------------
+    def start(self):
+        """Start listeners / background threads. Called by start_logging()."""
+
+    def stop(self):
+        """Stop whatever start() started. Safe to call more than once."""
+
+    # ------------------------------------------------------------------
+    def get_active_window_info(self) -> dict | None:
+        """
+        The foreground window as
+        {"app_name", "pid", "title", "url", "exe_path", "is_fullscreen"},
+        or None when there is none worth tracking (lock screen, UAC, ...).
+        """
+        return None
+
+    def get_idle_seconds(self) -> float:
+        """Seconds since the last real keyboard / mouse input."""
+        return 0.0
+
+    def peek_counts(self) -> tuple[int, int]:
+        """(keystrokes, clicks) since the last reset."""
+        return 0, 0
+
+    def get_and_reset_counts(self) -> tuple[int, int]:
+        """(keystrokes, clicks) since the last reset, then reset."""
+        return 0, 0
+
+    # ------------------------------------------------------------------
+    def is_media_available(self) -> bool:
+        """False when the backend cannot tell whether media is playing."""
+        return False
+
+    def is_app_playing(self, app_name: str) -> bool:
+        """True if `app_name` itself (e.g. 'chrome.exe') is playing media."""
+        return False
+
+    def is_sleeping(self) -> bool:
+        """True between a suspend notification and the matching resume."""
+        return False
+
+
+# ==========================================================
+# Active backend
+# ==========================================================
+
+_backend: PlatformBackend | None = None
+
+
+def set_backend(backend: PlatformBackend):
+    """Install the backend the logger uses. Call before start_logging()."""
+    global _backend
+    _backend = backend
+
+
+def get_backend() -> PlatformBackend:
+    """
+    The active backend; the Win32 one is created on first use on Windows,
+    wrapped in a TraceRecorder when STASIS_RECORD_TRACE names a file.
+    """
+    global _backend
+    if _backend is None:
+        if sys.platform != "win32":
+            raise RuntimeError(
+                f"No platform backend for {sys.platform}; "
+                "install one with set_backend() (e.g. replay.ReplayBackend)"
+            )
+        from src.core.platform.win32 import Win32Backend
+        backend = Win32Backend()
+        trace_path = os.environ.get("STASIS_RECORD_TRACE")
+        if trace_path:
+            from src.core.platform.replay import TraceRecorder
+            backend = TraceRecorder(backend, trace_path)
+        _backend = backend
+    return _backend
+
+
+class _ActiveClock:
+    """Forwards to the active backend's clock (real time until one is set)."""
+
+    _real = Clock()
+
+    def __getattr__(self, name):
+        source = _backend.clock if _backend is not None else self._real
+        return getattr(source, name)
+
+
+clock = _ActiveClock()
@@ -0,0 +1,327 @@
+"""
+replay.py
+─────────
+Run the logger loop from a recorded trace instead of the live desktop.
+
+A trace is JSONL. An optional first line is a header; every other line is a
+sample taken `t` seconds after the trace started:
+
+  {"trace": 1, "start": 1760000000.0}
+  {"t": 0,   "window": {"app_name": "code.exe", "pid": 4120, "title": "main.py",
+                        "url": "N/A", "exe_path": "C:/.../Code.exe"}, "idle": 0}
+  {"t": 4,   "keys": 12, "clicks": 1}
+  {"t": 95,  "window": {"app_name": "chrome.exe", ...}, "media": ["chrome.exe"]}
+  {"t": 400, "window": null}
+  {"t": 900, "sleeping": true}
+
+Samples only list what changed; everything else carries over.
+  window    the foreground window (null = none)
+  idle      seconds since the last input at time t; keeps growing until
+            the next sample that sets it (keys/clicks alone reset it to 0)
+  keys      keystrokes since the previous sample
+  clicks    mouse clicks since the previous sample
+  media     apps playing media (SMTC), e.g. ["chrome.exe"]
+  sleeping  true between the suspend and resume power notifications
+  suspend   the process was frozen from t until the next sample; the
+            virtual clock jumps straight there, as a real clock would
+
+``ReplayBackend`` plays the samples on a ``VirtualClock``: the loop's
+``clock.sleep(1)`` advances virtual time by one second and really sleeps
+1/speed of it (speed=0 never sleeps). When the clock passes the last sample
+the backend calls `on_end` — by default setting shutdown_event, so
+start_logging() flushes and returns.
+
+``TraceRecorder`` wraps a live backend and writes such a trace, one sample
+per change; set STASIS_RECORD_TRACE=<path> to record with the Win32 backend.
+
+Usage
+-----
+  from src.core.platform import set_backend
+  from src.core.platform.replay import ReplayBackend
+
+  set_backend(ReplayBackend("trace.jsonl", speed=1000))
+  start_logging()          # returns when the trace ends
+"""
+
+import datetime
+import json
+import threading
+import time
+
+from src.core.platform import Clock, PlatformBackend, clock
+from src.core.shutdown import shutdown_event
+
+TRACE_FORMAT = 1
+DEFAULT_SPEED = 1000.0
+
+# A longer gap between two logger ticks is recorded as a suspend
+RECORD_GAP_SECONDS = 10
+
+
+def load_trace(path: str) -> tuple[dict, list[dict]]:
+    """(header, samples) from a JSONL trace; samples sorted by `t`."""
+    header, samples = {}, []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if "trace" in record:
+                header = record
+            else:
+                samples.append(record)
+    samples.sort(key=lambda s: s["t"])
+    return header, samples
+
+
+# ==========================================================
+# Virtual time
+# ==========================================================
+
+class VirtualClock(Clock):
+    """
+    Starts at `start` (epoch seconds) and only moves when sleep() is called.
+    `on_advance(elapsed)` runs after every step so the backend can apply the
+    samples that became due.
+    """
+
+    def __init__(self, start: float, speed: float = DEFAULT_SPEED, on_advance=None):
+        self.start = start
+        self.speed = speed
+        self.elapsed = 0.0
+        self._on_advance = on_advance
+
+    def time(self) -> float:
+        return self.start + self.elapsed
+
+    def monotonic(self) -> float:
+        return self.elapsed
+
+    def now(self) -> datetime.datetime:
+        return datetime.datetime.fromtimestamp(self.time())
+
+    def sleep(self, seconds: float):
+        seconds = max(0.0, seconds)
+        if self.speed:
+            time.sleep(seconds / self.speed)
+        self.elapsed += seconds
+        if self._on_advance:
+            self._on_advance(self.elapsed)
+
+
+# ==========================================================
+# Replay
+# ==========================================================
+
+class ReplayBackend(PlatformBackend):
+    name = "replay"
+
+    def __init__(self, trace, speed: float = DEFAULT_SPEED, start: float | None = None, on_end=None):
+        """
+        `trace` is a path or a (header, samples) pair from load_trace().
+        `start` overrides the header's start epoch (default: the header's,
+        else now).
+        """
+        header, samples = load_trace(trace) if isinstance(trace, str) else trace
+        if start is None:
+            start = header.get("start", time.time())
+
+        self.samples = samples
+        self.clock = VirtualClock(start, speed, on_advance=self._advance)
+        self._on_end = on_end or shutdown_event.set
+        self._lock = threading.Lock()
+        self._next = 0
+        self._ended = False
+
+        self._window: dict | None = None
+        self._idle_at = 0.0          # idle seconds as of _idle_t
+        self._idle_t = 0.0
+        self._keys = 0
+        self._clicks = 0
+        self._media: set[str] = set()
+        self._sleeping = False
+        self._suspended = False
+
+        self._advance(0.0)
+
+    # ------------------------------------------------------------------
+    def _apply(self, sample: dict):
+        t = sample["t"]
+        if "window" in sample:
+            self._window = dict(sample["window"]) if sample["window"] else None
+            if self._window is not None:
+                self._window.setdefault("url", "N/A")
+                self._window.setdefault("exe_path", None)
+                self._window.setdefault("is_fullscreen", False)
+        keys, clicks = sample.get("keys", 0), sample.get("clicks", 0)
+        self._keys += keys
+        self._clicks += clicks
+        if "idle" in sample:
+            self._idle_at, self._idle_t = float(sample["idle"]), t
+        elif keys or clicks:
+            self._idle_at, self._idle_t = 0.0, t
+        if "media" in sample:
+            self._media = {name.lower().replace(".exe", "") for name in sample["media"] or ()}
+        if "sleeping" in sample:
+            self._sleeping = bool(sample["sleeping"])
+        self._suspended = bool(sample.get("suspend"))
+
+    def _advance(self, elapsed: float):
+        with self._lock:
+            while self._next < len(self.samples) and self.samples[self._next]["t"] <= elapsed:
+                self._apply(self.samples[self._next])
+                self._next += 1
+                if self._suspended and self._next < len(self.samples):
+                    # Frozen until the next sample: no ticks in between
+                    elapsed = max(elapsed, self.samples[self._next]["t"])
+                    self.clock.elapsed = elapsed
+            finished = (
+                not self._ended
+                and self._next >= len(self.samples)
+                and elapsed > (self.samples[-1]["t"] if self.samples else 0)
+            )
+            if finished:
+                self._ended = True
+        if finished:
+            self._on_end()
+
+    @property
+    def finished(self) -> bool:
+        return self._ended
+
+    # ------------------------------------------------------------------
+    def get_active_window_info(self) -> dict | None:
+        with self._lock:
+            return dict(self._window) if self._window else None
+
+    def get_idle_seconds(self) -> float:
+        with self._lock:
+            return self._idle_at + max(0.0, self.clock.elapsed - self._idle_t)
+
+    def peek_counts(self) -> tuple[int, int]:
+        with self._lock:
+            return self._keys, self._clicks
+
+    def get_and_reset_counts(self) -> tuple[int, int]:
+        with self._lock:
+            counts = (self._keys, self._clicks)
+            self._keys = self._clicks = 0
+        return counts
+
+    def is_media_available(self) -> bool:
+        return True
+
+    def is_app_playing(self, app_name: str) -> bool:
+        with self._lock:
+            return app_name.lower().replace(".exe", "") in self._media
+
+    def is_sleeping(self) -> bool:
+        with self._lock:
+            return self._sleeping
+
+
+# ==========================================================
+# Recording
+# ==========================================================
+
+class TraceRecorder(PlatformBackend):
+    """
+    Wraps a live backend and appends a sample to `path` whenever the
+    foreground window, media or sleep state changes, input arrives, or the
+    idle counter restarts. Sampling piggybacks on the logger's once-per-tick
+    get_active_window_info() call.
+    """
+
+    def __init__(self, inner: PlatformBackend, path: str):
+        self.inner = inner
+        self.name = f"{inner.name}+record"
+        self.clock = inner.clock
+        self.path = path
+        self._file = None
+        self._started = None
+        self._last: dict = {}
+        self._last_tick: float | None = None
+        # Input seen by earlier samples (the logger resets the inner counters)
+        self._recorded_keys = 0
+        self._recorded_clicks = 0
+        self._lock = threading.Lock()
+
+    def start(self):
+        self.inner.start()
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "a", encoding="utf-8")
+                self._started = clock.time()
+                self._write({"trace": TRACE_FORMAT, "start": self._started})
+
+    def stop(self):
+        self.inner.stop()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _write(self, record: dict):
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._file.flush()
+
+    def _sample(self, window: dict | None):
+        keys, clicks = self.inner.peek_counts()
+        idle = round(self.inner.get_idle_seconds(), 1)
+        playing = window is not None and self.inner.is_app_playing(window["app_name"])
+        media = [window["app_name"]] if playing else []
+
+        with self._lock:
+            if self._file is None:
+                return
+            t = round(clock.time() - self._started, 3)
+            if self._last_tick is not None and t - self._last_tick > RECORD_GAP_SECONDS:
+                self._write({"t": self._last_tick, "suspend": True})
+            self._last_tick = t
+
+            sample = {"t": t}
+            state = {"window": window, "media": media, "sleeping": self.inner.is_sleeping()}
+            for key, value in state.items():
+                if self._last.get(key, ...) != value:
+                    sample[key] = value
+            if keys - self._recorded_keys > 0:
+                sample["keys"] = keys - self._recorded_keys
+            if clicks - self._recorded_clicks > 0:
+                sample["clicks"] = clicks - self._recorded_clicks
+            self._recorded_keys, self._recorded_clicks = keys, clicks
+            # First sample, or idle restarted without counted input (mouse movement)
+            if "idle" not in self._last or idle < self._last["idle"]:
+                sample["idle"] = idle
+            self._last.update(state, idle=idle)
+            if len(sample) > 1:
+                self._write(sample)
+
+    # ------------------------------------------------------------------
+    def get_active_window_info(self) -> dict | None:
+        window = self.inner.get_active_window_info()
+        self._sample(window)
+        return window
+
+    def get_idle_seconds(self) -> float:
+        return self.inner.get_idle_seconds()
+
+    def peek_counts(self) -> tuple[int, int]:
+        return self.inner.peek_counts()
+
+    def get_and_reset_counts(self) -> tuple[int, int]:
+        counts = self.inner.get_and_reset_counts()
+        with self._lock:
+            # Whatever was not yet recorded is still owed to the next sample
+            self._recorded_keys -= counts[0]
+            self._recorded_clicks -= counts[1]
+        return counts
+
+    def is_media_available(self) -> bool:
+        return self.inner.is_media_available()
+
+    def is_app_playing(self, app_name: str) -> bool:
+        return self.inner.is_app_playing(app_name)
+
+    def is_sleeping(self) -> bool:
+        return self.inner.is_sleeping()
@@ -0,0 +1,406 @@
+"""
+win32.py
+────────
+Windows implementation of the logger's platform backend.
+
+  foreground window   win32gui + process_cache (the shared process table) +
+                      the background URL resolver
+  idle time           GetLastInputInfo (kernel raw-input timestamp)
+  input counts        pynput keyboard / mouse listeners
+  media playback      SMTC via winsdk (optional)
+  sleep / resume      WM_POWERBROADCAST on a hidden message window
+
+Listeners and threads are only created by ``Win32Backend.start()``, so
+importing this module (or the logger) has no side effects.
+"""
+
+import asyncio
+import ctypes
+import ctypes.wintypes
+import importlib
+import threading
+
+import win32con
+import win32gui
+import win32process
+from pynput import mouse, keyboard
+
+from src.core.platform import PlatformBackend
+from src.core.process_cache import process_cache
+from src.core.process_table import process_table
+from src.core.settings_cache import settings_cache
+from src.core.shutdown import shutdown_event
+from src.core.url_sniffer import url_resolver
+
+
+# Browser process names — used to match SMTC source_app_user_model_id
+BROWSER_PROCESSES = {"chrome", "msedge", "brave", "firefox", "opera"}
+
+
+# ===============================
+# SMTC MEDIA SESSION MONITOR
+# ===============================
+class MediaSessionMonitor:
+    """
+    Polls the Windows Global System Media Transport Controls (SMTC) API
+    on a background thread to determine whether any app (especially browsers)
+    is actively playing media.
+
+    Uses winsdk (pip install winsdk) which wraps the WinRT APIs.
+    Falls back to False on import errors so the rest of the app keeps working
+    even if winsdk is not installed.
+
+    Thread-safety: _is_playing is written only from the background asyncio loop
+    and read from the main thread — a boolean assignment is atomic in CPython,
+    so no lock is needed.
+    """
+
+    # Maps WinRT PlaybackStatus integer to a human-readable string
+    _STATUS_PLAYING = 4   # GlobalSystemMediaTransportControlsSessionPlaybackStatus.Playing
+
+    def __init__(self):
+        self._is_playing: bool = False
+        self._playing_sources: dict = {}  # {app_name_lower: bool}
+        self._available: bool = False   # False if winsdk not installed
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock() # Added for thread safety
+        self._start_background_loop()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    @property
+    def is_available(self) -> bool:
+        """False when winsdk is not installed — caller should fall back."""
+        return self._available
+
+    def is_media_playing(self) -> bool:
+        """
+        Returns True if any SMTC session reports PlaybackStatus == Playing.
+        Always False when winsdk is unavailable.
+        """
+        with self._lock:
+            return self._is_playing
+
+    def is_app_playing(self, app_name: str) -> bool:
+        """
+        Returns True ONLY if the specific foreground app has an active
+        SMTC playing session. app_name is the process name e.g. 'chrome.exe'.
+
+        This prevents a background Spotify session from blocking idle
+        detection when the foreground window is a paused YouTube tab.
+        """
+        name_lower = app_name.lower().replace(".exe", "")
+        with self._lock:
+            return self._playing_sources.get(name_lower, False)
+
+    # ------------------------------------------------------------------
+    # Background asyncio loop (runs in a daemon thread)
+    # ------------------------------------------------------------------
+    def _start_background_loop(self):
+        try:
+            # Validate import early so we can set _available correctly
+            importlib.import_module("winsdk.windows.media.control")
+            self._available = True
+        except ImportError:
+            print("[MediaSessionMonitor] winsdk not installed — SMTC unavailable. "
+                  "Run: pip install winsdk")
+            return
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._run_loop, daemon=True, name="SMTCMonitor"
+        )
+        self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._poll_forever())
+        except asyncio.CancelledError:
+            pass
+
+    async def _poll_forever(self):
+        import winsdk.windows.media.control as wmc
+
+        manager = None
+        while not shutdown_event.is_set():
+            try:
+                # Re-acquire manager if needed (e.g. after resume from sleep)
+                if manager is None:
+                    manager = await wmc.GlobalSystemMediaTransportControlsSessionManager.request_async()
+
+                sessions = manager.get_sessions()
+                any_playing     = False
+
+                playing_sources = {}
+                for session in sessions:
+                    pb_info = session.get_playback_info()
+                    if pb_info is None:
+                        continue
+
+                    status = pb_info.playback_status
+                    # PlaybackStatus: 0=Unknown,1=Closed,2=Opened,3=Changing,4=Stopped,5=Playing,6=Paused
+                    is_playing = (int(status) == 5)
+
+                    # source_app_user_model_id looks like "Chrome_Audio",
+                    # "MSEdge", "Spotify.exe", "vlc.exe" etc.
+                    source = (session.source_app_user_model_id or "").lower()
+
+                    # Normalise to bare app name: "chrome_audio" -> "chrome"
+                    # Strip common suffixes so we can match against app_name
+                    for suffix in ("_audio", ".exe"):
+                        source = source.replace(suffix, "")
+
+                    if source:
+                        playing_sources[source] = is_playing
+
+                    if is_playing:
+                        any_playing = True
+
+                with self._lock:
+                    self._is_playing       = any_playing
+                    self._playing_sources  = playing_sources
+
+            except Exception as e:
+                # Manager can fail after sleep/resume; reset so we re-acquire next tick
+                print(f"[MediaSessionMonitor] Poll error: {e}")
+                manager = None
+                with self._lock:
+                    self._is_playing      = False
+                    self._playing_sources = {}
+
+            await asyncio.sleep(2)   # poll every 2 s — plenty for idle detection
+
+
+# ===============================
+# SLEEP MANAGER
+# ===============================
+class SleepManager:
+    def __init__(self):
+        self.is_sleeping = False
+        self._create_message_window()
+
+    def _create_message_window(self):
+        CLASS_NAME = "SleepDetectorWindow"
+        wc = win32gui.WNDCLASS()
+        wc.lpfnWndProc = self._wnd_proc
+        wc.lpszClassName = CLASS_NAME
+
+        try:
+            win32gui.RegisterClass(wc)
+        except Exception:
+            # Error 1410 = class already registered (e.g. hot-reload / second import).
+            # Safe to ignore — CreateWindow still works with the existing class name.
+            pass
+
+        self.hwnd = win32gui.CreateWindow(
+            CLASS_NAME,          # pass the string name, not the atom — always valid
+            "SleepDetector", 0,
+            0, 0, 0, 0, 0, 0, 0, None
+        )
+        threading.Thread(target=self._message_loop, daemon=True).start()
+
+    def _message_loop(self):
+        win32gui.PumpMessages()
+
+    def _wnd_proc(self, hwnd, msg, wparam, lparam):
+        if msg == win32con.WM_POWERBROADCAST:
+            if wparam == win32con.PBT_APMSUSPEND:
+                self.is_sleeping = True
+            elif wparam == win32con.PBT_APMRESUMEAUTOMATIC:
+                self.is_sleeping = False
+        return 1
+
+
+# ===============================
+# WIN32 IDLE TIME
+# ===============================
+class _LASTINPUTINFO(ctypes.Structure):
+    _fields_ = [("cbSize", ctypes.wintypes.UINT),
+                ("dwTime",  ctypes.wintypes.DWORD)]
+
+def _get_win32_idle_seconds() -> float:
+    """
+    Ask Windows directly how long since the last hardware input event
+    (keyboard, mouse move, mouse click, touch, pen).
+
+    This is the same API used by screensavers and power managers.
+    It is immune to software-generated events because it reads from
+    the kernel raw-input timestamp, not from pynput hooks.
+    """
+    lii = _LASTINPUTINFO()
+    lii.cbSize = ctypes.sizeof(_LASTINPUTINFO)
+    if ctypes.windll.user32.GetLastInputInfo(ctypes.byref(lii)):
+        # Both values are milliseconds since boot; subtraction handles
+        # the 49.7-day DWORD rollover safely.
+        elapsed_ms = (ctypes.windll.kernel32.GetTickCount() - lii.dwTime) & 0xFFFFFFFF
+        return elapsed_ms / 1000.0
+    return 0.0
+
+
+# ===============================
+# INPUT TRACKER
+# ===============================
+class InputCounter:
+    """
+    Counts keystrokes and mouse clicks for productivity metrics.
+
+    Idle time comes from Win32 GetLastInputInfo, NOT from pynput.
+    Reason: pynput on_move fires constantly from OS cursor rendering,
+    which would reset idle every frame and prevent detection entirely.
+    Win32 GetLastInputInfo only responds to real hardware events.
+    """
+    def __init__(self):
+        self.kb_count    = 0
+        self.mouse_count = 0
+        self._lock       = threading.Lock()
+
+        self.kb_listener = keyboard.Listener(on_press=self._on_key_press)
+        self.mouse_listener = mouse.Listener(
+            on_click=self._on_mouse_click,
+            # on_move deliberately omitted — kills idle detection
+        )
+        self.kb_listener.start()
+        self.mouse_listener.start()
+
+    def _on_key_press(self, key):
+        with self._lock:
+            self.kb_count += 1
+
+    def _on_mouse_click(self, x, y, button, pressed):
+        if pressed:
+            with self._lock:
+                self.mouse_count += 1
+
+    def get_idle_seconds(self) -> float:
+        """True hardware idle time from the OS kernel."""
+        return _get_win32_idle_seconds()
+
+    def peek_counts(self):
+        """Return (keystrokes, clicks) accumulated since last reset, without resetting."""
+        with self._lock:
+            return self.kb_count, self.mouse_count
+
+    def get_and_reset_counts(self):
+        """Return (keystrokes, clicks) accumulated since last call and reset."""
+        with self._lock:
+            counts = (self.kb_count, self.mouse_count)
+            self.kb_count    = 0
+            self.mouse_count = 0
+        return counts
+
+    def stop(self):
+        """Cleanly stop pynput listeners."""
+        self.kb_listener.stop()
+        self.mouse_listener.stop()
+
+
+# ===============================
+# FOREGROUND WINDOW
+# ===============================
+def is_window_fullscreen(hwnd) -> bool:
+    """
+    Checks if a window is in fullscreen mode by comparing its 
+    dimensions to the primary monitor resolution.
+    """
+    try:
+        from win32api import GetSystemMetrics
+        rect = win32gui.GetWindowRect(hwnd)
+        w = rect[2] - rect[0]
+        h = rect[3] - rect[1]
+        sw = GetSystemMetrics(0)
+        sh = GetSystemMetrics(1)
+        # Covers both exact match and 'borderless' which can be slightly larger
+        return w >= sw and h >= sh
+    except Exception:
+        return False
+
+def get_active_window_info() -> dict | None:
+    try:
+        hwnd = win32gui.GetForegroundWindow()
+        if not hwnd:
+            return None
+        title = win32gui.GetWindowText(hwnd)
+        if not title:
+            return None
+
+        _, pid = win32process.GetWindowThreadProcessId(hwnd)
+        app_name, exe_path = process_cache.get_info(pid)
+        
+        if not app_name:
+            return None
+
+        browser_tracking = settings_cache.get("browser_tracking", "true") in ("true", "1")
+
+        url = "N/A"
+
+        if browser_tracking:
+            try:
+                # Fast path: read cached URL from background resolver (never blocks)
+                detected = url_resolver.get_cached_url(hwnd, app_name)
+                if detected:
+                    url = detected
+            except Exception:
+                pass
+
+        return {
+            "app_name": app_name, 
+            "pid": pid, 
+            "title": title.strip(), 
+            "url": url, 
+            "exe_path": exe_path,
+            "is_fullscreen": is_window_fullscreen(hwnd)
+        }
+    except Exception:
+        return None
+
+
+# ===============================
+# BACKEND
+# ===============================
+class Win32Backend(PlatformBackend):
+    name = "win32"
+
+    def __init__(self):
+        self.input_tracker: InputCounter | None = None
+        self.sleep_manager: SleepManager | None = None
+        self.media_monitor: MediaSessionMonitor | None = None
+
+    def start(self):
+        if self.input_tracker is None:
+            self.input_tracker = InputCounter()
+            self.sleep_manager = SleepManager()
+            self.media_monitor = MediaSessionMonitor()
+        # Background URL resolver so get_active_window_info() never blocks
+        url_resolver.start()
+        # Process snapshot behind process_cache (shared with the blocking service)
+        process_table.start()
+
+    def stop(self):
+        url_resolver.stop()
+        if self.input_tracker is not None:
+            self.input_tracker.stop()
+
+    # ------------------------------------------------------------------
+    def get_active_window_info(self) -> dict | None:
+        return get_active_window_info()
+
+    def get_idle_seconds(self) -> float:
+        return _get_win32_idle_seconds()
+
+    def peek_counts(self) -> tuple[int, int]:
+        return self.input_tracker.peek_counts() if self.input_tracker else (0, 0)
+
+    def get_and_reset_counts(self) -> tuple[int, int]:
+        return self.input_tracker.get_and_reset_counts() if self.input_tracker else (0, 0)
+
+    def is_media_available(self) -> bool:
+        return self.media_monitor is not None and self.media_monitor.is_available
+
+    def is_app_playing(self, app_name: str) -> bool:
+        return self.media_monitor is not None and self.media_monitor.is_app_playing(app_name)
+
+    def is_sleeping(self) -> bool:
+        return self.sleep_manager is not None and self.sleep_manager.is_sleeping
@@ -0,0 +1,212 @@
+"""
+process_table.py
+────────────────
+One background view of the running processes, shared by the logger and the
+blocking service.
+
+Every SCAN_INTERVAL the table lists the current PIDs (one call) and diffs
+them against its snapshot of pid → (create_time, name, exe):
+
+  gone PIDs     dropped
+  new PIDs      resolved once (create_time / name / exe) and published to
+                subscribers as "started" events
+  everything    left alone — no per-process calls for processes already seen
+
+So the logger's foreground-window lookup (ProcessCache.get_info) is a dict
+read plus one create_time call, and the blocking service's process guard
+reacts to start events instead of walking every process every couple of
+seconds. A PID asked for before the scan has seen it is resolved on the spot
+and still announced by the next scan.
+
+get() / get_info() re-check create_time on every hit, as the ProcessCache
+they replaced did, so a PID reused between scans is never reported with the
+previous process's name and exe: the new process is resolved then and is
+announced by the next scan. find() / select() read the snapshot alone and can
+be up to SCAN_INTERVAL behind; callers that act on a PID from them (the
+guard's kill) re-check create_time themselves.
+
+Usage
+-----
+  from src.core.process_table import process_table
+
+  process_table.subscribe(lambda started: ...)   # list[ProcessInfo]
+  process_table.start()                           # idempotent
+  name, exe = process_table.get_info(pid)
+"""
+
+import threading
+from typing import NamedTuple
+
+import psutil
+
+from src.core.shutdown import shutdown_event
+
+SCAN_INTERVAL = 1.0
+# _create_time() result when the OS won't say
+UNKNOWN = object()
+
+
+class ProcessInfo(NamedTuple):
+    pid: int
+    create_time: float | None
+    name: str | None
+    # None when access to the image path is denied (system processes)
+    exe: str | None
+
+
+def _create_time(pid: int):
+    """create_time of the process holding `pid` now; None if none does, UNKNOWN if it can't be read."""
+    try:
+        return psutil.Process(pid).create_time()
+    except psutil.NoSuchProcess:
+        return None
+    except Exception:
+        return UNKNOWN
+
+
+def _resolve(pid: int) -> ProcessInfo | None:
+    """Metadata for one PID, or None if it has already exited."""
+    try:
+        p = psutil.Process(pid)
+        with p.oneshot():
+            create_time = p.create_time()
+            name = p.name()
+            try:
+                exe = p.exe()
+            except (psutil.AccessDenied, psutil.ZombieProcess):
+                exe = None
+    except psutil.NoSuchProcess:
+        return None
+    except Exception:
+        # Access denied for the basics too — remember the PID so it isn't
+        # retried every scan
+        return ProcessInfo(pid, None, None, None)
+    return ProcessInfo(pid, create_time, name, exe)
+
+
+class ProcessTable:
+    def __init__(self, list_pids=None, resolve=None, create_time=None, interval: float = SCAN_INTERVAL):
+        self._list_pids = list_pids or psutil.pids
+        self._resolve = resolve or _resolve
+        self._create_time = create_time or _create_time
+        self._interval = interval
+        self._lock = threading.Lock()
+        self._table: dict[int, ProcessInfo] = {}
+        # Resolved by get_info() before a scan saw them; announced by the next scan
+        self._early: dict[int, ProcessInfo] = {}
+        self._subscribers: list = []
+        self._thread: threading.Thread | None = None
+        self._running = False
+        self.scans = 0
+
+    # ------------------------------------------------------------------
+    def start(self):
+        """Take the first snapshot and start the scan thread (once)."""
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+        self.scan(announce=False)
+        self._thread = threading.Thread(target=self._loop, daemon=True, name="ProcessTable")
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+
+    def _loop(self):
+        while self._running and not shutdown_event.wait(self._interval):
+            try:
+                self.scan()
+            except Exception as e:
+                print(f"[ProcessTable] Scan failed: {e}")
+
+    def subscribe(self, callback):
+        """`callback(started: list[ProcessInfo])` after every scan that found new processes."""
+        with self._lock:
+            self._subscribers.append(callback)
+
+    # ------------------------------------------------------------------
+    def scan(self, announce: bool = True) -> list[ProcessInfo]:
+        """Diff the PID list against the snapshot; returns the processes that started."""
+        pids = set(self._list_pids())
+
+        with self._lock:
+            known = self._table.keys()
+            new_pids = pids - known
+            gone = known - pids
+            early = {pid: self._early.pop(pid) for pid in new_pids if pid in self._early}
+            self._early.clear()
+
+        started = []
+        for pid in new_pids:
+            info = early.get(pid) or self._resolve(pid)
+            if info is not None:
+                started.append(info)
+
+        with self._lock:
+            for pid in gone:
+                del self._table[pid]
+            for info in started:
+                self._table[info.pid] = info
+            subscribers = list(self._subscribers)
+            self.scans += 1
+
+        started = [info for info in started if info.name]
+        if announce and started:
+            for callback in subscribers:
+                try:
+                    callback(started)
+                except Exception as e:
+                    print(f"[ProcessTable] Subscriber failed: {e}")
+        return started
+
+    # ------------------------------------------------------------------
+    def get(self, pid: int) -> ProcessInfo | None:
+        """
+        Snapshot entry for `pid`, if it still describes the process holding
+        that PID; otherwise (not seen yet, or exited / reused since the last
+        scan) the PID is resolved now.
+        """
+        info = self._table.get(pid) or self._early.get(pid)
+        if info is not None:
+            if info.create_time is None:
+                # Not readable when resolved either; nothing to compare
+                return info
+            current = self._create_time(pid)
+            if current is UNKNOWN or current == info.create_time:
+                return info
+            if current is None:
+                return None
+
+        info = self._resolve(pid)
+        if info is not None:
+            with self._lock:
+                # A reused PID leaves the snapshot so the next scan announces
+                # the new process like any other start
+                self._table.pop(pid, None)
+                self._early[pid] = info
+        return info
+
+    def get_info(self, pid: int) -> tuple[str, str] | tuple[None, None]:
+        """(name, exe) for `pid`, or (None, None) if it's gone or inaccessible."""
+        info = self.get(pid)
+        if info is None or not info.name or not info.exe:
+            return None, None
+        return info.name, info.exe
+
+    def find(self, names) -> list[ProcessInfo]:
+        """Running processes whose name is in `names` (from the snapshot, no OS calls)."""
+        with self._lock:
+            return [info for info in self._table.values() if info.name in names]
+
+    def select(self, predicate) -> list[ProcessInfo]:
+        """Running processes for which `predicate(name)` is true (from the snapshot)."""
+        with self._lock:
+            infos = [info for info in self._table.values() if info.name]
+        return [info for info in infos if predicate(info.name)]
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+
+process_table = ProcessTable()
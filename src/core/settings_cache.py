@@ -1,5 +1,5 @@
 import time
-from src.database.database import get_connection
+from src.database.database import db
 
 CACHE_REFRESH_INTERVAL = 60  # seconds
 
@@ -10,13 +10,8 @@ class SettingsCache:
         self.last_refresh = 0
 
     def refresh(self):
-        conn = get_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT key, value FROM settings")
-        rows = cursor.fetchall()
-
-        conn.close()
+        with db.connection() as conn:
+            rows = conn.execute("SELECT key, value FROM settings").fetchall()
 
         self.cache = {k: v for k, v in rows}
         self.last_refresh = time.monotonic()
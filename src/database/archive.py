@@ -0,0 +1,221 @@
+"""
+archive.py
+──────────
+Cold archive of closed months of raw activity.
+
+When ``retention_archive_raw`` is on, retention exports each closed month of
+activity_facts into its own SQLite file under ``get_data_dir()/archive``
+instead of discarding it, then drops those rows from the hot stasis.db:
+
+  archive/activity-2024-01.db
+      dim_apps / dim_urls / dim_titles   only the strings that month used
+      activity_facts                     same integer columns and ids as hot
+      activity_logs (view)               same definition as the hot view
+
+Rows stay dictionary-encoded (integer keys only) and are clustered by
+(day, id) in a WITHOUT ROWID table, so a day is one contiguous range with
+no separate index. The file is VACUUMed and never written again, so it is
+opened ``immutable=1`` and memory-mapped: no locking, no WAL, and the
+raw-tier SQL from the routes runs against it unchanged.
+
+Usage
+-----
+  from src.database import archive
+
+  archive.export_month(DB_PATH, "2024-01")    # -> rows archived
+  with archive.connection("2024-01-15") as conn:
+      conn.execute("SELECT ... FROM activity_logs WHERE day = ?", ...)
+"""
+
+import os
+import re
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+
+from src.config.storage import get_data_dir
+
+ARCHIVE_DIR = os.path.join(get_data_dir(), "archive")
+
+# Bumped if the archive file layout ever changes
+ARCHIVE_FORMAT = 1
+
+_FILE_RE = re.compile(r"^activity-(\d{4}-\d{2})\.db$")
+
+
+def _path(month: str) -> str:
+    return os.path.join(ARCHIVE_DIR, f"activity-{month}.db")
+
+
+def _next_month(month: str) -> str:
+    year, mon = int(month[:4]), int(month[5:7])
+    return f"{year + mon // 12:04d}-{mon % 12 + 1:02d}"
+
+
+def has_month(month: str) -> bool:
+    """True if `month` (YYYY-MM) has been archived."""
+    return os.path.exists(_path(month))
+
+
+def archived_months() -> list[str]:
+    if not os.path.isdir(ARCHIVE_DIR):
+        return []
+    return sorted(
+        m.group(1) for m in map(_FILE_RE.match, os.listdir(ARCHIVE_DIR)) if m
+    )
+
+
+# ==========================================================
+# Export
+# ==========================================================
+
+def export_month(db_path: str, month: str) -> int:
+    """
+    Copy one month of activity_facts (and the dimension rows it uses) from
+    the hot database into ``archive/activity-<month>.db``.
+
+    The file is built under a temporary name and renamed into place only
+    after its row count has been checked, so a crash never leaves a partial
+    archive that retention would trust. Does not touch the hot database.
+    Returns the number of rows archived.
+    """
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    target = _path(month)
+    tmp = target + ".tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+
+    first_day, end_day = f"{month}-01", f"{_next_month(month)}-01"
+
+    conn = sqlite3.connect(Path(tmp).resolve().as_uri(), uri=True, isolation_level=None)
+    try:
+        conn.execute("ATTACH DATABASE ? AS hot", (Path(db_path).resolve().as_uri() + "?mode=ro",))
+        view_sql = conn.execute(
+            "SELECT sql FROM hot.sqlite_master WHERE type = 'view' AND name = 'activity_logs'"
+        ).fetchone()[0]
+
+        conn.execute("BEGIN")
+        conn.execute("""
+            CREATE TABLE dim_apps (
+                id INTEGER PRIMARY KEY,
+                app_name TEXT NOT NULL,
+                exe_path TEXT NOT NULL DEFAULT ''
+            )
+        """)
+        conn.execute("CREATE TABLE dim_urls (id INTEGER PRIMARY KEY, url TEXT NOT NULL)")
+        conn.execute("CREATE TABLE dim_titles (id INTEGER PRIMARY KEY, title TEXT NOT NULL)")
+        conn.execute("""
+            CREATE TABLE activity_facts (
+                id INTEGER NOT NULL,
+                ts_epoch INTEGER,
+                day TEXT NOT NULL,
+                app_id INTEGER,
+                pid INTEGER,
+                title_id INTEGER,
+                url_id INTEGER,
+                active_seconds INTEGER DEFAULT 0,
+                idle_seconds INTEGER DEFAULT 0,
+                keystrokes INTEGER DEFAULT 0,
+                clicks INTEGER DEFAULT 0,
+                PRIMARY KEY (day, id)
+            ) WITHOUT ROWID
+        """)
+        conn.execute(view_sql)
+
+        rows = conn.execute("""
+            INSERT INTO activity_facts
+            SELECT id, ts_epoch, day, app_id, pid, title_id, url_id,
+                   active_seconds, idle_seconds, keystrokes, clicks
+            FROM hot.activity_facts
+            WHERE day >= ? AND day < ?
+            ORDER BY day, id
+        """, (first_day, end_day)).rowcount
+
+        conn.execute("""
+            INSERT INTO dim_apps
+            SELECT id, app_name, exe_path FROM hot.dim_apps
+            WHERE id IN (SELECT app_id FROM activity_facts)
+        """)
+        conn.execute("""
+            INSERT INTO dim_urls
+            SELECT id, url FROM hot.dim_urls
+            WHERE id IN (SELECT url_id FROM activity_facts)
+        """)
+        conn.execute("""
+            INSERT INTO dim_titles
+            SELECT id, title FROM hot.dim_titles
+            WHERE id IN (SELECT title_id FROM activity_facts)
+        """)
+
+        hot_rows = conn.execute(
+            "SELECT COUNT(*) FROM hot.activity_facts WHERE day >= ? AND day < ?",
+            (first_day, end_day)
+        ).fetchone()[0]
+        if hot_rows != rows:
+            raise RuntimeError(f"archive {month}: copied {rows} rows, hot database has {hot_rows}")
+
+        conn.execute("COMMIT")
+        conn.execute("DETACH DATABASE hot")
+        conn.execute(f"PRAGMA user_version = {ARCHIVE_FORMAT}")
+        conn.execute("VACUUM")
+    except BaseException:
+        conn.close()
+        os.remove(tmp)
+        raise
+    conn.close()
+
+    os.replace(tmp, target)
+    print(f"[Archive] activity-{month}.db: {rows} rows, {os.path.getsize(target) / 1024:.0f} KB")
+    return rows
+
+
+# ==========================================================
+# Read path
+# ==========================================================
+
+@contextmanager
+def connection(day_or_month: str):
+    """
+    Read-only, memory-mapped connection to the archive holding a day
+    (YYYY-MM-DD) or month (YYYY-MM). Raises FileNotFoundError if the month
+    was never archived.
+    """
+    path = _path(day_or_month[:7])
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+
+    conn = sqlite3.connect(Path(path).as_uri() + "?mode=ro&immutable=1", uri=True)
+    try:
+        conn.execute(f"PRAGMA mmap_size = {os.path.getsize(path)}")
+        conn.execute("PRAGMA query_only = ON")
+        yield conn
+    finally:
+        conn.close()
+
+
+# ==========================================================
+# Deletion
+# ==========================================================
+
+def delete_before(cutoff_date: str) -> int:
+    """Remove archives of months that end before `cutoff_date`. Returns files removed."""
+    removed = 0
+    for month in archived_months():
+        if month < cutoff_date[:7]:
+            os.remove(_path(month))
+            removed += 1
+    return removed
+
+
+def delete_all() -> int:
+    return delete_before("9999-12-31")
+
+
+def stats() -> dict:
+    months = archived_months()
+    return {
+        "months": len(months),
+        "first_month": months[0] if months else None,
+        "last_month": months[-1] if months else None,
+        "bytes": sum(os.path.getsize(_path(m)) for m in months),
+    }
@@ -0,0 +1,261 @@
+"""
+connection.py
+─────────────
+Pooled SQLite connection manager.
+
+Every thread that touches the database checks out ONE connection and keeps
+it for as long as it is inside a ``connection()`` / ``transaction()`` block.
+Nested blocks on the same thread re-use the same connection, so a DAO helper
+called from inside a route shares the route's connection instead of opening
+its own. When the outermost block exits the connection goes back to an idle
+pool and is handed to the next thread that asks — PRAGMAs are applied once
+per physical connection, and sqlite3's statement cache keeps the prepared
+statements alive across checkouts.
+
+Long-lived workers (ActivityLogger, LimitMonitor, FileMonitorFlush) simply
+wrap their loop in ``with db.connection():`` and keep their connection for
+their whole lifetime.
+
+Usage
+-----
+  from src.database.database import db
+
+  with db.connection() as conn:          # reads (autocommit)
+      conn.execute("SELECT ...")
+
+  with db.transaction() as conn:         # BEGIN IMMEDIATE ... COMMIT / ROLLBACK
+      conn.execute("UPDATE ...")
+
+Read-only profile
+-----------------
+``ConnectionManager(path, readonly=True)`` opens ``file:...?mode=ro`` URIs
+with ``query_only`` set, a memory-mapped window over the file and a larger
+page cache. API routes read through this profile (``analytics_db``) so
+heavy reports never take — or wait behind — the write lock.
+
+SQL functions
+-------------
+``ConnectionManager(path, functions={"name": fn})`` registers one-argument
+Python functions on every physical connection, so queries can use the same
+normalisation as the Python code (``app_key()``, see ignored_apps_manager).
+"""
+
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=10000",
+)
+
+READ_PRAGMAS = (
+    "PRAGMA query_only=ON",
+    "PRAGMA busy_timeout=10000",
+    "PRAGMA mmap_size=268435456",   # 256 MB memory-mapped reads
+    "PRAGMA cache_size=-32768",     # 32 MB page cache per connection
+    "PRAGMA temp_store=MEMORY",     # sorts / GROUP BY temp b-trees in RAM
+)
+
+
+class ConnectionManager:
+    """
+    Thread-aware pool of long-lived SQLite connections.
+
+    Connections are opened with ``isolation_level=None`` (autocommit) so a
+    plain ``connection()`` block never holds a write lock; writes that must be
+    atomic go through ``transaction()``.
+    """
+
+    def __init__(self, db_path: str, timeout: float = 30, cached_statements: int = 256,
+                 max_connections: int = 32, max_idle: int = 8, readonly: bool = False,
+                 functions: dict | None = None):
+        self.db_path = db_path
+        self.readonly = readonly
+        self._functions = dict(functions or {})
+        self._timeout = timeout
+        self._cached_statements = cached_statements
+        self._max_connections = max_connections
+        self._max_idle = max_idle
+
+        self._local = threading.local()
+        self._cond = threading.Condition()
+        self._idle: list[sqlite3.Connection] = []
+        self._open_count = 0
+
+        self._stats = {
+            "opens": 0,
+            "reuses": 0,
+            "checkouts": 0,
+            "closes": 0,
+            "transactions": 0,
+            "rollbacks": 0,
+            "wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+        }
+
+    # ------------------------------------------------------------------
+    # Physical connections
+    # ------------------------------------------------------------------
+    def _open(self) -> sqlite3.Connection:
+        if self.readonly:
+            target = Path(self.db_path).resolve().as_uri() + "?mode=ro"
+            pragmas = READ_PRAGMAS
+        else:
+            target = self.db_path
+            pragmas = PRAGMAS
+
+        conn = sqlite3.connect(
+            target,
+            timeout=self._timeout,
+            check_same_thread=False,
+            isolation_level=None,
+            cached_statements=self._cached_statements,
+            uri=self.readonly,
+        )
+        for pragma in pragmas:
+            conn.execute(pragma)
+        for name, fn in self._functions.items():
+            conn.create_function(name, 1, fn, deterministic=True)
+        return conn
+
+    def _checkout(self) -> sqlite3.Connection:
+        started = time.perf_counter()
+        with self._cond:
+            while not self._idle and self._open_count >= self._max_connections:
+                self._cond.wait(timeout=1.0)
+            if self._idle:
+                conn = self._idle.pop()
+                self._stats["reuses"] += 1
+            else:
+                conn = None
+                self._open_count += 1
+            self._stats["checkouts"] += 1
+            self._record_wait(time.perf_counter() - started)
+
+        if conn is None:
+            try:
+                conn = self._open()
+            except Exception:
+                with self._cond:
+                    self._open_count -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._stats["opens"] += 1
+        return conn
+
+    def _checkin(self, conn: sqlite3.Connection):
+        # Never pool a connection with a dangling transaction
+        if conn.in_transaction:
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                pass
+
+        with self._cond:
+            if len(self._idle) < self._max_idle:
+                self._idle.append(conn)
+                conn = None
+            else:
+                self._open_count -= 1
+                self._stats["closes"] += 1
+            self._cond.notify()
+
+        if conn is not None:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+    def _record_wait(self, waited: float):
+        # Caller holds self._cond
+        self._stats["wait_seconds"] += waited
+        if waited > self._stats["max_wait_seconds"]:
+            self._stats["max_wait_seconds"] = waited
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    @contextmanager
+    def connection(self):
+        """
+        Yield this thread's connection, checking one out of the pool on the
+        outermost entry and returning it on the outermost exit.
+        """
+        local = self._local
+        if getattr(local, "depth", 0) > 0:
+            local.depth += 1
+            try:
+                yield local.conn
+            finally:
+                local.depth -= 1
+            return
+
+        conn = self._checkout()
+        local.conn = conn
+        local.depth = 1
+        try:
+            yield conn
+        finally:
+            local.depth = 0
+            local.conn = None
+            self._checkin(conn)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Run the block inside ``BEGIN IMMEDIATE`` … ``COMMIT``; rolls back on
+        any exception. Nested transactions on the same thread join the
+        outermost one.
+        """
+        with self.connection() as conn:
+            if conn.in_transaction:
+                yield conn
+                return
+
+            started = time.perf_counter()
+            conn.execute("BEGIN IMMEDIATE")
+            with self._cond:
+                self._stats["transactions"] += 1
+                self._record_wait(time.perf_counter() - started)
+
+            try:
+                yield conn
+            except BaseException:
+                try:
+                    conn.rollback()
+                except sqlite3.Error:
+                    pass
+                with self._cond:
+                    self._stats["rollbacks"] += 1
+                raise
+            else:
+                if conn.in_transaction:
+                    conn.commit()
+
+    def stats(self) -> dict:
+        """Snapshot of pool counters (opens, reuses, wait time, …)."""
+        with self._cond:
+            snapshot = dict(self._stats)
+            snapshot["open_connections"] = self._open_count
+            snapshot["idle_connections"] = len(self._idle)
+        snapshot["wait_seconds"] = round(snapshot["wait_seconds"], 4)
+        snapshot["max_wait_seconds"] = round(snapshot["max_wait_seconds"], 4)
+        return snapshot
+
+    def close_idle(self):
+        """Close every idle connection (used on shutdown / before deleting the DB)."""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._open_count -= len(idle)
+            self._stats["closes"] += len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
@@ -1,301 +1,64 @@
-import sqlite3
 import os
+import time
+from src.config.ignored_apps_manager import app_key
 from src.config.storage import get_data_dir
+from src.database.connection import ConnectionManager
+from src.database.migrations import migrate, get_schema_version
+from src.database.writer import WriteBehindQueue
+from src.database.tiers import get_horizons, advance_horizon, downsample_raw_day, downsample_hourly_day
+from src.database import archive
+from src.analytics.weekly_summary import week_start
 from datetime import datetime, timedelta
 DB_PATH = os.path.join(get_data_dir(), "stasis.db")
 
-def get_connection():
-    conn = sqlite3.connect(
-        DB_PATH,
-        timeout=30,
-        check_same_thread=False,
-        isolation_level=None
-    )
-    conn.execute("PRAGMA journal_mode=WAL")
-    conn.execute("PRAGMA synchronous=NORMAL")
-    conn.execute("PRAGMA busy_timeout=10000")
-    return conn
+# Retention deletes: rows per transaction, pause between transactions, and
+# free pages returned per incremental_vacuum step.
+RETENTION_CHUNK_ROWS = 5_000
+RETENTION_CHUNK_PAUSE = 0.02
+VACUUM_STEP_PAGES = 1_024
 
-def init_db():
-    conn = get_connection()
-    cursor = conn.cursor()
-    # ===============================
-    # RAW ACTIVITY LOGS
-    # ===============================
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS activity_logs (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        timestamp TEXT NOT NULL,
-        app_name TEXT,
-        exe_path TEXT,
-        pid INTEGER,
-        window_title TEXT,
-        url TEXT,
-        active_seconds INTEGER DEFAULT 0,
-        idle_seconds INTEGER DEFAULT 0,
-        keystrokes INTEGER DEFAULT 0,
-        clicks INTEGER DEFAULT 0
-    )
-    """)
-
-    # ===============================
-    # FILE SYSTEM LOGS
-    # ===============================
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS file_logs (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        timestamp TEXT NOT NULL,
-        action TEXT,
-        file_path TEXT
-    )
-    """)
-
-    # ===============================
-    # DAILY AGGREGATED STATS
-    # ===============================
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS daily_stats (
-        date TEXT NOT NULL,
-        app_name TEXT NOT NULL,
-        main_category TEXT NOT NULL DEFAULT 'other',
-        sub_category TEXT,
-        active_seconds INTEGER DEFAULT 0,
-        idle_seconds INTEGER DEFAULT 0,
-        sessions INTEGER DEFAULT 0,
-        keystrokes INTEGER DEFAULT 0,
-        clicks INTEGER DEFAULT 0,
-        PRIMARY KEY (date, app_name, main_category)
-    )
-    """)
-    # ===============================
-    # GLOBAL SETTINGS
-    # ===============================
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS settings (
-        key TEXT PRIMARY KEY,
-        value TEXT
-    )
-    """)
-
-    # ===============================
-    # TELEGRAM SETTINGS
-    # ===============================
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS telegram_settings (
-        key TEXT PRIMARY KEY,
-        value TEXT
-    )
-    """)
+# Days kept by the aggregate tiers unless configured (None = forever). The
+# raw tier follows auto_delete_days; see get_retention_policy().
+DEFAULT_HOURLY_RETENTION_DAYS = 365
+DEFAULT_DAILY_RETENTION_DAYS = None
 
-    # ===============================
-    # MIGRATION: app_settings -> settings & telegram_settings
-    # ===============================
-    try:
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='app_settings'")
-        if cursor.fetchone():
-            # Migrate Telegram settings
-            telegram_keys = [
-                'telegram_enabled', 'telegram_token', 'telegram_chat_id',
-                'telegram_bot_username', 'telegram_recent_commands'
-            ]
-            for key in telegram_keys:
-                cursor.execute("SELECT value FROM app_settings WHERE key = ?", (key,))
-                row = cursor.fetchone()
-                if row:
-                    cursor.execute(
-                        "INSERT OR IGNORE INTO telegram_settings (key, value) VALUES (?, ?)",
-                        (key, row[0])
-                    )
-
-            # Migrate other settings to general settings table
-            general_keys = [
-                'file_logging_enabled', 'file_logging_essential_only',
-                'show_yesterday_comparison', 'hardware_acceleration'
-            ]
-            for key in general_keys:
-                cursor.execute("SELECT value FROM app_settings WHERE key = ?", (key,))
-                row = cursor.fetchone()
-                if row:
-                    cursor.execute(
-                        "INSERT OR IGNORE INTO settings (key, value) VALUES (?, ?)",
-                        (key, row[0])
-                    )
-
-            # Drop the old table
-            cursor.execute("DROP TABLE app_settings")
-    except Exception as e:
-        print(f"Migration error: {e}")
+# Python functions available to every query (see not_ignored())
+SQL_FUNCTIONS = {"app_key": app_key}
 
-    # ── Migration: old daily_stats schema...
-    try:
-        cursor.execute("PRAGMA table_info(daily_stats)")
-        cols = [r[1] for r in cursor.fetchall()]
-        # Check the current PK columns via the index list
-        cursor.execute("PRAGMA index_list(daily_stats)")
-        indexes = cursor.fetchall()
-        pk_cols = []
-        for idx in indexes:
-            if idx[2] == 1:  # unique
-                cursor.execute(f"PRAGMA index_info('{idx[1]}')") 
-                pk_cols = [r[2] for r in cursor.fetchall()]
-                break
-        # If old PK was only (date, app_name) (2 cols) migrate to 3-col PK
-        if set(pk_cols) == {"date", "app_name"}:
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS daily_stats_new (
-                    date TEXT NOT NULL,
-                    app_name TEXT NOT NULL,
-                    main_category TEXT NOT NULL DEFAULT 'other',
-                    sub_category TEXT,
-                    active_seconds INTEGER DEFAULT 0,
-                    idle_seconds INTEGER DEFAULT 0,
-                    sessions INTEGER DEFAULT 0,
-                    keystrokes INTEGER DEFAULT 0,
-                    clicks INTEGER DEFAULT 0,
-                    PRIMARY KEY (date, app_name, main_category)
-                )
-            """)
-            cursor.execute("""
-                INSERT OR IGNORE INTO daily_stats_new
-                    (date, app_name, main_category, sub_category,
-                     active_seconds, idle_seconds, sessions, keystrokes, clicks)
-                SELECT date, app_name,
-                       COALESCE(main_category, 'other'),
-                       sub_category, active_seconds, idle_seconds,
-                       sessions, keystrokes, clicks
-                FROM daily_stats
-            """)
-            cursor.execute("DROP TABLE daily_stats")
-            cursor.execute("ALTER TABLE daily_stats_new RENAME TO daily_stats")
-    except Exception as _mig_err:
-        pass  # migration is best-effort; new installs are already correct
-
-    # ===============================
-    # APP USAGE LIMITS
-    # ===============================
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS app_limits (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        app_name TEXT UNIQUE NOT NULL,
-        daily_limit_seconds INTEGER NOT NULL,
-        is_enabled INTEGER DEFAULT 1,
-        is_blocked INTEGER DEFAULT 0,
-        blocked_at TEXT,
-        created_at TEXT,
-        unblock_until TEXT
-    )
-    """)
+# Shared connection pool — every module goes through this instead of opening
+# its own sqlite3 connection.
+db = ConnectionManager(DB_PATH, functions=SQL_FUNCTIONS)
 
-    # Add unblock_until column if not exists (for backwards compatibility)
-    try:
-        cursor.execute("ALTER TABLE app_limits ADD COLUMN unblock_until TEXT")
-    except sqlite3.OperationalError:
-        pass
+# Read-only profile (mode=ro, query_only, mmap, big page cache) for API
+# routes and reports — see src/database/connection.py.
+analytics_db = ConnectionManager(DB_PATH, readonly=True, functions=SQL_FUNCTIONS)
 
-    # Add blocked-state columns if not present (migration-safe)
-    try:
-        cursor.execute("ALTER TABLE app_limits ADD COLUMN is_blocked INTEGER DEFAULT 0")
-    except sqlite3.OperationalError:
-        pass
-    try:
-        cursor.execute("ALTER TABLE app_limits ADD COLUMN blocked_at TEXT")
-    except sqlite3.OperationalError:
-        pass
+# Single writer thread for small fire-and-forget mutations (settings, goal
+# progress, limit events). Callers get a Future instead of waiting on a lock.
+writer = WriteBehindQueue(db)
 
-    # Add exe_path column to activity_logs if not exists
-    try:
-        cursor.execute("ALTER TABLE activity_logs ADD COLUMN exe_path TEXT")
-    except sqlite3.OperationalError:
-        pass
 
-    # ===============================
-    # BLOCKED APPS
-    # ===============================
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS blocked_apps (
-        app_name TEXT PRIMARY KEY,
-        blocked_at DATETIME DEFAULT CURRENT_TIMESTAMP
-    )
-    """)
-
-    # Backfill legacy blocked_apps state into app_limits.is_blocked once per startup.
-    # This keeps existing user data intact while moving to app_limits as the source of truth.
+def init_db():
+    """Bring the schema up to date (see src/database/migrations.py) and log the cost."""
+    started = time.perf_counter()
+    with db.connection() as conn:
+        try:
+            applied = migrate(conn)
+        except Exception as e:
+            # Leave user_version where it is; the step is retried next start
+            print(f"[DB] Migration failed: {e}")
+            applied = []
+        version = get_schema_version(conn)
+
+    # Mirror ignored_apps.json for the SQL anti-joins (see ignored_apps_manager)
+    from src.config.ignored_apps_manager import sync_ignored_table
     try:
-        cursor.execute("""
-            UPDATE app_limits
-            SET is_blocked = 1,
-                blocked_at = COALESCE(blocked_at, (
-                    SELECT blocked_at
-                    FROM blocked_apps b
-                    WHERE b.app_name = app_limits.app_name
-                ))
-            WHERE app_name IN (SELECT app_name FROM blocked_apps)
-        """)
-    except Exception:
-        pass
-
-    # ===============================
-    # INDEXES (Performance)
-    # ===============================
-
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_activity_time ON activity_logs(timestamp)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_activity_app ON activity_logs(app_name)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_activity_app_date ON activity_logs(app_name, timestamp)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_daily_date ON daily_stats(date)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_daily_active ON daily_stats(active_seconds)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_limit_app ON app_limits(app_name)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_limit_blocked ON app_limits(is_blocked)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_blocked_app ON blocked_apps(app_name)")
-
-    # ===============================
-    # GOALS & TARGETS
-    # ===============================
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS goals (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        goal_type TEXT NOT NULL,
-        label TEXT,
-        target_value REAL NOT NULL,
-        target_unit TEXT NOT NULL DEFAULT 'seconds',
-        direction TEXT NOT NULL DEFAULT 'under',
-        is_active INTEGER DEFAULT 1,
-        created_at TEXT,
-        updated_at TEXT
-    )
-    """)
-
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS goal_logs (
-        goal_id INTEGER NOT NULL,
-        date TEXT NOT NULL,
-        actual_value REAL,
-        target_value REAL,
-        met INTEGER DEFAULT 0,
-        PRIMARY KEY (goal_id, date)
-    )
-    """)
-
-    # ===============================
-    # LIMIT EVENTS (hits & edits)
-    # ===============================
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS limit_events (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        app_name TEXT NOT NULL,
-        event_type TEXT NOT NULL,
-        old_value INTEGER,
-        new_value INTEGER,
-        timestamp TEXT NOT NULL,
-        date TEXT NOT NULL
-    )
-    """)
-
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_goal_logs_date ON goal_logs(date)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_limit_events_date ON limit_events(date)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_limit_events_app ON limit_events(app_name)")
+        sync_ignored_table()
+    except Exception as e:
+        print(f"[DB] Could not sync ignored_apps: {e}")
 
-    conn.commit()
-    conn.close()
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(f"[DB] init_db: schema v{version}, {len(applied)} migration(s) applied in {elapsed_ms:.1f} ms")
 
 
 # ==========================================================
@@ -303,75 +66,55 @@ def init_db():
 # ==========================================================
 
 def set_app_limit(app_name: str, limit_seconds: int):
-    conn = get_connection()
-    cursor = conn.cursor()
-
     now = datetime.now().isoformat()
 
-    cursor.execute("""
-        INSERT INTO app_limits
-        (app_name, daily_limit_seconds, is_enabled, created_at)
-        VALUES (?, ?, 1, ?)
-        ON CONFLICT(app_name)
-        DO UPDATE SET daily_limit_seconds = excluded.daily_limit_seconds
-    """, (app_name, limit_seconds, now))
-
-    conn.commit()
-    conn.close()
+    with db.transaction() as conn:
+        conn.execute("""
+            INSERT INTO app_limits
+            (app_name, daily_limit_seconds, is_enabled, created_at)
+            VALUES (?, ?, 1, ?)
+            ON CONFLICT(app_name)
+            DO UPDATE SET daily_limit_seconds = excluded.daily_limit_seconds
+        """, (app_name, limit_seconds, now))
 
 
 def get_all_limits():
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-                   SELECT id, app_name, daily_limit_seconds, is_enabled, unblock_until, is_blocked, blocked_at
-                   FROM app_limits
-                   """)
-
-    rows = cursor.fetchall()
-    conn.close()
-    return rows
+    with db.connection() as conn:
+        cursor = conn.execute("""
+                       SELECT id, app_name, daily_limit_seconds, is_enabled, unblock_until, is_blocked, blocked_at
+                       FROM app_limits
+                       """)
+        return cursor.fetchall()
 
 
 def get_limit_for_app(app_name: str):
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        SELECT daily_limit_seconds, is_enabled
-        FROM app_limits
-        WHERE app_name = ?
-    """, (app_name,))
-
-    result = cursor.fetchone()
-    conn.close()
-    return result
-
-
-def toggle_limit(app_name: str, enabled: bool):
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    if enabled:
-        cursor.execute("""
-            UPDATE app_limits
-            SET is_enabled = 1
+    with db.connection() as conn:
+        cursor = conn.execute("""
+            SELECT daily_limit_seconds, is_enabled
+            FROM app_limits
             WHERE app_name = ?
         """, (app_name,))
-    else:
-        cursor.execute("""
-            UPDATE app_limits
-            SET is_enabled = 0,
-                is_blocked = 0,
-                blocked_at = NULL,
-                unblock_until = NULL
-            WHERE app_name = ?
-        """, (app_name,))
-        cursor.execute("DELETE FROM blocked_apps WHERE app_name = ?", (app_name,))
+        return cursor.fetchone()
 
-    conn.commit()
-    conn.close()
+
+def toggle_limit(app_name: str, enabled: bool):
+    with db.transaction() as conn:
+        if enabled:
+            conn.execute("""
+                UPDATE app_limits
+                SET is_enabled = 1
+                WHERE app_name = ?
+            """, (app_name,))
+        else:
+            conn.execute("""
+                UPDATE app_limits
+                SET is_enabled = 0,
+                    is_blocked = 0,
+                    blocked_at = NULL,
+                    unblock_until = NULL
+                WHERE app_name = ?
+            """, (app_name,))
+            conn.execute("DELETE FROM blocked_apps WHERE app_name = ?", (app_name,))
 
 
 # ==========================================================
@@ -379,82 +122,103 @@ def toggle_limit(app_name: str, enabled: bool):
 # ==========================================================
 
 def add_blocked_app(app_name: str):
-    conn = get_connection()
-    cursor = conn.cursor()
-
     now = datetime.now().isoformat()
 
-    cursor.execute("""
-        UPDATE app_limits
-        SET is_blocked = 1,
-            blocked_at = ?
-        WHERE app_name = ?
-    """, (now, app_name))
-
-    # Keep legacy table in sync for backwards compatibility.
-    cursor.execute("""
-        INSERT OR REPLACE INTO blocked_apps (app_name, blocked_at)
-        VALUES (?, ?)
-    """, (app_name, now))
+    with db.transaction() as conn:
+        conn.execute("""
+            UPDATE app_limits
+            SET is_blocked = 1,
+                blocked_at = ?
+            WHERE app_name = ?
+        """, (now, app_name))
 
-    conn.commit()
-    conn.close()
+        # Keep legacy table in sync for backwards compatibility.
+        conn.execute("""
+            INSERT OR REPLACE INTO blocked_apps (app_name, blocked_at)
+            VALUES (?, ?)
+        """, (app_name, now))
 
 
 def remove_blocked_app(app_name: str):
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        UPDATE app_limits
-        SET is_blocked = 0,
-            blocked_at = NULL
-        WHERE app_name = ?
-    """, (app_name,))
-    cursor.execute("DELETE FROM blocked_apps WHERE app_name = ?", (app_name,))
-    conn.commit()
-    conn.close()
+    with db.transaction() as conn:
+        conn.execute("""
+            UPDATE app_limits
+            SET is_blocked = 0,
+                blocked_at = NULL
+            WHERE app_name = ?
+        """, (app_name,))
+        conn.execute("DELETE FROM blocked_apps WHERE app_name = ?", (app_name,))
 
 
 def get_blocked_apps():
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        SELECT app_name, blocked_at
-        FROM app_limits
-        WHERE is_blocked = 1 AND is_enabled = 1
-        ORDER BY COALESCE(blocked_at, created_at) DESC, app_name ASC
-    """)
-    rows = cursor.fetchall()
-
-    conn.close()
+    with db.connection() as conn:
+        rows = conn.execute("""
+            SELECT app_name, blocked_at
+            FROM app_limits
+            WHERE is_blocked = 1 AND is_enabled = 1
+            ORDER BY COALESCE(blocked_at, created_at) DESC, app_name ASC
+        """).fetchall()
+
     return [{"app_name": r[0], "blocked_at": r[1]} for r in rows]
 
 
 def get_blocked_app_names():
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        SELECT app_name
-        FROM app_limits
-        WHERE is_blocked = 1 AND is_enabled = 1
-    """)
-    rows = cursor.fetchall()
+    with db.connection() as conn:
+        rows = conn.execute("""
+            SELECT app_name
+            FROM app_limits
+            WHERE is_blocked = 1 AND is_enabled = 1
+        """).fetchall()
 
-    conn.close()
     return [r[0] for r in rows]
 
 def delete_app_limit(app_name: str):
-    conn = get_connection()
-    cursor = conn.cursor()
+    with db.transaction() as conn:
+        conn.execute("DELETE FROM app_limits WHERE app_name = ?", (app_name,))
+        conn.execute("DELETE FROM blocked_apps WHERE app_name = ?", (app_name,))
 
-    cursor.execute("DELETE FROM app_limits WHERE app_name = ?", (app_name,))
-    cursor.execute("DELETE FROM blocked_apps WHERE app_name = ?", (app_name,))
+# ==========================================================
+# ================= LIMIT RULES ============================
+# ==========================================================
 
-    conn.commit()
-    conn.close()
+def set_limit_rule(scope: str, target: str, limit_seconds: int | None = None, days: int = 127,
+                   start_minute: int | None = None, end_minute: int | None = None,
+                   rule_id: int | None = None) -> int:
+    """Create a limit rule, or replace rule `rule_id`. Returns the rule id."""
+    with db.transaction() as conn:
+        if rule_id is not None:
+            conn.execute("""
+                UPDATE limit_rules
+                SET scope = ?, target = ?, daily_limit_seconds = ?,
+                    days = ?, start_minute = ?, end_minute = ?
+                WHERE id = ?
+            """, (scope, target, limit_seconds, days, start_minute, end_minute, rule_id))
+            return rule_id
+        cursor = conn.execute("""
+            INSERT INTO limit_rules
+            (scope, target, daily_limit_seconds, days, start_minute, end_minute, is_enabled, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, 1, ?)
+        """, (scope, target, limit_seconds, days, start_minute, end_minute, datetime.now().isoformat()))
+        return cursor.lastrowid
+
+
+def get_limit_rules():
+    with db.connection() as conn:
+        return conn.execute("""
+            SELECT id, scope, target, daily_limit_seconds, days, start_minute, end_minute, is_enabled
+            FROM limit_rules
+            ORDER BY id
+        """).fetchall()
+
+
+def toggle_limit_rule(rule_id: int, enabled: bool):
+    with db.transaction() as conn:
+        conn.execute("UPDATE limit_rules SET is_enabled = ? WHERE id = ?", (1 if enabled else 0, rule_id))
+
+
+def delete_limit_rule(rule_id: int):
+    with db.transaction() as conn:
+        conn.execute("DELETE FROM limit_rules WHERE id = ?", (rule_id,))
 
 # ==========================================================
 # ================= USAGE HELPER ===========================
@@ -464,176 +228,144 @@ def get_today_usage(app_name: str):
     """
     Fetch total active seconds for app today (local system time)
     """
-    conn = get_connection()
-    cursor = conn.cursor()
-
     today = datetime.now().date().isoformat()  # YYYY-MM-DD
 
-    cursor.execute("""
-        SELECT SUM(active_seconds)
-        FROM activity_logs
-        WHERE app_name = ?
-        AND timestamp LIKE ?
-    """, (app_name, f"{today}%"))
-
-    result = cursor.fetchone()
-    conn.close()
+    with db.connection() as conn:
+        result = conn.execute("""
+            SELECT SUM(f.active_seconds)
+            FROM activity_facts f
+            JOIN dim_apps a ON a.id = f.app_id
+            WHERE f.day = ?
+            AND a.app_name = ?
+        """, (today, app_name)).fetchone()
 
     return result[0] if result[0] else 0
 
 
 def set_temporary_unblock(app_name: str, minutes: int):
-    conn = get_connection()
-    cursor = conn.cursor()
-
     unblock_until = datetime.now() + timedelta(minutes=minutes)
 
-    cursor.execute("""
-        UPDATE app_limits
-        SET unblock_until = ?,
-            is_blocked = 0,
-            blocked_at = NULL
-        WHERE app_name = ?
-    """, (unblock_until.isoformat(), app_name))
-
-    cursor.execute(
-        "DELETE FROM blocked_apps WHERE app_name = ?",
-        (app_name,)
-    )
+    with db.transaction() as conn:
+        conn.execute("""
+            UPDATE app_limits
+            SET unblock_until = ?,
+                is_blocked = 0,
+                blocked_at = NULL
+            WHERE app_name = ?
+        """, (unblock_until.isoformat(), app_name))
 
-    conn.commit()
-    conn.close()
+        conn.execute(
+            "DELETE FROM blocked_apps WHERE app_name = ?",
+            (app_name,)
+        )
 
 
 def force_reblock_app(app_name: str):
-    conn = get_connection()
-    cursor = conn.cursor()
-
     now_iso = datetime.now().isoformat()
 
-    cursor.execute("""
-        UPDATE app_limits
-        SET unblock_until = NULL,
-            is_blocked = 1,
-            blocked_at = ?
-        WHERE app_name = ?
-    """, (now_iso, app_name))
-
-    cursor.execute("""
-        INSERT OR REPLACE INTO blocked_apps (app_name, blocked_at)
-        VALUES (?, ?)
-    """, (app_name, now_iso))
+    with db.transaction() as conn:
+        conn.execute("""
+            UPDATE app_limits
+            SET unblock_until = NULL,
+                is_blocked = 1,
+                blocked_at = ?
+            WHERE app_name = ?
+        """, (now_iso, app_name))
 
-    conn.commit()
-    conn.close()
+        conn.execute("""
+            INSERT OR REPLACE INTO blocked_apps (app_name, blocked_at)
+            VALUES (?, ?)
+        """, (app_name, now_iso))
 
 def clear_expired_unblocks():
     """
     Remove expired overrides using local system time
     """
-    conn = get_connection()
-    cursor = conn.cursor()
-
     now_iso = datetime.now().isoformat()
 
-    cursor.execute("""
-        UPDATE app_limits
-        SET unblock_until = NULL
-        WHERE unblock_until IS NOT NULL
-        AND unblock_until <= ?
-    """, (now_iso,))
-    conn.commit()
-    conn.close()
+    with db.transaction() as conn:
+        conn.execute("""
+            UPDATE app_limits
+            SET unblock_until = NULL
+            WHERE unblock_until IS NOT NULL
+            AND unblock_until <= ?
+        """, (now_iso,))
 
 def clear_all_tracked_events():
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    try:
-        # Clear only historical tracking data
-        cursor.execute("DELETE FROM activity_logs")
-        cursor.execute("DELETE FROM daily_stats")
-        cursor.execute("DELETE FROM file_logs")
-
-        conn.commit()
-        return True
-
-    except Exception as e:
-        conn.rollback()
-        raise e
-
-    finally:
-        conn.close()
+    # Let queued writes land first so they cannot resurrect after the clear
+    writer.flush()
+
+    # Clear only historical tracking data
+    with db.transaction() as conn:
+        conn.execute("DELETE FROM activity_facts")
+        conn.execute("DELETE FROM daily_stats")
+        conn.execute("DELETE FROM weekly_stats")
+        conn.execute("DELETE FROM hourly_stats")
+        conn.execute("DELETE FROM domain_stats")
+        conn.execute("DELETE FROM tier_horizons")
+        conn.execute("DELETE FROM file_logs")
+        conn.execute("DELETE FROM focus_daily")
+        conn.execute("DELETE FROM report_snapshots")
+
+    archive.delete_all()
+    return True
 
 def factory_reset():
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    try:
-        # Begin explicit transaction
-        cursor.execute("BEGIN")
+    # Let queued settings writes land first so they cannot resurrect after the reset
+    writer.flush()
 
+    with db.transaction() as conn:
         # Clear all tracked data
-        cursor.execute("DELETE FROM activity_logs")
-        cursor.execute("DELETE FROM daily_stats")
-        cursor.execute("DELETE FROM file_logs")
+        conn.execute("DELETE FROM activity_facts")
+        conn.execute("DELETE FROM daily_stats")
+        conn.execute("DELETE FROM weekly_stats")
+        conn.execute("DELETE FROM hourly_stats")
+        conn.execute("DELETE FROM domain_stats")
+        conn.execute("DELETE FROM tier_horizons")
+        conn.execute("DELETE FROM file_logs")
+        conn.execute("DELETE FROM focus_daily")
+        conn.execute("DELETE FROM report_snapshots")
 
         # Clear configuration tables
-        cursor.execute("DELETE FROM settings")
-        cursor.execute("DELETE FROM telegram_settings")
-        cursor.execute("DELETE FROM app_limits")
-        cursor.execute("DELETE FROM blocked_apps")
+        conn.execute("DELETE FROM settings")
+        conn.execute("DELETE FROM telegram_settings")
+        conn.execute("DELETE FROM app_limits")
+        conn.execute("DELETE FROM blocked_apps")
+        conn.execute("DELETE FROM limit_rules")
 
         # Reset auto-increment counters
-        cursor.execute("DELETE FROM sqlite_sequence")
-
-        conn.commit()
-        return True
-
-    except Exception as e:
-        conn.rollback()
-        raise e
+        conn.execute("DELETE FROM sqlite_sequence")
 
-    finally:
-        conn.close()
+    archive.delete_all()
+    return True
 def set_auto_delete_days(days: int | None):
     """
     Store data retention setting.
     None = keep forever
     """
 
-    conn = get_connection()
-    cursor = conn.cursor()
-
     value = "forever" if days is None else str(days)
 
-    cursor.execute("""
-        INSERT INTO settings (key, value)
-        VALUES ('auto_delete_days', ?)
-        ON CONFLICT(key)
-        DO UPDATE SET value = excluded.value
-    """, (value,))
-
-    conn.commit()
-    conn.close()
+    with db.transaction() as conn:
+        conn.execute("""
+            INSERT INTO settings (key, value)
+            VALUES ('auto_delete_days', ?)
+            ON CONFLICT(key)
+            DO UPDATE SET value = excluded.value
+        """, (value,))
 
 def get_auto_delete_days():
     """
-    Returns retention days or None if forever
+    Returns retention days or None if forever.
+    This is the raw tier's retention (see get_retention_policy).
     """
 
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        SELECT value
-        FROM settings
-        WHERE key = 'auto_delete_days'
-    """)
-
-    row = cursor.fetchone()
-
-    conn.close()
+    with db.connection() as conn:
+        row = conn.execute("""
+            SELECT value
+            FROM settings
+            WHERE key = 'auto_delete_days'
+        """).fetchone()
 
     if not row:
         return None
@@ -645,46 +377,316 @@ def get_auto_delete_days():
 
     return int(value)
 
-def delete_activity_older_than(days: int):
+def set_retention_tier_days(tier: str, days: int | None):
     """
-    Delete activity records older than N days across all log tables.
+    Store how many days one retention tier keeps ("raw", "hourly" or
+    "daily"). None = keep forever. The raw tier is auto_delete_days.
     """
+    if tier == "raw":
+        return set_auto_delete_days(days)
+    if tier not in ("hourly", "daily"):
+        raise ValueError(f"Unknown retention tier: {tier}")
+
+    value = "forever" if days is None else str(int(days))
+
+    with db.transaction() as conn:
+        conn.execute("""
+            INSERT INTO settings (key, value)
+            VALUES (?, ?)
+            ON CONFLICT(key)
+            DO UPDATE SET value = excluded.value
+        """, (f"retention_{tier}_days", value))
+
+def set_retention_archive(enabled: bool):
+    """Archive closed months of raw activity instead of deleting them (see archive.py)."""
+    with db.transaction() as conn:
+        conn.execute("""
+            INSERT INTO settings (key, value)
+            VALUES ('retention_archive_raw', ?)
+            ON CONFLICT(key)
+            DO UPDATE SET value = excluded.value
+        """, ("true" if enabled else "false",))
+
+def _at_least(days: int | None, floor: int | None) -> int | None:
+    # A coarser tier never keeps fewer days than the finer one below it
+    if days is None or floor is None:
+        return None
+    return max(days, floor)
 
-    conn = get_connection()
-    cursor = conn.cursor()
+def get_retention_policy() -> dict:
+    """
+    Days kept per tier: {"raw_days", "hourly_days", "daily_days"}, None = forever,
+    plus "archive_raw": whether raw months are archived rather than deleted.
 
-    cutoff = (datetime.now() - timedelta(days=days)).isoformat()
-    cutoff_date = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+    raw     activity_facts / file_logs   auto_delete_days (default forever)
+    hourly  hourly_stats                 default 1 year
+    daily   daily_stats / domain_stats   default forever
+    """
+    raw = get_auto_delete_days()
+
+    with db.connection() as conn:
+        stored = dict(conn.execute("""
+            SELECT key, value
+            FROM settings
+            WHERE key IN ('retention_hourly_days', 'retention_daily_days', 'retention_archive_raw')
+        """).fetchall())
+
+    def days(key, default):
+        value = stored.get(key)
+        if value is None:
+            return default
+        return None if value == "forever" else int(value)
+
+    hourly = _at_least(days("retention_hourly_days", DEFAULT_HOURLY_RETENTION_DAYS), raw)
+    daily = _at_least(days("retention_daily_days", DEFAULT_DAILY_RETENTION_DAYS), hourly)
+
+    return {
+        "raw_days": raw,
+        "hourly_days": hourly,
+        "daily_days": daily,
+        "archive_raw": stored.get("retention_archive_raw") == "true",
+    }
+
+def _delete_in_chunks(table: str, key: str, predicate: str, params: tuple,
+                      chunk_rows: int, pause: float, on_progress=None, should_stop=None) -> int:
+    """
+    DELETE ... WHERE <predicate> in `key` ranges of `chunk_rows`, one short
+    transaction per range, sleeping `pause` seconds between ranges so other
+    writers get the lock. Returns rows deleted.
+    """
+    with db.connection() as conn:
+        lo, hi = conn.execute(
+            f"SELECT MIN({key}), MAX({key}) FROM {table} WHERE {predicate}", params
+        ).fetchone()
+    if lo is None:
+        return 0
+
+    deleted = 0
+    while lo <= hi:
+        if should_stop and should_stop():
+            break
+        with db.transaction() as conn:
+            deleted += conn.execute(
+                f"DELETE FROM {table} WHERE {key} >= ? AND {key} < ? AND {predicate}",
+                (lo, lo + chunk_rows, *params)
+            ).rowcount
+        lo += chunk_rows
+        if on_progress:
+            on_progress(table, deleted)
+        time.sleep(pause)
+    return deleted
+
+
+def _delete_days_in_chunks(table: str, day_column: str, cutoff_date: str,
+                           pause: float, on_progress=None, should_stop=None) -> int:
+    """
+    Same as _delete_in_chunks for WITHOUT ROWID tables keyed by day:
+    deletes a week of days per transaction.
+    """
+    with db.connection() as conn:
+        old_days = [r[0] for r in conn.execute(
+            f"SELECT DISTINCT {day_column} FROM {table} WHERE {day_column} < ? ORDER BY 1",
+            (cutoff_date,)
+        )]
+
+    deleted = 0
+    for i in range(0, len(old_days), 7):
+        if should_stop and should_stop():
+            break
+        with db.transaction() as conn:
+            deleted += conn.execute(
+                f"DELETE FROM {table} WHERE {day_column} >= ? AND {day_column} <= ?",
+                (old_days[i], old_days[min(i + 6, len(old_days) - 1)])
+            ).rowcount
+        if on_progress:
+            on_progress(table, deleted)
+        time.sleep(pause)
+    return deleted
+
+
+def _archive_months(cutoff_date: str, on_archive=None, should_stop=None) -> bool:
+    """
+    Export every month of raw rows before `cutoff_date` (a month start) that
+    has no archive file yet. Returns False if stopped part-way.
+    """
+    with db.connection() as conn:
+        months = [r[0] for r in conn.execute(
+            "SELECT DISTINCT substr(day, 1, 7) FROM activity_facts WHERE day < ? ORDER BY 1",
+            (cutoff_date,)
+        )]
+
+    for month in months:
+        if should_stop and should_stop():
+            return False
+        # An existing file was complete before any of the month's rows were deleted
+        rows = 0 if archive.has_month(month) else archive.export_month(DB_PATH, month)
+        if on_archive:
+            on_archive(month, rows)
+    return True
+
+
+def _downsample_days(tier: str, table: str, day_column: str, cutoff_date: str, fold,
+                     on_downsample=None, on_days_changed=None, should_stop=None) -> bool:
+    """
+    Fold every day of `tier` older than `cutoff_date` into the next tier
+    (one transaction per day), then move the tier's horizon to the cutoff so
+    readers stop using it. Returns False if stopped before the horizon moved;
+    the caller must not delete anything in that case.
+    """
+    with db.connection() as conn:
+        first_day = get_horizons(conn).get(tier, "")
+        days = [r[0] for r in conn.execute(
+            f"SELECT DISTINCT {day_column} FROM {table} "
+            f"WHERE {day_column} >= ? AND {day_column} < ? ORDER BY 1",
+            (first_day, cutoff_date)
+        )]
+
+    for done, day in enumerate(days, 1):
+        if should_stop and should_stop():
+            return False
+        with db.transaction() as conn:
+            fold(conn, day)
+        if on_downsample:
+            on_downsample(tier, done)
+
+    with db.transaction() as conn:
+        advance_horizon(conn, tier, cutoff_date)
+    if days and on_days_changed:
+        on_days_changed(days)
+    return True
+
+
+def apply_retention_policy(policy: dict, on_progress=None, on_downsample=None, on_archive=None,
+                           on_days_changed=None, should_stop=None,
+                           chunk_rows: int = RETENTION_CHUNK_ROWS,
+                           pause: float = RETENTION_CHUNK_PAUSE) -> tuple[dict, int]:
+    """
+    Trim each tier to its retention (see get_retention_policy), finest first.
+
+    Days leaving the raw tier are downsampled into hourly_stats /
+    daily_stats / domain_stats before their raw rows are deleted, and days
+    leaving the hourly tier into daily_stats — so hourly and daily history
+    outlive the raw rows they came from. With "archive_raw" set, closed
+    months of raw rows are exported to archive files first; the rest of the
+    cutoff's month stays hot until the month closes. Deletes run in bounded
+    chunks (see _delete_in_chunks) so the logger's commits never stall
+    behind one long DELETE.
+
+    `on_progress(table, rows_so_far)` is called after every delete chunk,
+    `on_downsample(tier, days_so_far)` after every downsampled day and
+    `on_archive(month, rows)` after every archived month and
+    `on_days_changed(days)` with the days a horizon moved past, once readers
+    see the coarser tier; `should_stop()` aborts between chunks. Returns
+    ({table: rows_deleted}, archive_files_deleted).
+    """
 
-    cursor.execute("""
-        DELETE FROM activity_logs
-        WHERE timestamp < ?
-    """, (cutoff,))
+    now = datetime.now()
 
-    cursor.execute("""
-        DELETE FROM daily_stats
-        WHERE date < ?
-    """, (cutoff_date,))
+    def cutoff_date(days):
+        return None if days is None else (now - timedelta(days=days)).strftime("%Y-%m-%d")
+
+    raw_cutoff = cutoff_date(policy.get("raw_days"))
+    hourly_cutoff = cutoff_date(policy.get("hourly_days"))
+    daily_cutoff = cutoff_date(policy.get("daily_days"))
+    chunk = dict(pause=pause, on_progress=on_progress, should_stop=should_stop)
+    deleted = {}
+    archive_files = 0
+
+    if raw_cutoff and policy.get("archive_raw"):
+        raw_cutoff = raw_cutoff[:8] + "01"
+        if not _archive_months(raw_cutoff, on_archive, should_stop):
+            return deleted, archive_files
+
+    if raw_cutoff and _downsample_days(
+        "raw", "activity_facts", "day", raw_cutoff, downsample_raw_day,
+        on_downsample, on_days_changed, should_stop
+    ):
+        raw_cutoff_ts = (now - timedelta(days=policy["raw_days"])).isoformat()
+        deleted["activity_facts"] = _delete_in_chunks(
+            "activity_facts", "id", "day < ?", (raw_cutoff,), chunk_rows, **chunk)
+        deleted["file_logs"] = _delete_in_chunks(
+            "file_logs", "id", "timestamp < ?", (raw_cutoff_ts,), chunk_rows, **chunk)
+
+    if hourly_cutoff and _downsample_days(
+        "hourly", "hourly_stats", "day", hourly_cutoff, downsample_hourly_day,
+        on_downsample, on_days_changed, should_stop
+    ):
+        deleted["hourly_stats"] = _delete_days_in_chunks("hourly_stats", "day", hourly_cutoff, **chunk)
+
+    if daily_cutoff:
+        # Nothing coarser to fold into — only the horizon moves
+        with db.transaction() as conn:
+            advance_horizon(conn, "daily", daily_cutoff)
+            days = [r[0] for r in conn.execute(
+                "SELECT DISTINCT date FROM daily_stats WHERE date < ? ORDER BY 1", (daily_cutoff,)
+            )]
+        if days and on_days_changed:
+            on_days_changed(days)
+        deleted["daily_stats"] = _delete_in_chunks(
+            "daily_stats", "rowid", "date < ?", (daily_cutoff,), chunk_rows, **chunk)
+        deleted["domain_stats"] = _delete_days_in_chunks("domain_stats", "day", daily_cutoff, **chunk)
+        # Whole weeks before the cutoff's week; the week it falls in stays complete
+        deleted["weekly_stats"] = _delete_in_chunks(
+            "weekly_stats", "rowid", "week_start < ?", (week_start(daily_cutoff),), chunk_rows, **chunk)
+        archive_files = archive.delete_before(daily_cutoff)
+
+    return deleted, archive_files
+
+
+def delete_activity_older_than(days: int, on_progress=None, should_stop=None,
+                               chunk_rows: int = RETENTION_CHUNK_ROWS,
+                               pause: float = RETENTION_CHUNK_PAUSE) -> dict:
+    """
+    Delete activity records older than N days from every tier, raw and
+    aggregated alike. Returns {table: rows_deleted}.
+    """
+    deleted, _ = apply_retention_policy(
+        {"raw_days": days, "hourly_days": days, "daily_days": days},
+        on_progress=on_progress, should_stop=should_stop,
+        chunk_rows=chunk_rows, pause=pause,
+    )
+    return deleted
+
+
+def incremental_vacuum(step_pages: int = VACUUM_STEP_PAGES, pause: float = RETENTION_CHUNK_PAUSE,
+                       on_progress=None, should_stop=None) -> int:
+    """
+    Return free pages to the OS `step_pages` at a time (auto_vacuum=INCREMENTAL).
+    `on_progress(bytes_reclaimed, free_pages)` is called after every step.
+    Returns the number of bytes reclaimed.
+    """
+    with db.connection() as conn:
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            return 0
+
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        start_pages = conn.execute("PRAGMA page_count").fetchone()[0]
+        reclaimed = 0
+
+        while not (should_stop and should_stop()):
+            free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if free_pages == 0:
+                break
+            # executescript steps the pragma to completion; execute() would
+            # only free a single page per call
+            conn.executescript(f"PRAGMA incremental_vacuum({int(step_pages)});")
+            reclaimed = (start_pages - conn.execute("PRAGMA page_count").fetchone()[0]) * page_size
+            if on_progress:
+                on_progress(reclaimed, max(0, free_pages - step_pages))
+            time.sleep(pause)
 
-    cursor.execute("""
-        DELETE FROM file_logs
-        WHERE timestamp < ?
-    """, (cutoff,))
+        # Let the WAL fold the truncation back into the main file
+        conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchall()
+
+    return reclaimed
 
-    conn.commit()
-    conn.close()
 
 def run_retention_cleanup():
     """
     Execute retention cleanup based on current setting
     """
 
-    days = get_auto_delete_days()
-
-    if days is None:
-        return
-
-    delete_activity_older_than(days)
+    apply_retention_policy(get_retention_policy())
 
 
 # ==========================================================
@@ -693,96 +695,188 @@ def run_retention_cleanup():
 
 def create_goal(goal_type: str, target_value: float, target_unit: str = "seconds",
                 direction: str = "under", label: str = None):
-    conn = get_connection()
-    cursor = conn.cursor()
     now = datetime.now().isoformat()
-    cursor.execute("""
-        INSERT INTO goals (goal_type, label, target_value, target_unit, direction, is_active, created_at, updated_at)
-        VALUES (?, ?, ?, ?, ?, 1, ?, ?)
-    """, (goal_type, label, target_value, target_unit, direction, now, now))
-    goal_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
-    return goal_id
+    with db.transaction() as conn:
+        cursor = conn.execute("""
+            INSERT INTO goals (goal_type, label, target_value, target_unit, direction, is_active, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, 1, ?, ?)
+        """, (goal_type, label, target_value, target_unit, direction, now, now))
+        return cursor.lastrowid
 
 
 def get_all_goals():
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT id, goal_type, label, target_value, target_unit, direction, is_active, created_at, updated_at FROM goals")
-    rows = cursor.fetchall()
-    conn.close()
-    return rows
+    with db.connection() as conn:
+        return conn.execute(
+            "SELECT id, goal_type, label, target_value, target_unit, direction, is_active, created_at, updated_at FROM goals"
+        ).fetchall()
 
 
 def update_goal(goal_id: int, target_value: float = None, label: str = None,
                 is_active: int = None):
-    conn = get_connection()
-    cursor = conn.cursor()
     now = datetime.now().isoformat()
-    if target_value is not None:
-        cursor.execute("UPDATE goals SET target_value = ?, updated_at = ? WHERE id = ?",
-                       (target_value, now, goal_id))
-    if label is not None:
-        cursor.execute("UPDATE goals SET label = ?, updated_at = ? WHERE id = ?",
-                       (label, now, goal_id))
-    if is_active is not None:
-        cursor.execute("UPDATE goals SET is_active = ?, updated_at = ? WHERE id = ?",
-                       (is_active, now, goal_id))
-    conn.commit()
-    conn.close()
+    with db.transaction() as conn:
+        if target_value is not None:
+            conn.execute("UPDATE goals SET target_value = ?, updated_at = ? WHERE id = ?",
+                         (target_value, now, goal_id))
+        if label is not None:
+            conn.execute("UPDATE goals SET label = ?, updated_at = ? WHERE id = ?",
+                         (label, now, goal_id))
+        if is_active is not None:
+            conn.execute("UPDATE goals SET is_active = ?, updated_at = ? WHERE id = ?",
+                         (is_active, now, goal_id))
 
 
 def delete_goal(goal_id: int):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM goals WHERE id = ?", (goal_id,))
-    cursor.execute("DELETE FROM goal_logs WHERE goal_id = ?", (goal_id,))
-    conn.commit()
-    conn.close()
+    with db.transaction() as conn:
+        conn.execute("DELETE FROM goals WHERE id = ?", (goal_id,))
+        conn.execute("DELETE FROM goal_logs WHERE goal_id = ?", (goal_id,))
 
 
 def log_goal_progress(goal_id: int, date: str, actual_value: float, target_value: float, met: bool):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
+    """Queued on the writer thread; returns a Future (callers normally ignore it)."""
+    return writer.execute("""
         INSERT INTO goal_logs (goal_id, date, actual_value, target_value, met)
         VALUES (?, ?, ?, ?, ?)
         ON CONFLICT(goal_id, date)
         DO UPDATE SET actual_value = excluded.actual_value, target_value = excluded.target_value, met = excluded.met
     """, (goal_id, date, actual_value, target_value, 1 if met else 0))
-    conn.commit()
-    conn.close()
+
+
+def log_goal_progress_batch(rows, overwrite: bool = True):
+    """
+    Write many (goal_id, date, actual, target, met) rows in one writer batch.
+    Without `overwrite`, days that already have a row keep it. Returns a Future.
+    """
+    conflict = """
+        DO UPDATE SET actual_value = excluded.actual_value, target_value = excluded.target_value, met = excluded.met
+    """ if overwrite else "DO NOTHING"
+    return writer.executemany(f"""
+        INSERT INTO goal_logs (goal_id, date, actual_value, target_value, met)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(goal_id, date)
+        {conflict}
+    """, [(goal_id, date, actual, target, 1 if met else 0) for goal_id, date, actual, target, met in rows])
+
+
+def get_goal_log_keys(start_date: str, end_date: str):
+    """(goal_id, date) of every goal_logs row in the range."""
+    with db.connection() as conn:
+        return conn.execute("""
+            SELECT goal_id, date FROM goal_logs WHERE date >= ? AND date <= ?
+        """, (start_date, end_date)).fetchall()
+
+
+def get_goal_log_values(start_date: str, end_date: str):
+    """(goal_id, date, actual_value, target_value, met) of every goal_logs row in the range."""
+    with db.connection() as conn:
+        return conn.execute("""
+            SELECT goal_id, date, actual_value, target_value, met
+            FROM goal_logs WHERE date >= ? AND date <= ?
+        """, (start_date, end_date)).fetchall()
 
 
 def get_goal_logs(goal_id: int, days: int = 7):
-    conn = get_connection()
-    cursor = conn.cursor()
     cutoff = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
-    cursor.execute("""
-        SELECT goal_id, date, actual_value, target_value, met
-        FROM goal_logs WHERE goal_id = ? AND date >= ?
-        ORDER BY date
-    """, (goal_id, cutoff))
-    rows = cursor.fetchall()
-    conn.close()
-    return rows
+    with db.connection() as conn:
+        return conn.execute("""
+            SELECT goal_id, date, actual_value, target_value, met
+            FROM goal_logs WHERE goal_id = ? AND date >= ?
+            ORDER BY date
+        """, (goal_id, cutoff)).fetchall()
 
 
 def get_all_goal_logs_range(start_date: str, end_date: str):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT gl.goal_id, gl.date, gl.actual_value, gl.target_value, gl.met,
-               g.goal_type, g.label, g.target_unit, g.direction
-        FROM goal_logs gl
-        JOIN goals g ON g.id = gl.goal_id
-        WHERE gl.date >= ? AND gl.date <= ?
-        ORDER BY gl.date
-    """, (start_date, end_date))
-    rows = cursor.fetchall()
-    conn.close()
-    return rows
+    with db.connection() as conn:
+        return conn.execute("""
+            SELECT gl.goal_id, gl.date, gl.actual_value, gl.target_value, gl.met,
+                   g.goal_type, g.label, g.target_unit, g.direction
+            FROM goal_logs gl
+            JOIN goals g ON g.id = gl.goal_id
+            WHERE gl.date >= ? AND gl.date <= ?
+            ORDER BY gl.date
+        """, (start_date, end_date)).fetchall()
+
+
+# ==========================================================
+# ================= FOCUS DAILY ============================
+# ==========================================================
+
+def save_focus_daily(date: str, result: dict, totals: tuple):
+    """
+    Persist a finished day's focus score (see src/analytics/focus_score.py)
+    with the (active, idle, keystrokes) totals it was computed from. Queued
+    on the writer; returns a Future.
+    """
+    return writer.execute("""
+        INSERT OR REPLACE INTO focus_daily
+        (date, score, deep_work_seconds, flow_bonus, engagement_score,
+         switch_penalty, idle_penalty, active_seconds, idle_seconds, keystrokes, computed_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (
+        date, result["score"], result["deepWorkSeconds"], result["flowBonus"],
+        result["engagementScore"], result["switchPenalty"], result["idlePenalty"],
+        *totals, datetime.now().isoformat()
+    ))
+
+
+def get_focus_daily_range(start_date: str, end_date: str):
+    """[(date, score, deep_work, flow, engagement, switch, idle_penalty, active, idle, keys)]"""
+    with db.connection() as conn:
+        return conn.execute("""
+            SELECT date, score, deep_work_seconds, flow_bonus, engagement_score,
+                   switch_penalty, idle_penalty, active_seconds, idle_seconds, keystrokes
+            FROM focus_daily
+            WHERE date >= ? AND date <= ?
+        """, (start_date, end_date)).fetchall()
+
+
+def get_unscored_raw_days(before: str) -> list[str]:
+    """Days before `before` that still have raw rows but no focus_daily row."""
+    with db.connection() as conn:
+        return [row[0] for row in conn.execute("""
+            SELECT DISTINCT day FROM activity_facts
+            WHERE day < ? AND day NOT IN (SELECT date FROM focus_daily)
+            ORDER BY day
+        """, (before,))]
+
+
+# ==========================================================
+# ================= REPORT SNAPSHOTS =======================
+# ==========================================================
+
+def get_report_snapshot(week_start: str, verbosity: str, data_version: int):
+    """The stored report JSON for a week, or None if missing or stale."""
+    with db.connection() as conn:
+        row = conn.execute("""
+            SELECT payload FROM report_snapshots
+            WHERE week_start = ? AND verbosity = ? AND data_version = ?
+        """, (week_start, verbosity, data_version)).fetchone()
+    return row[0] if row else None
+
+
+def get_report_snapshot_weeks(data_version: int) -> set[str]:
+    """Weeks with at least one snapshot at `data_version`."""
+    with db.connection() as conn:
+        return {row[0] for row in conn.execute("""
+            SELECT DISTINCT week_start FROM report_snapshots WHERE data_version = ?
+        """, (data_version,))}
+
+
+def save_report_snapshots(rows):
+    """Upsert [(week_start, verbosity, data_version, payload)]. Queued on the writer; returns a Future."""
+    now = datetime.now().isoformat()
+    return writer.executemany("""
+        INSERT OR REPLACE INTO report_snapshots
+        (week_start, verbosity, data_version, payload, generated_at)
+        VALUES (?, ?, ?, ?, ?)
+    """, [(*row, now) for row in rows])
+
+
+def delete_report_snapshots(from_week: str = None):
+    """Drop the snapshots of weeks from `from_week` on (all if None). Queued on the writer; returns a Future."""
+    if from_week is not None:
+        return writer.execute("DELETE FROM report_snapshots WHERE week_start >= ?", (from_week,))
+    return writer.execute("DELETE FROM report_snapshots")
 
 
 # ==========================================================
@@ -790,43 +884,33 @@ def get_all_goal_logs_range(start_date: str, end_date: str):
 # ==========================================================
 
 def log_limit_event(app_name: str, event_type: str, old_value: int = None, new_value: int = None):
-    conn = get_connection()
-    cursor = conn.cursor()
+    """Queued on the writer thread; the returned Future resolves to the event rowid."""
     now = datetime.now()
-    cursor.execute("""
+    return writer.execute("""
         INSERT INTO limit_events (app_name, event_type, old_value, new_value, timestamp, date)
         VALUES (?, ?, ?, ?, ?, ?)
     """, (app_name, event_type, old_value, new_value, now.isoformat(), now.strftime("%Y-%m-%d")))
-    conn.commit()
-    conn.close()
 
 
 def get_limit_events_range(start_date: str, end_date: str):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT app_name, event_type, old_value, new_value, timestamp, date
-        FROM limit_events
-        WHERE date >= ? AND date <= ?
-        ORDER BY timestamp
-    """, (start_date, end_date))
-    rows = cursor.fetchall()
-    conn.close()
-    return rows
+    with db.connection() as conn:
+        return conn.execute("""
+            SELECT app_name, event_type, old_value, new_value, timestamp, date
+            FROM limit_events
+            WHERE date >= ? AND date <= ?
+            ORDER BY timestamp
+        """, (start_date, end_date)).fetchall()
 
 
 def get_limit_events_summary(start_date: str, end_date: str):
     """Returns per-app summary of limit hits and edits in a date range."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT app_name, event_type, COUNT(*) as cnt
-        FROM limit_events
-        WHERE date >= ? AND date <= ?
-        GROUP BY app_name, event_type
-    """, (start_date, end_date))
-    rows = cursor.fetchall()
-    conn.close()
+    with db.connection() as conn:
+        rows = conn.execute("""
+            SELECT app_name, event_type, COUNT(*) as cnt
+            FROM limit_events
+            WHERE date >= ? AND date <= ?
+            GROUP BY app_name, event_type
+        """, (start_date, end_date)).fetchall()
     summary = {}
     for app_name, event_type, cnt in rows:
         if app_name not in summary:
@@ -838,18 +922,14 @@ def get_limit_events_summary(start_date: str, end_date: str):
     return summary
 
 def set_setting(key: str, value: str):
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        INSERT INTO settings (key, value)
-        VALUES (?, ?)
-        ON CONFLICT(key)
-        DO UPDATE SET value = excluded.value
-    """, (key, value))
-
-    conn.commit()
-    conn.close()
+    with db.transaction() as conn:
+        conn.execute("""
+            INSERT INTO settings (key, value)
+            VALUES (?, ?)
+            ON CONFLICT(key)
+            DO UPDATE SET value = excluded.value
+        """, (key, value))
+
     # Refresh settings cache
     try:
         from src.core.settings_cache import settings_cache
@@ -858,17 +938,12 @@ def set_setting(key: str, value: str):
         pass
 
 def get_setting(key: str, default=None):
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        SELECT value FROM settings WHERE key = ?
-    """, (key,))
-
-    row = cursor.fetchone()
-    conn.close()
+    with db.connection() as conn:
+        row = conn.execute("""
+            SELECT value FROM settings WHERE key = ?
+        """, (key,)).fetchone()
 
     if not row:
         return default
 
-    return row[0]
\ No newline at end of file
+    return row[0]
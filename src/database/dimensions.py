@@ -0,0 +1,126 @@
+"""
+dimensions.py
+─────────────
+In-process intern cache for the dictionary-encoded activity_logs columns.
+
+activity_facts stores integer keys into dim_apps, dim_urls and dim_titles.
+The logger resolves each string through this cache: a hit is a dict lookup,
+a miss is one ``INSERT OR IGNORE`` + ``SELECT id`` against the dimension
+table. Dimension rows are never deleted, so a cached id stays valid for the
+life of the process (factory reset and retention only clear activity_facts).
+
+Ids resolved while the calling thread is inside an open transaction are NOT
+cached — if that transaction rolled back the id would point at nothing.
+Resolve ids before opening the write transaction to benefit from the cache.
+
+Usage
+-----
+  from src.database.dimensions import dimensions
+
+  app_id = dimensions.app_id("chrome.exe", exe_path)
+  url_id = dimensions.url_id("https://example.com/")
+"""
+
+import threading
+from collections import OrderedDict
+
+from src.database.database import db
+
+# Per-dimension LRU bound; window titles are the only high-cardinality one.
+MAX_ENTRIES = 4096
+
+
+class InternCache:
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._apps: OrderedDict = OrderedDict()
+        self._urls: OrderedDict = OrderedDict()
+        self._titles: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    # ------------------------------------------------------------------
+    def _lookup(self, cache: OrderedDict, key):
+        with self._lock:
+            value = cache.get(key)
+            if value is not None:
+                cache.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+            return value
+
+    def _store(self, cache: OrderedDict, key, value: int):
+        with self._lock:
+            cache[key] = value
+            cache.move_to_end(key)
+            while len(cache) > self._max_entries:
+                cache.popitem(last=False)
+
+    def _intern(self, cache: OrderedDict, key, insert_sql: str, select_sql: str, params: tuple):
+        cached = self._lookup(cache, key)
+        if cached is not None:
+            return cached
+
+        with db.connection() as conn:
+            conn.execute(insert_sql, params)
+            row = conn.execute(select_sql, params).fetchone()
+            in_transaction = conn.in_transaction
+
+        value = row[0]
+        if not in_transaction:
+            self._store(cache, key, value)
+        return value
+
+    # ------------------------------------------------------------------
+    def app_id(self, app_name: str | None, exe_path: str | None) -> int | None:
+        if not app_name:
+            return None
+        exe_path = exe_path or ""
+        return self._intern(
+            self._apps, (app_name, exe_path),
+            "INSERT OR IGNORE INTO dim_apps (app_name, exe_path) VALUES (?, ?)",
+            "SELECT id FROM dim_apps WHERE app_name = ? AND exe_path = ?",
+            (app_name, exe_path),
+        )
+
+    def url_id(self, url: str | None) -> int | None:
+        if url is None:
+            return None
+        return self._intern(
+            self._urls, url,
+            "INSERT OR IGNORE INTO dim_urls (url) VALUES (?)",
+            "SELECT id FROM dim_urls WHERE url = ?",
+            (url,),
+        )
+
+    def title_id(self, title: str | None) -> int | None:
+        if title is None:
+            return None
+        return self._intern(
+            self._titles, title,
+            "INSERT OR IGNORE INTO dim_titles (title) VALUES (?)",
+            "SELECT id FROM dim_titles WHERE title = ?",
+            (title,),
+        )
+
+    def clear(self):
+        with self._lock:
+            self._apps.clear()
+            self._urls.clear()
+            self._titles.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "apps": len(self._apps),
+                "urls": len(self._urls),
+                "titles": len(self._titles),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+# Global singleton
+dimensions = InternCache()
@@ -0,0 +1,754 @@
+"""
+migrations.py
+─────────────
+Versioned schema migrations tracked in ``PRAGMA user_version``.
+
+Each step in ``MIGRATIONS`` runs at most once per database: ``migrate()``
+reads ``user_version`` and applies only the steps above it, so an
+up-to-date database costs a single PRAGMA read at startup.
+
+Every step is also idempotent (``IF NOT EXISTS``, guarded ALTERs, probes
+before data moves), because databases created before this runner existed
+start at version 0 with some or all of the schema already in place.
+
+Transactional steps run inside one ``BEGIN IMMEDIATE`` together with the
+``user_version`` bump. Steps that move a lot of data (``transactional=False``)
+commit in rowid chunks and are written to resume safely if interrupted; the
+version is bumped once the step returns.
+
+All helpers take a plain sqlite3 connection opened with
+``isolation_level=None``, so a step can be exercised against a fixture
+database of any historical schema without the shared pool:
+
+  conn = sqlite3.connect(fixture_path, isolation_level=None)
+  migrate(conn)
+  assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+"""
+
+import sqlite3
+from contextlib import contextmanager
+from typing import Callable, NamedTuple
+
+# Rows per transaction when backfilling / copying large tables
+BACKFILL_CHUNK_ROWS = 50_000
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    apply: Callable
+    transactional: bool = True
+
+
+@contextmanager
+def _transaction(conn):
+    """BEGIN IMMEDIATE … COMMIT on a bare connection; joins an open one."""
+    if conn.in_transaction:
+        yield conn
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    else:
+        conn.commit()
+
+
+def _add_column(conn, table: str, column: str):
+    try:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column}")
+    except sqlite3.OperationalError:
+        pass  # already present
+
+
+def _db_size_bytes(conn) -> int:
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    return page_count * page_size
+
+
+# ==========================================================
+# v1 — core tables
+# ==========================================================
+
+def _v1_core_tables(conn):
+    cursor = conn.cursor()
+
+    # ===============================
+    # FILE SYSTEM LOGS
+    # ===============================
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS file_logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TEXT NOT NULL,
+        action TEXT,
+        file_path TEXT
+    )
+    """)
+
+    # ===============================
+    # DAILY AGGREGATED STATS
+    # ===============================
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS daily_stats (
+        date TEXT NOT NULL,
+        app_name TEXT NOT NULL,
+        main_category TEXT NOT NULL DEFAULT 'other',
+        sub_category TEXT,
+        active_seconds INTEGER DEFAULT 0,
+        idle_seconds INTEGER DEFAULT 0,
+        sessions INTEGER DEFAULT 0,
+        keystrokes INTEGER DEFAULT 0,
+        clicks INTEGER DEFAULT 0,
+        PRIMARY KEY (date, app_name, main_category)
+    )
+    """)
+
+    # ── Old daily_stats schema had PRIMARY KEY (date, app_name) → move to 3 columns
+    cursor.execute("PRAGMA index_list(daily_stats)")
+    pk_cols = []
+    for idx in cursor.fetchall():
+        if idx[2] == 1:  # unique
+            cursor.execute(f"PRAGMA index_info('{idx[1]}')")
+            pk_cols = [r[2] for r in cursor.fetchall()]
+            break
+    if set(pk_cols) == {"date", "app_name"}:
+        cursor.execute("""
+            CREATE TABLE daily_stats_new (
+                date TEXT NOT NULL,
+                app_name TEXT NOT NULL,
+                main_category TEXT NOT NULL DEFAULT 'other',
+                sub_category TEXT,
+                active_seconds INTEGER DEFAULT 0,
+                idle_seconds INTEGER DEFAULT 0,
+                sessions INTEGER DEFAULT 0,
+                keystrokes INTEGER DEFAULT 0,
+                clicks INTEGER DEFAULT 0,
+                PRIMARY KEY (date, app_name, main_category)
+            )
+        """)
+        cursor.execute("""
+            INSERT OR IGNORE INTO daily_stats_new
+                (date, app_name, main_category, sub_category,
+                 active_seconds, idle_seconds, sessions, keystrokes, clicks)
+            SELECT date, app_name,
+                   COALESCE(main_category, 'other'),
+                   sub_category, active_seconds, idle_seconds,
+                   sessions, keystrokes, clicks
+            FROM daily_stats
+        """)
+        cursor.execute("DROP TABLE daily_stats")
+        cursor.execute("ALTER TABLE daily_stats_new RENAME TO daily_stats")
+
+    # ===============================
+    # GLOBAL / TELEGRAM SETTINGS
+    # ===============================
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS settings (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    )
+    """)
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS telegram_settings (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    )
+    """)
+
+    # ── Legacy app_settings → settings & telegram_settings
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='app_settings'")
+    if cursor.fetchone():
+        telegram_keys = [
+            'telegram_enabled', 'telegram_token', 'telegram_chat_id',
+            'telegram_bot_username', 'telegram_recent_commands'
+        ]
+        general_keys = [
+            'file_logging_enabled', 'file_logging_essential_only',
+            'show_yesterday_comparison', 'hardware_acceleration'
+        ]
+        for table, keys in (("telegram_settings", telegram_keys), ("settings", general_keys)):
+            for key in keys:
+                cursor.execute("SELECT value FROM app_settings WHERE key = ?", (key,))
+                row = cursor.fetchone()
+                if row:
+                    cursor.execute(
+                        f"INSERT OR IGNORE INTO {table} (key, value) VALUES (?, ?)",
+                        (key, row[0])
+                    )
+        cursor.execute("DROP TABLE app_settings")
+
+    # ===============================
+    # APP USAGE LIMITS
+    # ===============================
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS app_limits (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        app_name TEXT UNIQUE NOT NULL,
+        daily_limit_seconds INTEGER NOT NULL,
+        is_enabled INTEGER DEFAULT 1,
+        is_blocked INTEGER DEFAULT 0,
+        blocked_at TEXT,
+        created_at TEXT,
+        unblock_until TEXT
+    )
+    """)
+    _add_column(conn, "app_limits", "unblock_until TEXT")
+    _add_column(conn, "app_limits", "is_blocked INTEGER DEFAULT 0")
+    _add_column(conn, "app_limits", "blocked_at TEXT")
+
+    # ===============================
+    # BLOCKED APPS
+    # ===============================
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS blocked_apps (
+        app_name TEXT PRIMARY KEY,
+        blocked_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+    # Legacy blocked_apps state → app_limits.is_blocked (app_limits is the source of truth)
+    cursor.execute("""
+        UPDATE app_limits
+        SET is_blocked = 1,
+            blocked_at = COALESCE(blocked_at, (
+                SELECT blocked_at
+                FROM blocked_apps b
+                WHERE b.app_name = app_limits.app_name
+            ))
+        WHERE app_name IN (SELECT app_name FROM blocked_apps)
+    """)
+
+    # ===============================
+    # GOALS & TARGETS
+    # ===============================
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS goals (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        goal_type TEXT NOT NULL,
+        label TEXT,
+        target_value REAL NOT NULL,
+        target_unit TEXT NOT NULL DEFAULT 'seconds',
+        direction TEXT NOT NULL DEFAULT 'under',
+        is_active INTEGER DEFAULT 1,
+        created_at TEXT,
+        updated_at TEXT
+    )
+    """)
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS goal_logs (
+        goal_id INTEGER NOT NULL,
+        date TEXT NOT NULL,
+        actual_value REAL,
+        target_value REAL,
+        met INTEGER DEFAULT 0,
+        PRIMARY KEY (goal_id, date)
+    )
+    """)
+
+    # ===============================
+    # LIMIT EVENTS (hits & edits)
+    # ===============================
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS limit_events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        app_name TEXT NOT NULL,
+        event_type TEXT NOT NULL,
+        old_value INTEGER,
+        new_value INTEGER,
+        timestamp TEXT NOT NULL,
+        date TEXT NOT NULL
+    )
+    """)
+
+    # ===============================
+    # INDEXES (Performance)
+    # ===============================
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_daily_date ON daily_stats(date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_daily_active ON daily_stats(active_seconds)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_limit_app ON app_limits(app_name)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_limit_blocked ON app_limits(is_blocked)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_blocked_app ON blocked_apps(app_name)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_goal_logs_date ON goal_logs(date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_limit_events_date ON limit_events(date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_limit_events_app ON limit_events(app_name)")
+
+
+# ==========================================================
+# v2 — dictionary-encoded activity storage
+# ==========================================================
+
+def _v2_activity_storage(conn):
+    # App / exe path, URL and window title strings are stored once in the
+    # dim_* tables; activity_facts only carries integer keys. The
+    # activity_logs VIEW joins them back for readers.
+    with _transaction(conn):
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS dim_apps (
+            id INTEGER PRIMARY KEY,
+            app_name TEXT NOT NULL,
+            exe_path TEXT NOT NULL DEFAULT '',
+            UNIQUE (app_name, exe_path)
+        )
+        """)
+
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS dim_urls (
+            id INTEGER PRIMARY KEY,
+            url TEXT NOT NULL UNIQUE
+        )
+        """)
+
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS dim_titles (
+            id INTEGER PRIMARY KEY,
+            title TEXT NOT NULL UNIQUE
+        )
+        """)
+
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS activity_facts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ts_epoch INTEGER,
+            day TEXT NOT NULL,
+            app_id INTEGER REFERENCES dim_apps(id),
+            pid INTEGER,
+            title_id INTEGER REFERENCES dim_titles(id),
+            url_id INTEGER REFERENCES dim_urls(id),
+            active_seconds INTEGER DEFAULT 0,
+            idle_seconds INTEGER DEFAULT 0,
+            keystrokes INTEGER DEFAULT 0,
+            clicks INTEGER DEFAULT 0
+        )
+        """)
+
+    # Databases created before the dimension tables have activity_logs as a
+    # real table — fold it into activity_facts before the view takes its name.
+    row = conn.execute("SELECT type FROM sqlite_master WHERE name = 'activity_logs'").fetchone()
+    if row and row[0] == "table":
+        encode_legacy_activity_logs(conn)
+
+    with _transaction(conn):
+        conn.execute("""
+        CREATE VIEW IF NOT EXISTS activity_logs AS
+        SELECT
+            f.id,
+            strftime('%Y-%m-%d %H:%M:%S', f.ts_epoch, 'unixepoch', 'localtime') AS timestamp,
+            a.app_name,
+            NULLIF(a.exe_path, '') AS exe_path,
+            f.pid,
+            t.title AS window_title,
+            u.url,
+            f.active_seconds,
+            f.idle_seconds,
+            f.keystrokes,
+            f.clicks,
+            f.ts_epoch,
+            f.day,
+            f.app_id,
+            f.title_id,
+            f.url_id
+        FROM activity_facts f
+        LEFT JOIN dim_apps a ON a.id = f.app_id
+        LEFT JOIN dim_titles t ON t.id = f.title_id
+        LEFT JOIN dim_urls u ON u.id = f.url_id
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_facts_day_app ON activity_facts(day, app_id, active_seconds)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_facts_day_epoch ON activity_facts(day, ts_epoch)")
+
+
+def encode_legacy_activity_logs(conn, chunk_rows: int = BACKFILL_CHUNK_ROWS) -> int:
+    """
+    Convert a legacy activity_logs TABLE into activity_facts + dim_* rows.
+
+    Distinct strings are interned first, then rows are copied in rowid
+    chunks (keeping their ids) so an interrupted run resumes where it
+    stopped. The legacy table is dropped and the file VACUUMed; the DB size
+    before and after is logged. Returns the number of rows copied.
+    """
+    before = _db_size_bytes(conn)
+
+    # Very old databases may predate these columns
+    for column in ("exe_path TEXT", "ts_epoch INTEGER", "day TEXT"):
+        _add_column(conn, "activity_logs", column)
+    backfill_activity_day(conn, chunk_rows)
+
+    with _transaction(conn):
+        conn.execute("""
+            INSERT OR IGNORE INTO dim_apps (app_name, exe_path)
+            SELECT DISTINCT app_name, COALESCE(exe_path, '')
+            FROM activity_logs WHERE app_name IS NOT NULL
+        """)
+        conn.execute("""
+            INSERT OR IGNORE INTO dim_urls (url)
+            SELECT DISTINCT url FROM activity_logs WHERE url IS NOT NULL
+        """)
+        conn.execute("""
+            INSERT OR IGNORE INTO dim_titles (title)
+            SELECT DISTINCT window_title FROM activity_logs WHERE window_title IS NOT NULL
+        """)
+
+    lo = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM activity_facts").fetchone()[0]
+    hi = conn.execute("SELECT COALESCE(MAX(id), 0) FROM activity_logs").fetchone()[0]
+    copied = 0
+    while lo <= hi:
+        with _transaction(conn):
+            cur = conn.execute("""
+                INSERT INTO activity_facts
+                    (id, ts_epoch, day, app_id, pid, title_id, url_id,
+                     active_seconds, idle_seconds, keystrokes, clicks)
+                SELECT l.id, l.ts_epoch, l.day, a.id, l.pid, t.id, u.id,
+                       l.active_seconds, l.idle_seconds, l.keystrokes, l.clicks
+                FROM activity_logs l
+                LEFT JOIN dim_apps a
+                    ON a.app_name = l.app_name AND a.exe_path = COALESCE(l.exe_path, '')
+                LEFT JOIN dim_titles t ON t.title = l.window_title
+                LEFT JOIN dim_urls u ON u.url = l.url
+                WHERE l.id >= ? AND l.id < ?
+            """, (lo, lo + chunk_rows))
+            copied += cur.rowcount
+        lo += chunk_rows
+
+    with _transaction(conn):
+        conn.execute("DROP TABLE activity_logs")
+
+    # The VACUUM below is the one chance to switch auto_vacuum for free (v4)
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    try:
+        conn.execute("VACUUM")
+    except sqlite3.Error as e:
+        print(f"[DB] VACUUM after activity_logs encoding failed: {e}")
+
+    after = _db_size_bytes(conn)
+    print(
+        f"[DB] Dictionary-encoded {copied} activity_logs rows: "
+        f"{before / 1_048_576:.1f} MB -> {after / 1_048_576:.1f} MB"
+    )
+    return copied
+
+
+def backfill_activity_day(conn, chunk_rows: int = BACKFILL_CHUNK_ROWS) -> int:
+    """
+    One-shot backfill of day / ts_epoch on a legacy activity_logs table, for
+    rows written before those columns existed. Runs as the first step of
+    encode_legacy_activity_logs().
+
+    Works through the table in rowid ranges of `chunk_rows`, one short
+    transaction per chunk, so a multi-GB history never holds the write lock
+    for long. Returns the number of rows updated.
+    """
+    row = conn.execute("SELECT MIN(id), MAX(id) FROM activity_logs WHERE day IS NULL").fetchone()
+    if not row or row[0] is None:
+        return 0
+
+    lo, hi = row
+    updated = 0
+    while lo <= hi:
+        with _transaction(conn):
+            # timestamp is local wall-clock time; the 'utc' modifier converts
+            # it to UTC before taking the epoch.
+            cur = conn.execute("""
+                UPDATE activity_logs
+                SET day = substr(timestamp, 1, 10),
+                    ts_epoch = CAST(strftime('%s', timestamp, 'utc') AS INTEGER)
+                WHERE id >= ? AND id < ? AND day IS NULL
+            """, (lo, lo + chunk_rows))
+            updated += cur.rowcount
+        lo += chunk_rows
+
+    if updated:
+        print(f"[DB] Backfilled day/ts_epoch on {updated} activity_logs rows")
+    return updated
+
+
+# ==========================================================
+# v3 — hourly rollup
+# ==========================================================
+
+def _v3_hourly_stats(conn):
+    with _transaction(conn):
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS hourly_stats (
+            day TEXT NOT NULL,
+            hour INTEGER NOT NULL,
+            app_name TEXT NOT NULL,
+            main_category TEXT NOT NULL DEFAULT 'other',
+            active INTEGER DEFAULT 0,
+            idle INTEGER DEFAULT 0,
+            keys INTEGER DEFAULT 0,
+            clicks INTEGER DEFAULT 0,
+            PRIMARY KEY (day, hour, app_name, main_category)
+        ) WITHOUT ROWID
+        """)
+    backfill_hourly_stats(conn)
+
+
+def backfill_hourly_stats(conn, chunk_rows: int = BACKFILL_CHUNK_ROWS) -> int:
+    """
+    Seed hourly_stats from activity_logs when the rollup is first created.
+
+    Skipped while hourly_stats already has rows, so re-running it after an
+    interruption never double counts. Each raw row is attributed to the hour
+    of its timestamp (the same bucketing the routes used before the rollup).
+    Returns the number of raw rows folded in.
+    """
+    from src.config.category_manager import get_category
+
+    if conn.execute("SELECT 1 FROM hourly_stats LIMIT 1").fetchone():
+        return 0
+    row = conn.execute("SELECT MIN(id), MAX(id) FROM activity_facts").fetchone()
+    if not row or row[0] is None:
+        return 0
+
+    lo, hi = row
+    folded = 0
+    # One transaction for the whole seed: a partial seed would make the
+    # "table is empty" probe skip the rest on the next start.
+    with _transaction(conn):
+        while lo <= hi:
+            grouped = conn.execute("""
+                SELECT day, CAST(strftime('%H', timestamp) AS INTEGER), app_name, url,
+                       SUM(active_seconds), SUM(idle_seconds), SUM(keystrokes), SUM(clicks), COUNT(*)
+                FROM activity_logs
+                WHERE id >= ? AND id < ? AND app_name IS NOT NULL
+                GROUP BY 1, 2, 3, 4
+            """, (lo, lo + chunk_rows)).fetchall()
+
+            buckets = {}
+            for day, hour, app_name, url, act, idl, keys, clicks, count in grouped:
+                main_cat, _ = get_category(app_name, url)
+                key = (day, hour, app_name, main_cat)
+                totals = buckets.setdefault(key, [0, 0, 0, 0])
+                totals[0] += act or 0
+                totals[1] += idl or 0
+                totals[2] += keys or 0
+                totals[3] += clicks or 0
+                folded += count
+
+            conn.executemany("""
+                INSERT INTO hourly_stats
+                    (day, hour, app_name, main_category, active, idle, keys, clicks)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(day, hour, app_name, main_category)
+                DO UPDATE SET
+                    active = active + excluded.active,
+                    idle   = idle   + excluded.idle,
+                    keys   = keys   + excluded.keys,
+                    clicks = clicks + excluded.clicks
+            """, [(*key, *totals) for key, totals in buckets.items()])
+            lo += chunk_rows
+
+    if folded:
+        print(f"[DB] Seeded hourly_stats from {folded} activity_logs rows")
+    return folded
+
+
+# ==========================================================
+# v4 — incremental auto_vacuum
+# ==========================================================
+
+def _v4_incremental_auto_vacuum(conn):
+    # auto_vacuum can only change on an empty DB or via a full VACUUM; v2
+    # already does that for converted legacy databases.
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+        return
+    before = _db_size_bytes(conn)
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute("VACUUM")
+    print(
+        f"[DB] Switched to auto_vacuum=INCREMENTAL: "
+        f"{before / 1_048_576:.1f} MB -> {_db_size_bytes(conn) / 1_048_576:.1f} MB"
+    )
+
+
+# ==========================================================
+# v5 — retention tiers
+# ==========================================================
+
+def _v5_retention_tiers(conn):
+    # Per-day domain totals, folded from raw rows before the raw tier is
+    # deleted so /api/site-stats can still answer for older days.
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS domain_stats (
+        day TEXT NOT NULL,
+        domain TEXT NOT NULL,
+        app_name TEXT NOT NULL,
+        active_seconds INTEGER DEFAULT 0,
+        PRIMARY KEY (day, domain, app_name)
+    ) WITHOUT ROWID
+    """)
+
+    # First day each tier still fully covers; days before it are served by
+    # the next coarser tier (see src/database/tiers.py).
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS tier_horizons (
+        tier TEXT PRIMARY KEY,
+        first_day TEXT NOT NULL
+    )
+    """)
+
+
+# ==========================================================
+# v6 — ignored apps
+# ==========================================================
+
+def _v6_ignored_apps(conn):
+    # Mirror of ignored_apps.json (lowercased, ".exe" stripped) so analytics
+    # queries can drop ignored apps with a primary-key anti-join instead of
+    # returning every app to Python. Synced at startup and on file change.
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS ignored_apps (
+        app_key TEXT PRIMARY KEY
+    ) WITHOUT ROWID
+    """)
+
+
+# ==========================================================
+# v7 — limit rules
+# ==========================================================
+
+def _v7_limit_rules(conn):
+    # Category / domain / app limits with an optional weekday + time-of-day
+    # schedule (see src/services/limit_rules.py). A NULL daily_limit_seconds
+    # blocks for the whole scheduled window.
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS limit_rules (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        scope TEXT NOT NULL CHECK (scope IN ('app', 'category', 'domain')),
+        target TEXT NOT NULL,
+        daily_limit_seconds INTEGER,
+        days INTEGER NOT NULL DEFAULT 127,
+        start_minute INTEGER,
+        end_minute INTEGER,
+        is_enabled INTEGER NOT NULL DEFAULT 1,
+        created_at TEXT NOT NULL
+    )
+    """)
+
+
+def _v8_focus_daily(conn):
+    # Focus scores of finished days (see src/analytics/focus_score.py), kept
+    # with the totals they were computed from: a row is only reused while the
+    # day's daily_stats still add up to the same active / idle / keystrokes,
+    # and it outlives the raw rows its switch penalty and flow bonus need.
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS focus_daily (
+        date TEXT PRIMARY KEY,
+        score INTEGER NOT NULL,
+        deep_work_seconds INTEGER NOT NULL,
+        flow_bonus INTEGER NOT NULL,
+        engagement_score REAL NOT NULL,
+        switch_penalty REAL NOT NULL,
+        idle_penalty REAL NOT NULL,
+        active_seconds INTEGER NOT NULL,
+        idle_seconds INTEGER NOT NULL,
+        keystrokes INTEGER NOT NULL,
+        computed_at TEXT NOT NULL
+    )
+    """)
+
+
+def _v9_weekly_stats(conn):
+    # daily_stats per (week, app, category), for the weekly report; kept in
+    # step by src/analytics/weekly_summary.py. day_mask has bit N set for
+    # the Nth weekday (Monday = 0) with rows; (date, app, category) is
+    # unique in daily_stats, so summing the bits ORs them.
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS weekly_stats (
+        week_start TEXT NOT NULL,
+        app_name TEXT NOT NULL,
+        main_category TEXT NOT NULL,
+        active_seconds INTEGER NOT NULL DEFAULT 0,
+        idle_seconds INTEGER NOT NULL DEFAULT 0,
+        sessions INTEGER NOT NULL DEFAULT 0,
+        keystrokes INTEGER NOT NULL DEFAULT 0,
+        clicks INTEGER NOT NULL DEFAULT 0,
+        day_mask INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (week_start, app_name, main_category)
+    )
+    """)
+    conn.execute("""
+    INSERT OR IGNORE INTO weekly_stats
+        (week_start, app_name, main_category,
+         active_seconds, idle_seconds, sessions, keystrokes, clicks, day_mask)
+    SELECT date(date, '-' || ((CAST(strftime('%w', date) AS INTEGER) + 6) % 7) || ' days'),
+           app_name, main_category,
+           SUM(active_seconds), SUM(idle_seconds), SUM(sessions), SUM(keystrokes), SUM(clicks),
+           SUM(1 << ((CAST(strftime('%w', date) AS INTEGER) + 6) % 7))
+    FROM daily_stats
+    GROUP BY 1, app_name, main_category
+    """)
+
+
+def _v10_report_snapshots(conn):
+    # Finished weekly reports (see src/analytics/report_snapshots.py), one
+    # JSON payload per week and verbosity. A row is only served while its
+    # data_version matches the current one; stale rows are overwritten or
+    # deleted when the version moves on.
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS report_snapshots (
+        week_start TEXT NOT NULL,
+        verbosity TEXT NOT NULL,
+        data_version INTEGER NOT NULL,
+        payload TEXT NOT NULL,
+        generated_at TEXT NOT NULL,
+        PRIMARY KEY (week_start, verbosity)
+    )
+    """)
+
+
+# ==========================================================
+# Runner
+# ==========================================================
+
+MIGRATIONS = (
+    Migration(1, "core tables", _v1_core_tables),
+    Migration(2, "dictionary-encoded activity storage", _v2_activity_storage, transactional=False),
+    Migration(3, "hourly_stats rollup", _v3_hourly_stats, transactional=False),
+    Migration(4, "incremental auto_vacuum", _v4_incremental_auto_vacuum, transactional=False),
+    Migration(5, "retention tiers", _v5_retention_tiers),
+    Migration(6, "ignored_apps mirror", _v6_ignored_apps),
+    Migration(7, "limit rules", _v7_limit_rules),
+    Migration(8, "focus_daily", _v8_focus_daily),
+    Migration(9, "weekly_stats rollup", _v9_weekly_stats),
+    Migration(10, "report snapshots", _v10_report_snapshots),
+)
+
+SCHEMA_VERSION = MIGRATIONS[-1].version
+
+
+def get_schema_version(conn) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn, target: int = SCHEMA_VERSION) -> list[int]:
+    """
+    Apply every migration above the database's user_version, up to `target`.
+    Returns the versions that were applied (empty when already current).
+    """
+    current = get_schema_version(conn)
+    if current > SCHEMA_VERSION:
+        print(f"[DB] Database schema v{current} is newer than this build (v{SCHEMA_VERSION}); skipping migrations")
+        return []
+
+    applied = []
+    for step in MIGRATIONS:
+        if step.version <= current or step.version > target:
+            continue
+
+        if step.transactional:
+            with _transaction(conn):
+                step.apply(conn)
+                conn.execute(f"PRAGMA user_version = {step.version}")
+        else:
+            step.apply(conn)
+            conn.execute(f"PRAGMA user_version = {step.version}")
+
+        print(f"[DB] Applied migration v{step.version}: {step.name}")
+        applied.append(step.version)
+
+    return applied
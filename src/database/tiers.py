@@ -0,0 +1,197 @@
+"""
+tiers.py
+────────
+Tiered retention: raw activity → hourly rollup → daily rollup.
+
+  raw     activity_facts, file_logs      every flushed session (URLs, titles)
+  archive archive/activity-YYYY-MM.db    closed months of raw rows (optional)
+  hourly  hourly_stats                   per app, per category, per clock hour
+  daily   daily_stats, domain_stats      per app / per domain, per day
+          weekly_stats                   per app, per week (kept with daily)
+
+Each tier keeps its own number of days (``get_retention_policy()`` in
+database.py). Before a day leaves a tier it is downsampled into the next
+coarser one, and the tier's horizon in ``tier_horizons`` is moved past it
+*before* its rows are deleted — readers switch to the coarser tier first, so
+they never see a half-deleted day.
+
+Routes ask ``tier_for_day()`` which tier covers a date instead of guessing
+from the retention settings. Raw and archive answer the same SQL, so
+``raw_connection()`` hands back whichever connection holds the day:
+
+  tier = tier_for_day(conn, selected_date)
+  if tier in ("raw", "archive"):
+      with raw_connection(conn, tier, selected_date) as source:
+          ...  # activity_logs
+  elif tier == "hourly":
+      ...  # hourly_stats
+"""
+
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+from src.analytics.weekly_summary import rollup_day
+from src.config.category_manager import get_category
+from src.database import archive
+
+# Finest first. The archive has no horizon of its own: it covers whichever
+# months have an archive file.
+TIERS = ("raw", "archive", "hourly", "daily")
+
+
+def domain_of(url: str | None) -> str | None:
+    """Normalised domain for site stats, or None for URLs that are not sites."""
+    if not url or url == "N/A":
+        return None
+    try:
+        parsed = urlparse(url)
+    except ValueError:
+        return None
+
+    domain = (parsed.netloc or parsed.path).lower().replace("www.", "")
+    if not domain or "reply" in domain or ".." in domain:
+        return None
+    return domain
+
+
+# ==========================================================
+# Horizons
+# ==========================================================
+
+def get_horizons(conn) -> dict:
+    """{tier: first_day} for every tier that has been trimmed at least once."""
+    return dict(conn.execute("SELECT tier, first_day FROM tier_horizons").fetchall())
+
+
+def tier_for_day(conn, day: str) -> str:
+    """Finest tier that still fully covers `day` (YYYY-MM-DD)."""
+    horizons = get_horizons(conn)
+    for tier in TIERS[:-1]:
+        if tier == "archive":
+            if archive.has_month(day[:7]):
+                return tier
+            continue
+        first_day = horizons.get(tier)
+        if first_day is None or day >= first_day:
+            return tier
+    return TIERS[-1]
+
+
+@contextmanager
+def raw_connection(conn, tier: str, day: str):
+    """`conn` itself for the raw tier, the month's archive for the archive tier."""
+    if tier == "archive":
+        with archive.connection(day) as archive_conn:
+            yield archive_conn
+    else:
+        yield conn
+
+
+def advance_horizon(conn, tier: str, first_day: str):
+    """Move a tier's horizon forward to `first_day` (never backwards)."""
+    conn.execute("""
+        INSERT INTO tier_horizons (tier, first_day)
+        VALUES (?, ?)
+        ON CONFLICT(tier)
+        DO UPDATE SET first_day = MAX(first_day, excluded.first_day)
+    """, (tier, first_day))
+
+
+# ==========================================================
+# Downsampling
+# ==========================================================
+
+def _has_rows(conn, table: str, column: str, day: str) -> bool:
+    return conn.execute(f"SELECT 1 FROM {table} WHERE {column} = ? LIMIT 1", (day,)).fetchone() is not None
+
+
+def downsample_raw_day(conn, day: str) -> int:
+    """
+    Fold one day of raw rows into the coarser tiers before they are deleted.
+
+    hourly_stats and daily_stats are maintained live by the logger, so they
+    are only rebuilt here when a day has no rows at all (history recorded
+    before the rollup existed). domain_stats only ever comes from here.
+    Returns the number of raw rows read.
+    """
+    grouped = conn.execute("""
+        SELECT CAST(strftime('%H', timestamp) AS INTEGER), app_name, url,
+               SUM(active_seconds), SUM(idle_seconds), SUM(keystrokes), SUM(clicks), COUNT(*)
+        FROM activity_logs
+        WHERE day = ? AND app_name IS NOT NULL
+        GROUP BY 1, 2, 3
+    """, (day,)).fetchall()
+    if not grouped:
+        return 0
+
+    need_hourly = not _has_rows(conn, "hourly_stats", "day", day)
+    need_daily = not _has_rows(conn, "daily_stats", "date", day)
+
+    hourly, daily, domains = {}, {}, {}
+    categories = {}
+    rows_read = 0
+    for hour, app_name, url, act, idl, keys, clicks, count in grouped:
+        act, idl, keys, clicks = act or 0, idl or 0, keys or 0, clicks or 0
+        rows_read += count
+
+        domain = domain_of(url)
+        if domain and act:
+            domains[(domain, app_name)] = domains.get((domain, app_name), 0) + act
+
+        if not (need_hourly or need_daily):
+            continue
+
+        if (app_name, url) not in categories:
+            categories[(app_name, url)] = get_category(app_name, url)
+        main_cat, sub_cat = categories[(app_name, url)]
+
+        h = hourly.setdefault((hour, app_name, main_cat), [0, 0, 0, 0])
+        h[0] += act; h[1] += idl; h[2] += keys; h[3] += clicks
+
+        d = daily.setdefault((app_name, main_cat), [sub_cat, 0, 0, 0, 0, 0])
+        d[1] += act; d[2] += idl; d[3] += count; d[4] += keys; d[5] += clicks
+
+    if need_hourly:
+        conn.executemany("""
+            INSERT OR REPLACE INTO hourly_stats
+                (day, hour, app_name, main_category, active, idle, keys, clicks)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, [(day, *key, *totals) for key, totals in hourly.items()])
+
+    if need_daily:
+        conn.executemany("""
+            INSERT OR REPLACE INTO daily_stats
+                (date, app_name, main_category, sub_category,
+                 active_seconds, idle_seconds, sessions, keystrokes, clicks)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, [(day, *key, *totals) for key, totals in daily.items()])
+        rollup_day(conn, day)
+
+    conn.executemany("""
+        INSERT OR REPLACE INTO domain_stats (day, domain, app_name, active_seconds)
+        VALUES (?, ?, ?, ?)
+    """, [(day, domain, app_name, seconds) for (domain, app_name), seconds in domains.items()])
+
+    return rows_read
+
+
+def downsample_hourly_day(conn, day: str) -> int:
+    """
+    Make sure daily_stats covers `day` before its hourly rows are deleted.
+    Session counts are not kept hourly; each active hour counts as one.
+    Returns the number of daily rows written.
+    """
+    if _has_rows(conn, "daily_stats", "date", day):
+        return 0
+    written = conn.execute("""
+        INSERT OR REPLACE INTO daily_stats
+            (date, app_name, main_category,
+             active_seconds, idle_seconds, sessions, keystrokes, clicks)
+        SELECT day, app_name, main_category,
+               SUM(active), SUM(idle), COUNT(*), SUM(keys), SUM(clicks)
+        FROM hourly_stats
+        WHERE day = ?
+        GROUP BY app_name, main_category
+    """, (day,)).rowcount
+    rollup_day(conn, day)
+    return written
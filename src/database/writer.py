@@ -0,0 +1,208 @@
+"""
+writer.py
+─────────
+Write-behind queue drained by a single writer thread.
+
+Small fire-and-forget mutations (settings, goal progress snapshots, limit
+events) are queued as *write intents* instead of each caller opening its own
+``BEGIN IMMEDIATE`` and competing for the SQLite write lock. The
+``DatabaseWriter`` thread owns one pooled connection, drains whatever has
+queued up (up to ``max_batch`` intents) and commits it as ONE transaction.
+
+Every intent runs inside its own SAVEPOINT, so a failing intent is rolled
+back and reported on its future without discarding the rest of the batch.
+Futures are resolved only after the batch has committed, so waiting on one
+guarantees the row is visible to other connections.
+
+The queue is bounded: when it is full, ``submit()`` blocks the caller until
+the writer catches up (back-pressure rather than unbounded memory).
+
+Usage
+-----
+  from src.database.database import writer
+
+  writer.execute("INSERT INTO ...", params)          # fire and forget
+  rowid = writer.execute("INSERT ...", params).result()
+  writer.submit(lambda conn: conn.execute(...))      # arbitrary fn(conn)
+  writer.flush()                                     # wait for the backlog
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+_STOP = object()
+
+
+class WriteBehindQueue:
+    def __init__(self, manager, max_pending: int = 10_000, max_batch: int = 256):
+        self._db = manager
+        self._max_batch = max_batch
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._thread: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+        self._stats = {
+            "submitted": 0,
+            "batches": 0,
+            "committed": 0,
+            "failed": 0,
+            "max_queue_depth": 0,
+            "last_batch_size": 0,
+            "max_batch_size": 0,
+            "last_commit_ms": 0.0,
+            "max_commit_ms": 0.0,
+            "total_commit_ms": 0.0,
+        }
+
+    # ------------------------------------------------------------------
+    # Producer side
+    # ------------------------------------------------------------------
+    def submit(self, fn) -> Future:
+        """
+        Queue ``fn(conn)`` to run on the writer thread. The returned future
+        resolves to ``fn``'s return value once its batch has committed.
+        """
+        future: Future = Future()
+
+        # Called from inside another intent: run inline in the current batch
+        if threading.current_thread() is self._thread:
+            with self._db.connection() as conn:
+                try:
+                    future.set_result(fn(conn))
+                except Exception as e:
+                    future.set_exception(e)
+            return future
+
+        self._ensure_started()
+        self._queue.put((fn, future))
+
+        depth = self._queue.qsize()
+        with self._stats_lock:
+            self._stats["submitted"] += 1
+            if depth > self._stats["max_queue_depth"]:
+                self._stats["max_queue_depth"] = depth
+        return future
+
+    def execute(self, sql: str, params=()) -> Future:
+        """Queue a single statement; the future resolves to ``lastrowid``."""
+        return self.submit(lambda conn: conn.execute(sql, params).lastrowid)
+
+    def executemany(self, sql: str, seq_of_params) -> Future:
+        """Queue an executemany; the future resolves to ``rowcount``."""
+        rows = list(seq_of_params)
+        return self.submit(lambda conn: conn.executemany(sql, rows).rowcount)
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Block until everything queued so far has committed."""
+        if self._thread is None or threading.current_thread() is self._thread:
+            return True
+        try:
+            self.submit(lambda conn: None).result(timeout)
+            return True
+        except FutureTimeout:
+            return False
+
+    def stop(self, timeout: float = 5.0):
+        """Drain the queue and stop the writer thread (called on shutdown)."""
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+
+    # ------------------------------------------------------------------
+    # Writer thread
+    # ------------------------------------------------------------------
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, daemon=True, name="DatabaseWriter")
+            self._thread.start()
+
+    def _run(self):
+        with self._db.connection() as conn:
+            while True:
+                item = self._queue.get()
+                if item is _STOP:
+                    return
+
+                batch = [item]
+                stop_after = False
+                while len(batch) < self._max_batch:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is _STOP:
+                        stop_after = True
+                        break
+                    batch.append(item)
+
+                self._commit(conn, batch)
+                if stop_after:
+                    return
+
+    def _commit(self, conn, batch):
+        started = time.perf_counter()
+        live = [(fn, future) for fn, future in batch if future.set_running_or_notify_cancel()]
+        outcomes = []
+        try:
+            with self._db.transaction():
+                for fn, future in live:
+                    conn.execute("SAVEPOINT write_intent")
+                    try:
+                        value = fn(conn)
+                    except Exception as e:
+                        conn.execute("ROLLBACK TO write_intent")
+                        conn.execute("RELEASE write_intent")
+                        outcomes.append((future, False, e))
+                    else:
+                        conn.execute("RELEASE write_intent")
+                        outcomes.append((future, True, value))
+        except Exception as e:
+            # BEGIN / COMMIT itself failed — nothing in the batch landed
+            print(f"[Writer] Batch of {len(live)} writes failed: {e}")
+            outcomes = [(future, False, e) for _, future in live]
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        failed = 0
+        for future, ok, value in outcomes:
+            if ok:
+                future.set_result(value)
+            else:
+                failed += 1
+                print(f"[Writer] Write failed: {value}")
+                future.set_exception(value)
+
+        with self._stats_lock:
+            s = self._stats
+            s["batches"] += 1
+            s["committed"] += len(outcomes) - failed
+            s["failed"] += failed
+            s["last_batch_size"] = len(batch)
+            s["max_batch_size"] = max(s["max_batch_size"], len(batch))
+            s["last_commit_ms"] = elapsed_ms
+            s["max_commit_ms"] = max(s["max_commit_ms"], elapsed_ms)
+            s["total_commit_ms"] += elapsed_ms
+
+    # ------------------------------------------------------------------
+    def stats(self) -> dict:
+        """Queue depth, batch size and commit latency counters."""
+        with self._stats_lock:
+            s = dict(self._stats)
+        batches = s.pop("batches")
+        total_ms = s.pop("total_commit_ms")
+        s["queue_depth"] = self._queue.qsize()
+        s["batches"] = batches
+        s["avg_batch_size"] = round((s["committed"] + s["failed"]) / batches, 2) if batches else 0
+        s["avg_commit_ms"] = round(total_ms / batches, 3) if batches else 0
+        s["last_commit_ms"] = round(s["last_commit_ms"], 3)
+        s["max_commit_ms"] = round(s["max_commit_ms"], 3)
+        s["running"] = self._thread is not None and self._thread.is_alive()
+        return s
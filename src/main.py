@@ -10,7 +10,7 @@ from src.core.app_controller import AppController
 from src.core.file_monitor import file_monitor_controller
 from src.core.single_instance import ensure_single_instance
 from src.core.startup import add_to_startup, ensure_notification_identity
-from src.database.database import init_db
+from src.database.database import init_db, writer
 from src.services.blocking_service import BlockingService
 from src.services.update_manager import UpdateManager
 from src.utils.logger import setup_logger
@@ -94,6 +94,10 @@ def main():
     from src.core.settings_cache import settings_cache
     settings_cache.warm()
 
+    # Reload ignored_apps.json / app_categories.json when they change on disk
+    from src.config.config_registry import config_registry
+    config_registry.start()
+
     # One-time self-heal for Windows notification attribution (shortcut + AUMID).
     if os.name == "nt":
         if getattr(sys, "frozen", False):
@@ -147,16 +151,21 @@ def main():
 
     logger.info("Shutdown event set. Waiting for threads to conclude...")
     
-    # Stop listeners manually (from activity_logger)
+    # Stop input listeners / URL resolver (the platform backend)
     try:
-        from src.core.activity_logger import input_tracker
-        input_tracker.stop()
+        from src.core.platform import get_backend
+        get_backend().stop()
     except Exception:
         pass
 
+    config_registry.stop()
+
     # Give threads a few seconds to finish their cleanup
     for t in threads:
         t.join(timeout=3)
+
+    # Commit whatever is still queued for the database writer
+    writer.stop()
     
     logger.info("Stasis has shut down gracefully.")
 
@@ -1,16 +1,22 @@
 import threading
 import time
 import psutil
-from datetime import datetime
+from datetime import datetime, timedelta
 
+from src.analytics.goal_engine import goal_engine
+from src.analytics.live_today import TodayAggregate, UsageCounters, today_stats
 from src.database.database import get_blocked_app_names
 from src.core.desktop_notifications import desktop_notifier
-from src.config.ignored_apps_manager import is_ignored
+from src.core.process_table import process_table
+from src.config.ignored_apps_manager import not_ignored
 from src.config.settings_manager import SettingsManager
 from src.config.category_manager import get_category
+from src.services.limit_rules import CompiledRules, RuleBlock, format_minute
 
-LIMIT_CHECK_INTERVAL = 15
-PROCESS_CHECK_INTERVAL = 2
+# The monitor sleeps until the next predicted block-state change, within these bounds
+LIMIT_MIN_WAIT = 1
+LIMIT_MAX_WAIT = 60
+GOAL_CHECK_INTERVAL = 60
 
 
 class BlockingService:
@@ -30,10 +36,17 @@ class BlockingService:
 
         self.running = False
         self.blocked_apps = set()
+        # Apps / categories blocked by limit_rules; checked against every new process
+        self.rule_block = RuleBlock()
         self._blocked_apps_lock = threading.Lock()
+        # Compiled limit_rules; None = (re)load on the next cycle
+        self._rules: CompiledRules | None = None
+        self.rule_state = set()
+        # rule id -> RuleMatch from the last cycle (for /limits/rules)
+        self.rule_matches = {}
 
         self.limit_thread = None
-        self.guard_thread = None
+        self._wake = threading.Event()
         self.last_goal_check_ts = 0.0
         self.goal_state = {}
 
@@ -56,205 +69,302 @@ class BlockingService:
             daemon=True,
             name="LimitMonitor"
         )
-        self.guard_thread = threading.Thread(
-            target=self._process_guard,
-            daemon=True,
-            name="ProcessGuard"
-        )
+
+        # Process guard: react to processes as the shared table sees them start
+        process_table.subscribe(self._on_processes_started)
+        process_table.start()
+        self._kill_running(self.blocked_apps)
 
         self.limit_thread.start()
-        self.guard_thread.start()
 
         print("Blocking Service started")
 
     def stop(self):
         self.running = False
+        self._wake.set()
 
     def force_reblock(self, app_name: str):
         with self._blocked_apps_lock:
             self.blocked_apps.add(app_name)
+        self._kill_running({app_name})
+        self.wake()
 
     def force_unblock(self, app_name: str):
         with self._blocked_apps_lock:
             self.blocked_apps.discard(app_name)
+        self.wake()
 
     # ─── LIMIT MONITOR ────────────────────────────────────────────────────────
+    def wake(self):
+        """Re-evaluate limits now (a limit, pause or unblock just changed)."""
+        self._wake.set()
+
+    def reload_rules(self):
+        """Recompile limit_rules on the next cycle, which starts now."""
+        self._rules = None
+        self.wake()
+
     def _limit_monitor(self):
         """
-        Evaluates app usage against limits every LIMIT_CHECK_INTERVAL seconds.
-
-        Key design: all reads + writes for ONE cycle share a SINGLE connection
-        and are committed in ONE transaction. Previously, each helper function
-        (clear_expired_unblocks, get_all_limits, get_today_usage,
-        add/remove_blocked_app) opened its own connection — up to 8 per cycle —
-        which raced with Flask API writes and caused 'database is locked'.
+        Evaluates app usage against limits and sleeps until the next time a
+        block state can change.
+
+        Usage comes from today_stats, the per-app counters the logger feeds
+        on every flush and tick (live session included) — no usage query per
+        app per cycle. Because an app's usage grows by at most one second per
+        second, nothing can hit its limit before the smallest remaining
+        (limit - usage); the monitor wakes exactly then, or earlier for an
+        unblock window ending, midnight, the once-a-minute goal checks, or a
+        wake() from the limits API. Rows in app_limits / blocked_apps are
+        only written when an app's block state actually changes.
+
+        limit_rules (category / domain / scheduled limits) are compiled once
+        and evaluated against the same counters; their matches join the
+        blocked set and their time-window boundaries join the wake-up.
         """
-        from src.database.database import get_connection
+        from src.database.database import db
 
         while self.running:
+            wait = LIMIT_MAX_WAIT
             try:
                 now = datetime.now()
-                now_iso = now.isoformat()
                 today = now.date().isoformat()
 
-                conn = get_connection()
-                try:
+                with db.connection() as conn:
                     cursor = conn.cursor()
 
-                    # 1. Expire any temporary unblocks in one shot
                     cursor.execute("""
-                        UPDATE app_limits
-                        SET unblock_until = NULL
-                        WHERE unblock_until IS NOT NULL
-                          AND unblock_until <= ?
-                    """, (now_iso,))
-
-                    # 2. Fetch all limits (single read)
-                    cursor.execute("""
-                        SELECT app_name, daily_limit_seconds, is_enabled, unblock_until
+                        SELECT app_name, daily_limit_seconds, is_enabled, unblock_until, is_blocked
                         FROM app_limits
                     """)
                     limits = cursor.fetchall()
+                    cursor.execute("SELECT app_name FROM blocked_apps")
+                    stored_blocked = {row[0] for row in cursor.fetchall()}
 
-                    new_blocked = set()
-
-                    for app_name, daily_limit, is_enabled, unblock_until in limits:
-
-                        # Paused limit → never blocked
-                        if not is_enabled:
-                            cursor.execute(
-                                """
-                                UPDATE app_limits
-                                SET is_blocked = 0,
-                                    blocked_at = NULL
-                                WHERE app_name = ?
-                                """,
-                                (app_name,)
-                            )
-                            cursor.execute("DELETE FROM blocked_apps WHERE app_name = ?", (app_name,))
-                            continue
-
-                        # Still within a temporary unblock window
-                        if unblock_until:
-                            try:
-                                if now < datetime.fromisoformat(unblock_until):
-                                    cursor.execute(
-                                        """
-                                        UPDATE app_limits
-                                        SET is_blocked = 0,
-                                            blocked_at = NULL
-                                        WHERE app_name = ?
-                                        """,
-                                        (app_name,)
-                                    )
-                                    cursor.execute("DELETE FROM blocked_apps WHERE app_name = ?", (app_name,))
-                                    continue
-                            except Exception:
-                                pass
-
-                        # 3. Today's usage for this app (same connection, no extra open/close)
+                    if self._rules is None:
                         cursor.execute("""
-                            SELECT COALESCE(SUM(active_seconds), 0)
-                            FROM activity_logs
-                            WHERE app_name = ? AND timestamp LIKE ?
-                        """, (app_name, f"{today}%"))
-                        usage = cursor.fetchone()[0] or 0
-
-                        if usage >= daily_limit:
-                            # Log limit hit event if newly blocked
-                            was_blocked = app_name in self.blocked_apps
-                            now_str = now.isoformat()
-                            cursor.execute(
-                                """
-                                UPDATE app_limits
-                                SET is_blocked = 1,
-                                    blocked_at = ?
-                                WHERE app_name = ?
-                                """,
-                                (now_str, app_name)
-                            )
-                            cursor.execute(
-                                "INSERT OR REPLACE INTO blocked_apps (app_name, blocked_at) VALUES (?, ?)",
-                                (app_name, now_str)
-                            )
-                            new_blocked.add(app_name)
-                            if not was_blocked:
-                                try:
-                                    from src.database.database import log_limit_event
-                                    log_limit_event(app_name, "hit", old_value=daily_limit, new_value=usage)
-                                except Exception:
-                                    pass
-                                over_by = max(0, int(usage - daily_limit))
-                                over_mins = int(round(over_by / 60))
-                                desktop_notifier.notify(
-                                    title="App limit reached",
-                                    message=(
-                                        f"{app_name}: {int(usage // 60)} min used "
-                                        f"(limit {int(daily_limit // 60)} min"
-                                        f"{', +' + str(over_mins) + ' min' if over_mins > 0 else ''})."
-                                    ),
-                                    event_key=f"limit-hit:{today}:{app_name}",
-                                    cooldown_seconds=60,
-                                    event_type=desktop_notifier.EVENT_LIMIT,
-                                    priority="critical",
-                                    actions=[
-                                        ("Snooze 15m", desktop_notifier.build_action_url("snooze-limit", minutes=15)),
-                                        ("Snooze 1h", desktop_notifier.build_action_url("snooze-limit", minutes=60)),
-                                        ("Extend 10m", desktop_notifier.build_action_url("extend-limit", app=app_name, minutes=10)),
-                                        ("Keep blocked", desktop_notifier.build_action_url("keep-blocked", app=app_name)),
-                                    ],
-                                    launch_url=desktop_notifier.build_action_url("open-limits"),
-                                )
-                        else:
-                            cursor.execute(
-                                """
-                                UPDATE app_limits
-                                SET is_blocked = 0,
-                                    blocked_at = NULL
-                                WHERE app_name = ?
-                                """,
-                                (app_name,)
-                            )
-                            cursor.execute("DELETE FROM blocked_apps WHERE app_name = ?", (app_name,))
-
-                    # Single commit for the entire cycle
-                    conn.commit()
-
-                    # Evaluate goal thresholds at most once per minute (same DB connection).
+                            SELECT id, scope, target, daily_limit_seconds, days, start_minute, end_minute, is_enabled
+                            FROM limit_rules
+                        """)
+                        self._rules = CompiledRules(cursor.fetchall())
+
+                    counters = self._today_counters(today, bool(limits) or bool(self._rules))
+                    new_blocked, block, unblock, expired, wait = self._plan_limits(
+                        limits, stored_blocked, counters.apps, now
+                    )
+
+                    if block or unblock or expired:
+                        self._apply_limit_changes(cursor, db, now, today, block, unblock, expired)
+
+                    rules = self._rules.evaluate(now, counters)
+                    wait = min(wait, rules.wait)
+                    self._notify_rule_matches(rules.matches, today)
+                    self.rule_matches = {match.rule.id: match for match in rules.matches}
+
+                    # Evaluate goal thresholds at most once per minute.
                     now_ts = time.time()
-                    if now_ts - self.last_goal_check_ts >= 60:
-                        self._check_goal_notifications(cursor, today)
+                    if now_ts - self.last_goal_check_ts >= GOAL_CHECK_INTERVAL:
+                        self._check_goal_notifications(today)
                         self._check_daily_digest(cursor, now, today)
                         self.last_goal_check_ts = now_ts
+                    wait = min(wait, self.last_goal_check_ts + GOAL_CHECK_INTERVAL - now_ts)
 
+                    new_blocked |= rules.blocked_apps
                     with self._blocked_apps_lock:
+                        newly_blocked = new_blocked - self.blocked_apps
                         self.blocked_apps = new_blocked
-
-                finally:
-                    conn.close()
+                        rule_block_changed = rules.block != self.rule_block
+                        self.rule_block = rules.block
+                    # Already-running instances; later launches arrive as start events
+                    self._kill_running(newly_blocked)
+                    if rule_block_changed and rules.block:
+                        for info in process_table.select(rules.block.matches):
+                            self._kill(info)
 
             except Exception as e:
                 if "locked" in str(e).lower():
                     time.sleep(0.2)
                     continue
                 print("LimitMonitor error:", e)
-            time.sleep(LIMIT_CHECK_INTERVAL)
 
-    def _check_goal_notifications(self, cursor, date: str):
-        cursor.execute(
-            """
-            SELECT id, goal_type, COALESCE(label, ''), target_value, target_unit, direction
-            FROM goals
-            WHERE is_active = 1
-            """
-        )
-        goals = cursor.fetchall()
+            self._wake.wait(max(LIMIT_MIN_WAIT, wait))
+            self._wake.clear()
 
-        if not goals:
-            return
+    @staticmethod
+    def _today_counters(today: str, needed: bool) -> UsageCounters:
+        """Today's per-app / category / host usage from the logger's live counters."""
+        if not needed:
+            return UsageCounters({}, {}, {})
+        counters = today_stats.counters(today)
+        if counters is not None:
+            return counters
+
+        # Logger hasn't loaded today yet (startup, just past midnight)
+        loaded = TodayAggregate()
+        loaded.load(today)
+        return loaded.counters(today)
 
-        for goal_id, goal_type, label, target_value, target_unit, direction in goals:
-            actual = self._compute_goal_actual(cursor, date, goal_type)
+    @staticmethod
+    def _plan_limits(limits, stored_blocked: set, usage: dict, now: datetime):
+        """
+        Desired block state for every limit, compared with what's stored.
+
+        Returns (blocked, block, unblock, expired, wait): the app names that
+        should be blocked; [(app, limit, usage)] to block and [app] to
+        unblock because their state changed; [app] whose unblock_until has
+        passed; and the seconds until any of this can change next.
+        """
+        blocked, block, unblock, expired = set(), [], [], []
+        midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+        wait = (midnight - now).total_seconds()
+
+        for app_name, daily_limit, is_enabled, unblock_until, is_blocked in limits:
+            want = False
+            if is_enabled:
+                until = None
+                if unblock_until:
+                    try:
+                        until = datetime.fromisoformat(unblock_until)
+                    except ValueError:
+                        pass
+                    if until is None or until <= now:
+                        expired.append(app_name)
+                        until = None
+
+                used = usage.get(app_name, 0)
+                if until is not None:
+                    # Still within a temporary unblock window
+                    wait = min(wait, (until - now).total_seconds())
+                elif used >= daily_limit:
+                    want = True
+                else:
+                    wait = min(wait, daily_limit - used)
+
+            if want:
+                blocked.add(app_name)
+                if not is_blocked or app_name not in stored_blocked:
+                    block.append((app_name, daily_limit, used))
+            elif is_blocked or app_name in stored_blocked:
+                unblock.append(app_name)
+
+        return blocked, block, unblock, expired, wait
+
+    def _apply_limit_changes(self, cursor, db, now: datetime, today: str, block, unblock, expired):
+        """Write the state changes from _plan_limits in one transaction; notify new blocks."""
+        now_iso = now.isoformat()
+        hits = []
+        with db.transaction():
+            for app_name in expired:
+                cursor.execute("""
+                    UPDATE app_limits
+                    SET unblock_until = NULL
+                    WHERE app_name = ? AND unblock_until <= ?
+                """, (app_name, now_iso))
+
+            for app_name in unblock:
+                cursor.execute(
+                    """
+                    UPDATE app_limits
+                    SET is_blocked = 0,
+                        blocked_at = NULL
+                    WHERE app_name = ?
+                    """,
+                    (app_name,)
+                )
+                cursor.execute("DELETE FROM blocked_apps WHERE app_name = ?", (app_name,))
+
+            for app_name, daily_limit, usage in block:
+                # Guarded so an unblock or pause that landed since the read wins
+                cursor.execute(
+                    """
+                    UPDATE app_limits
+                    SET is_blocked = 1,
+                        blocked_at = COALESCE(blocked_at, ?)
+                    WHERE app_name = ?
+                      AND is_enabled = 1
+                      AND (unblock_until IS NULL OR unblock_until <= ?)
+                    """,
+                    (now_iso, app_name, now_iso)
+                )
+                if not cursor.rowcount:
+                    continue
+                cursor.execute(
+                    "INSERT OR IGNORE INTO blocked_apps (app_name, blocked_at) VALUES (?, ?)",
+                    (app_name, now_iso)
+                )
+                hits.append((app_name, daily_limit, usage))
+
+        for app_name, daily_limit, usage in hits:
+            if app_name in self.blocked_apps:
+                continue
+            try:
+                from src.database.database import log_limit_event
+                log_limit_event(app_name, "hit", old_value=daily_limit, new_value=usage)
+            except Exception:
+                pass
+            over_by = max(0, int(usage - daily_limit))
+            over_mins = int(round(over_by / 60))
+            desktop_notifier.notify(
+                title="App limit reached",
+                message=(
+                    f"{app_name}: {int(usage // 60)} min used "
+                    f"(limit {int(daily_limit // 60)} min"
+                    f"{', +' + str(over_mins) + ' min' if over_mins > 0 else ''})."
+                ),
+                event_key=f"limit-hit:{today}:{app_name}",
+                cooldown_seconds=60,
+                event_type=desktop_notifier.EVENT_LIMIT,
+                priority="critical",
+                actions=[
+                    ("Snooze 15m", desktop_notifier.build_action_url("snooze-limit", minutes=15)),
+                    ("Snooze 1h", desktop_notifier.build_action_url("snooze-limit", minutes=60)),
+                    ("Extend 10m", desktop_notifier.build_action_url("extend-limit", app=app_name, minutes=10)),
+                    ("Keep blocked", desktop_notifier.build_action_url("keep-blocked", app=app_name)),
+                ],
+                launch_url=desktop_notifier.build_action_url("open-limits"),
+            )
+
+    def _notify_rule_matches(self, matches, today: str):
+        """One desktop notification per rule, day and reason the first time it matches."""
+        for match in matches:
+            rule = match.rule
+            key = (rule.id, today, match.reason)
+            if key in self.rule_state:
+                continue
+            self.rule_state.add(key)
+
+            site = rule.scope == "domain"
+            if match.reason == "limit":
+                title = "Site limit reached" if site else "Limit reached"
+                message = (
+                    f"{rule.label}: {int(match.usage // 60)} min used today "
+                    f"(limit {int(rule.daily_limit_seconds // 60)} min)."
+                )
+            else:
+                until = f" until {format_minute(rule.end_minute)}" if rule.end_minute is not None else ""
+                title = "Site schedule" if site else "Blocked by schedule"
+                message = f"{rule.label} is off-limits{until}."
+
+            desktop_notifier.notify(
+                title=title,
+                message=message,
+                event_key=f"limit-rule:{today}:{rule.id}:{match.reason}",
+                cooldown_seconds=60,
+                event_type=desktop_notifier.EVENT_LIMIT,
+                priority="normal" if site else "critical",
+                actions=[
+                    ("Snooze 15m", desktop_notifier.build_action_url("snooze-limit", minutes=15)),
+                    ("Snooze 1h", desktop_notifier.build_action_url("snooze-limit", minutes=60)),
+                ],
+                launch_url=desktop_notifier.build_action_url("open-limits"),
+            )
+
+        # Keep only today's state to avoid unbounded growth.
+        self.rule_state = {k for k in self.rule_state if k[1] == today}
+
+    def _check_goal_notifications(self, date: str):
+        for result in goal_engine.evaluate(date):
+            goal_id, goal_type, label, target_value, target_unit, direction, actual = result[:7]
             threshold_reached = actual >= target_value
 
             state_key = (goal_id, date)
@@ -301,73 +411,6 @@ class BlockingService:
         # Keep only today's state to avoid unbounded growth.
         self.goal_state = {k: v for k, v in self.goal_state.items() if k[1] == date}
 
-    @staticmethod
-    def _compute_goal_actual(cursor, date: str, goal_type: str) -> float:
-        if goal_type == "daily_screen_time":
-            cursor.execute(
-                """
-                SELECT app_name, COALESCE(SUM(active_seconds), 0)
-                FROM daily_stats
-                WHERE date = ?
-                GROUP BY app_name
-                """,
-                (date,),
-            )
-            return float(sum(active for app_name, active in cursor.fetchall() if not is_ignored(app_name)))
-
-        if goal_type == "daily_productive_time":
-            cursor.execute(
-                """
-                SELECT app_name, COALESCE(SUM(active_seconds), 0)
-                FROM daily_stats
-                WHERE date = ? AND main_category = 'productive'
-                GROUP BY app_name
-                """,
-                (date,),
-            )
-            return float(sum(active for app_name, active in cursor.fetchall() if not is_ignored(app_name)))
-
-        if goal_type == "daily_productivity_pct":
-            cursor.execute(
-                """
-                SELECT app_name, main_category, COALESCE(SUM(active_seconds), 0)
-                FROM daily_stats
-                WHERE date = ?
-                GROUP BY app_name, main_category
-                """,
-                (date,),
-            )
-            total = 0.0
-            productive = 0.0
-            for app_name, category, active in cursor.fetchall():
-                if is_ignored(app_name):
-                    continue
-                total += float(active or 0)
-                if category == "productive":
-                    productive += float(active or 0)
-            if total <= 0:
-                return 0.0
-            return round((productive / total) * 100, 1)
-
-        if goal_type == "daily_focus_score":
-            try:
-                cursor.execute(
-                    """
-                    SELECT focus_score
-                    FROM focus_sessions
-                    WHERE date = ?
-                    ORDER BY id DESC
-                    LIMIT 1
-                    """,
-                    (date,),
-                )
-                row = cursor.fetchone()
-                return float(row[0]) if row and row[0] is not None else 0.0
-            except Exception:
-                return 0.0
-
-        return 0.0
-
     @staticmethod
     def _format_target(value: float, unit: str) -> str:
         if unit == "seconds":
@@ -411,10 +454,10 @@ class BlockingService:
 
     def _build_daily_digest_summary(self, cursor, date: str) -> str | None:
         cursor.execute(
-            """
+            f"""
             SELECT app_name, main_category, COALESCE(SUM(active_seconds), 0)
             FROM daily_stats
-            WHERE date = ?
+            WHERE date = ? AND {not_ignored("app_name")}
             GROUP BY app_name, main_category
             """,
             (date,),
@@ -428,8 +471,6 @@ class BlockingService:
         distract_by_app: dict[str, float] = {}
 
         for app_name, main_category, seconds in rows:
-            if is_ignored(app_name):
-                continue
             secs = float(seconds or 0)
             total_active += secs
             if main_category == "productive":
@@ -490,13 +531,13 @@ class BlockingService:
     @staticmethod
     def _compute_best_productive_streak(cursor, date: str) -> float:
         cursor.execute(
-            """
+            f"""
             SELECT app_name, COALESCE(active_seconds, 0)
             FROM activity_logs
-            WHERE timestamp LIKE ?
-            ORDER BY timestamp ASC
+            WHERE day = ? AND {not_ignored("app_name")}
+            ORDER BY ts_epoch ASC
             """,
-            (f"{date}%",),
+            (date,),
         )
         rows = cursor.fetchall()
         if not rows:
@@ -505,8 +546,6 @@ class BlockingService:
         best = 0.0
         current = 0.0
         for app_name, active_seconds in rows:
-            if is_ignored(app_name):
-                continue
             main_category, _ = get_category(app_name, None)
             secs = float(active_seconds or 0)
             if secs <= 0:
@@ -520,34 +559,39 @@ class BlockingService:
         return best
 
     # ─── PROCESS GUARD ────────────────────────────────────────────────────────
-    def _process_guard(self):
+    def _on_processes_started(self, started):
         """
-        Scans running processes every PROCESS_CHECK_INTERVAL seconds and kills
-        any that match the in-memory blocked_apps set. No DB access here —
-        reads from the set updated by _limit_monitor.
-
-        Optimisation: takes a snapshot of the blocked set each cycle to avoid
-        racing with _limit_monitor, and skips the full process_iter entirely
-        when nothing is blocked.
+        Process-table subscriber: kill newly started processes whose name is
+        in the in-memory blocked_apps set (no DB access, no process scan).
         """
-        while self.running:
-            try:
-                # Snapshot — avoids racing with _limit_monitor updates
-                with self._blocked_apps_lock:
-                    blocked_snapshot = self.blocked_apps.copy()
-
-                if not blocked_snapshot:
-                    time.sleep(PROCESS_CHECK_INTERVAL)
-                    continue
-
-                for proc in psutil.process_iter(['name']):
-                    try:
-                        if proc.info['name'] in blocked_snapshot:
-                            proc.kill()
-                    except (psutil.NoSuchProcess, psutil.AccessDenied):
-                        continue
+        if not self.running:
+            return
+        # Snapshot — avoids racing with _limit_monitor updates
+        with self._blocked_apps_lock:
+            blocked_snapshot = self.blocked_apps.copy()
+            rule_block = self.rule_block
+        if not blocked_snapshot and not rule_block:
+            return
+        for info in started:
+            if info.name in blocked_snapshot or rule_block.matches(info.name):
+                self._kill(info)
 
-            except Exception as e:
-                print("ProcessGuard error:", e)
+    def _kill_running(self, app_names):
+        """Kill running instances of `app_names`, found in the process table snapshot."""
+        if not app_names:
+            return
+        for info in process_table.find(app_names):
+            self._kill(info)
 
-            time.sleep(PROCESS_CHECK_INTERVAL)
\ No newline at end of file
+    @staticmethod
+    def _kill(info):
+        try:
+            proc = psutil.Process(info.pid)
+            # The PID may have been reused since the table saw it
+            if info.create_time is not None and proc.create_time() != info.create_time:
+                return
+            proc.kill()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            pass
+        except Exception as e:
+            print("ProcessGuard error:", e)
@@ -0,0 +1,308 @@
+"""
+limit_rules.py
+──────────────
+Category, domain and schedule limits, compiled for the limit monitor.
+
+app_limits holds one daily budget per exact app_name. limit_rules rows add:
+
+  scope      app | category | domain
+  target     an app name, a main category ("entertainment") or a
+             "main/sub" pair ("entertainment/gaming"), or a hostname
+             (subdomains match: "youtube.com" covers "m.youtube.com")
+  budget     daily_limit_seconds — blocked once today's usage reaches it;
+             NULL blocks for the whole scheduled window
+  schedule   days (bitmask, Monday = 1 … Sunday = 64) and an optional
+             [start_minute, end_minute) window that wraps midnight when
+             end < start. "No games before 18:00" is
+             category entertainment/gaming, no budget, 00:00–18:00.
+
+CompiledRules normalizes the rows once (lowercased targets, the rule
+domains as a suffix set) and evaluate() checks every rule against the
+per-app / per-category / per-host counters kept by today_stats — dict
+lookups, no SQL — so hundreds of rules cost microseconds per cycle. It also
+returns how long until any rule can change state, which the monitor folds
+into its wake-up.
+
+App and category matches block: they feed BlockingService.blocked_apps and
+the process guard. A category blocks the apps configured in that category
+(by process name); browser time on a matching site counts toward the
+budget, but the browser itself is never killed. Domain matches only notify
+for the same reason.
+
+Usage
+-----
+  from src.services.limit_rules import CompiledRules
+
+  rules = CompiledRules(get_limit_rules())
+  result = rules.evaluate(datetime.now(), today_stats.counters(today))
+  result.block.matches("steam.exe")
+"""
+
+from datetime import datetime
+from typing import NamedTuple
+
+from src.config.category_manager import get_category, hostname
+
+SCOPES = ("app", "category", "domain")
+ALL_DAYS = 127
+WEEKDAYS = 31
+WEEKENDS = 96
+MINUTES_PER_DAY = 24 * 60
+# Bound on the memoized app-name / hostname lookups (rules outlive days)
+MEMO_SIZE = 10_000
+
+
+class LimitRule(NamedTuple):
+    id: int
+    scope: str
+    # Normalized: lowercased app name, "main" / "main/sub", or bare hostname
+    target: str
+    daily_limit_seconds: int | None
+    days: int
+    start_minute: int | None
+    end_minute: int | None
+
+    @property
+    def label(self) -> str:
+        return self.target.replace(".exe", "") if self.scope == "app" else self.target
+
+
+class RuleMatch(NamedTuple):
+    rule: LimitRule
+    # Today's usage of the rule's target, in active seconds
+    usage: int
+    # "limit" — budget reached; "schedule" — inside a no-budget window
+    reason: str
+
+
+class RuleBlock(NamedTuple):
+    """What the matching app / category rules block, as a process-name predicate."""
+    apps: frozenset = frozenset()
+    mains: frozenset = frozenset()
+    subs: frozenset = frozenset()
+
+    def __bool__(self) -> bool:
+        return bool(self.apps or self.mains or self.subs)
+
+    def matches(self, app_name: str) -> bool:
+        if not app_name:
+            return False
+        if app_name.lower() in self.apps:
+            return True
+        if self.mains or self.subs:
+            main, sub = get_category(app_name, None)
+            return main in self.mains or (main, sub) in self.subs
+        return False
+
+
+class RuleResult(NamedTuple):
+    matches: list
+    block: RuleBlock
+    # App names from today's counters that the block covers
+    blocked_apps: set
+    # Seconds until any rule can change state
+    wait: float
+
+
+def normalize_target(scope: str, target: str) -> str:
+    target = (target or "").strip().lower()
+    if scope == "domain":
+        host = hostname(target) if "://" in target else target.split("/")[0]
+        for prefix in ("*.", "www."):
+            if host.startswith(prefix):
+                host = host[len(prefix):]
+        return host
+    if scope == "category":
+        return "/".join(part.strip() for part in target.split("/", 1))
+    return target
+
+
+def parse_days(value) -> int:
+    """Day bitmask from an int mask, "all" / "weekdays" / "weekends", or weekday numbers (Monday = 0)."""
+    if value is None:
+        return ALL_DAYS
+    if isinstance(value, str):
+        named = {"all": ALL_DAYS, "weekdays": WEEKDAYS, "weekends": WEEKENDS}
+        if value.lower() not in named:
+            raise ValueError(f"days must be all, weekdays or weekends, not {value!r}")
+        return named[value.lower()]
+    if isinstance(value, int):
+        mask = value
+    else:
+        mask = 0
+        for day in value:
+            if not 0 <= int(day) <= 6:
+                raise ValueError("weekday numbers run from 0 (Monday) to 6 (Sunday)")
+            mask |= 1 << int(day)
+    if not 0 < mask <= ALL_DAYS:
+        raise ValueError("days must include at least one weekday")
+    return mask
+
+
+def parse_minute(value) -> int | None:
+    """Minute of the day from "HH:MM" (None / "" = no bound)."""
+    if value in (None, ""):
+        return None
+    hours, minutes = (int(part) for part in str(value).split(":", 1))
+    if not (0 <= hours <= 23 and 0 <= minutes <= 59):
+        raise ValueError(f"invalid time {value!r}")
+    return hours * 60 + minutes
+
+
+def format_minute(minute: int | None) -> str | None:
+    return None if minute is None else f"{minute // 60:02d}:{minute % 60:02d}"
+
+
+def _window(start: int, end: int, minute: int) -> tuple[bool, int | None]:
+    """(inside [start, end) now, minutes until the next boundary today)."""
+    if start <= end:
+        active = start <= minute < end
+    else:
+        active = minute >= start or minute < end
+    upcoming = [b - minute for b in (start, end) if minute < b < MINUTES_PER_DAY]
+    return active, min(upcoming) if upcoming else None
+
+
+class CompiledRules:
+    def __init__(self, rows):
+        """`rows`: (id, scope, target, daily_limit_seconds, days, start_minute, end_minute, is_enabled)."""
+        self.rules: list[LimitRule] = []
+        for rule_id, scope, target, limit, days, start, end, enabled in rows:
+            target = normalize_target(scope, target)
+            if not enabled or scope not in SCOPES or not target:
+                continue
+            self.rules.append(LimitRule(rule_id, scope, target, limit, days or ALL_DAYS, start, end))
+
+        # weekday -> [(rule, (start, end) or None)]; the day mask is applied here, once
+        self._by_weekday: list[list] = [[] for _ in range(7)]
+        for rule in self.rules:
+            window = None
+            if rule.start_minute is not None or rule.end_minute is not None:
+                window = (rule.start_minute or 0,
+                          MINUTES_PER_DAY if rule.end_minute is None else rule.end_minute)
+            for weekday in range(7):
+                if rule.days & (1 << weekday):
+                    self._by_weekday[weekday].append((rule, window))
+
+        self.app_targets = {rule.target for rule in self.rules if rule.scope == "app"}
+        self.domains = {rule.target for rule in self.rules if rule.scope == "domain"}
+        # Counter keys recur every cycle, so their lookups are memoized:
+        # app name -> rule target or None, hostname -> rule domains it falls under
+        self._app_keys: dict[str, str | None] = {}
+        self._host_domains: dict[str, tuple] = {}
+        # (RuleBlock, {app_name: blocked}) for the last block evaluated
+        self._blocked_memo: tuple = (None, {})
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    # ------------------------------------------------------------------
+    def _domains_of(self, host: str) -> tuple:
+        labels = host.split(".")
+        suffixes = (".".join(labels[i:]) for i in range(len(labels) - 1))
+        return tuple(suffix for suffix in suffixes if suffix in self.domains)
+
+    def _app_usage(self, apps: dict) -> dict:
+        """Active seconds per app-rule target (case-insensitive)."""
+        usage = {}
+        if not self.app_targets:
+            return usage
+        app_keys = self._app_keys
+        if len(app_keys) > MEMO_SIZE:
+            app_keys.clear()
+        for app_name, active in apps.items():
+            key = app_keys.get(app_name, "")
+            if key == "":
+                lowered = app_name.lower()
+                key = app_keys[app_name] = lowered if lowered in self.app_targets else None
+            if key is not None:
+                usage[key] = usage.get(key, 0) + active
+        return usage
+
+    def _host_usage(self, hosts: dict) -> dict:
+        """Active seconds per rule domain: every host summed into each domain suffix it has."""
+        usage = {}
+        if not self.domains:
+            return usage
+        host_domains = self._host_domains
+        if len(host_domains) > MEMO_SIZE:
+            host_domains.clear()
+        for host, active in hosts.items():
+            domains = host_domains.get(host)
+            if domains is None:
+                domains = host_domains[host] = self._domains_of(host)
+            for domain in domains:
+                usage[domain] = usage.get(domain, 0) + active
+        return usage
+
+    @staticmethod
+    def _category_usage(categories: dict) -> dict:
+        usage = {}
+        for (main, sub), active in categories.items():
+            usage[main] = usage.get(main, 0) + active
+            usage[f"{main}/{sub}"] = active
+        return usage
+
+    def _blocked_apps(self, block: RuleBlock, apps) -> set:
+        memo_block, memo = self._blocked_memo
+        if memo_block != block:
+            memo = {}
+            self._blocked_memo = (block, memo)
+        blocked = set()
+        for app_name in apps:
+            hit = memo.get(app_name)
+            if hit is None:
+                hit = memo[app_name] = block.matches(app_name)
+            if hit:
+                blocked.add(app_name)
+        return blocked
+
+    # ------------------------------------------------------------------
+    def evaluate(self, now: datetime, counters) -> RuleResult:
+        """Check every rule for `now` against a live_today.UsageCounters."""
+        rules = self._by_weekday[now.weekday()]
+        if not rules:
+            return RuleResult([], RuleBlock(), set(), float("inf"))
+
+        minute = now.hour * 60 + now.minute
+        into_minute = now.second + now.microsecond / 1e6
+        usage_by_scope = {
+            "app": self._app_usage(counters.apps),
+            "category": self._category_usage(counters.categories),
+            "domain": self._host_usage(counters.hosts),
+        }
+
+        matches = []
+        wait = float("inf")
+        for rule, window in rules:
+            if window is not None:
+                active, boundary = _window(window[0], window[1], minute)
+                if boundary is not None:
+                    wait = min(wait, boundary * 60 - into_minute)
+                if not active:
+                    continue
+
+            used = usage_by_scope[rule.scope].get(rule.target, 0)
+            limit = rule.daily_limit_seconds
+            if limit is None:
+                matches.append(RuleMatch(rule, used, "schedule"))
+            elif used >= limit:
+                matches.append(RuleMatch(rule, used, "limit"))
+            elif limit - used < wait:
+                # Usage grows at most one second per second
+                wait = limit - used
+
+        block_apps, mains, subs = set(), set(), set()
+        for match in matches:
+            rule = match.rule
+            if rule.scope == "app":
+                block_apps.add(rule.target)
+            elif rule.scope == "category":
+                if "/" in rule.target:
+                    subs.add(tuple(rule.target.split("/", 1)))
+                else:
+                    mains.add(rule.target)
+        block = RuleBlock(frozenset(block_apps), frozenset(mains), frozenset(subs))
+
+        blocked = self._blocked_apps(block, counters.apps) if block else set()
+        return RuleResult(matches, block, blocked, wait)
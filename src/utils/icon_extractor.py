@@ -66,9 +66,9 @@ def extract_icon_as_base64(exe_path, size=32):
 
 def get_exe_path_by_name(cursor, app_name):
     """
-    Attempts to find the executable path for a given app name from the activity logs.
+    Attempts to find the executable path for a given app name from the app dimension table.
     """
-    cursor.execute("SELECT exe_path FROM activity_logs WHERE app_name = ? AND exe_path IS NOT NULL ORDER BY id DESC LIMIT 1", (app_name,))
+    cursor.execute("SELECT exe_path FROM dim_apps WHERE app_name = ? AND exe_path != '' ORDER BY id DESC LIMIT 1", (app_name,))
     row = cursor.fetchone()
     if row:
         return row[0]
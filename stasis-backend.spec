@@ -25,7 +25,8 @@ a = Analysis(
         'cryptography',
         'watchdog.observers.winapi',
         '_psutil_windows',
-        'PIL.Image'
+        'PIL.Image',
+        'src.core.platform.win32'
     ],
     hookspath=[],
     hooksconfig={},